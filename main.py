@@ -1,66 +1,245 @@
 import os
 import sys
+import time
 import argparse
+import contextlib
+import tempfile
 
 # 'src' 폴더를 파이썬 경로에 추가하여 모듈을 임포트할 수 있게 함
 # (폴더 구조에 맞게 경로를 설정합니다)
 # sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
 
-# 각 단계별 클래스 임포트
-from src.c_parse_json import CParser
-from src.gimpleToJson import GimpleParser
-from src.makeEflow import MIFGenerator
+# 변환 파이프라인 임포트
+# (변환 파이프라인, 배치/증분/서버 모드는 --help에 필요 없으므로 사용할 때 불러오고,
+#  GIMPLE·MIF 단계 모듈은 캐시 적중 시 필요 없으므로 src/pipeline.py에서 실제로 실행할 때 불러옴)
+from src.cache import CompileCache, default_cache_dir
+from src.memory_image import FORMATS
+from src.allocator import DEFAULT_DEPTH, GPC_REGS
+from src.profiler import profiling, save_profile, span, metrics_path
+
+def collect_sources(path):
+    # 디렉터리면 하위의 모든 .c 파일을, 그 외에는 매니페스트(한 줄에 경로 하나)로 간주
+    if os.path.isdir(path):
+        sources = []
+        for root, dirs, files in os.walk(path):
+            dirs.sort()
+            for fname in sorted(files):
+                if fname.endswith(".c"):
+                    sources.append(os.path.join(root, fname))
+        return sources
+
+    manifest_dir = os.path.dirname(path)
+    sources = []
+    with open(path, 'rt', encoding='UTF8') as f:
+        for line in f:
+            line = line.split('#', 1)[0].strip()
+            if line:
+                sources.append(line if os.path.isabs(line) else os.path.join(manifest_dir, line))
+    return sources
+
+def plan_batch_jobs(sources, output_dir, build_root, ext=".mif"):
+    # 소스마다 고유한 작업 이름, 출력 경로, 개별 build 폴더를 결정
+    jobs = []
+    used_names = set()
+    for src_path in sources:
+        base_name = os.path.splitext(os.path.basename(src_path))[0]
+        name = base_name
+        n = 2
+        while name in used_names:
+            name = f"{base_name}_{n}"
+            n += 1
+        used_names.add(name)
+        jobs.append({
+            "name": name,
+            "input": os.path.abspath(src_path),
+            "output": os.path.abspath(os.path.join(output_dir, f"{name}{ext}")),
+            "build_dir": os.path.abspath(os.path.join(build_root, name)),
+        })
+    return jobs
+
+def open_cache(cache_opts):
+    # cache_opts: None(캐시 사용 안 함) 또는 {"dir": 경로, "max_bytes": 크기}
+    if not cache_opts:
+        return None
+    return CompileCache(cache_opts["dir"], cache_opts["max_bytes"])
+
+def prefetch_gimple(jobs, dump_dir, cache_opts, max_procs, options=None):
+    # 캐시에 없는 소스만 골라 묶음 단위 GCC 호출로 GIMPLE을 미리 생성 (프로세스 생성 비용 분산)
+    from src.pipeline import build_cache_key
+    from src.preprocess import preprocess
+    from src.toolchain import dump_gimple_batch
+    cache = open_cache(cache_opts)
+    pending = []
+    for job in jobs:
+        job["gimple_file"] = None
+        if os.path.exists(f"{job['input']}.gimple"):
+            continue
+        if cache is not None:
+            try:
+                with open(job["input"], 'rt', encoding='UTF8') as f:
+                    c_text = f.read()
+                # 캐시 키는 전처리 결과(포함한 헤더 내용까지)로 만듦
+                unit = preprocess(c_text, job["input"])
+            except Exception:
+                # 읽기/전처리 오류는 작업 안에서 다시 나도록 미리 생성하지 않음
+                continue
+            if cache.get(build_cache_key(unit, job["input"], options, cache.cache_dir)) is not None:
+                continue
+        pending.append(job)
+    if not pending:
+        return
+    with span("gcc_dump_batch", sources=len(pending)):
+        dumps = dump_gimple_batch([job["input"] for job in pending], dump_dir, max_procs=max_procs,
+                                  cache_dir=cache.cache_dir if cache else None)
+    for job in pending:
+        dump = dumps.get(job["input"])
+        # 실패한 소스는 작업 안에서 다시 GCC를 실행하여 오류를 해당 작업 로그에 남김
+        if not isinstance(dump, Exception):
+            job["gimple_file"] = dump
+
+def run_batch_job(job, debug=False, cache_opts=None, options=None, profile=False):
+    # 출력은 작업별 build 폴더의 build.log로 모으고, 예외는 결과로만 돌려줘 다른 작업에 영향을 주지 않음
+    # profile이면 작업의 단계별 기록 결과를 result["profile"]로 돌려줌
+    from src.pipeline import compile_file
+    start = time.perf_counter()
+    os.makedirs(job["build_dir"], exist_ok=True)
+    log_path = os.path.join(job["build_dir"], "build.log")
+    result = {"name": job["name"], "input": job["input"], "output": job["output"], "log": log_path}
+    with open(log_path, 'w', encoding='UTF8') as log, \
+            contextlib.redirect_stdout(log), contextlib.redirect_stderr(log), \
+            (profiling() if profile else contextlib.nullcontext()) as profiler:
+        try:
+            with span("compile", input=job["input"]):
+                compile_file(job["input"], job["output"], job["build_dir"], debug, open_cache(cache_opts), options,
+                             gimple_file=job.get("gimple_file"))
+            result["ok"] = True
+            result["error"] = None
+        except Exception as e:
+            result["ok"] = False
+            result["error"] = str(e).strip()
+            print(f"\n❌ 변환 중 오류 발생: {e}")
+    if profiler is not None:
+        result["profile"] = profiler.snapshot()
+    result["elapsed"] = time.perf_counter() - start
+    return result
+
+def run_batch(input_path, output_dir, build_root, jobs_count, debug=False, cache_opts=None, options=None,
+              profile_path=None):
+    # 여러 C 커널을 프로세스 풀에서 병렬로 변환하고 마지막에 요약을 출력
+    # profile_path가 주어지면 GIMPLE 일괄 덤프와 작업별 기록 결과를 trace 파일 하나로 저장
+    sources = collect_sources(input_path)
+    if not sources:
+        print(f"❌ 변환할 .c 파일이 없습니다: {input_path}")
+        return 1
+
+    jobs = plan_batch_jobs(sources, output_dir, build_root, FORMATS[(options or {}).get("format", "mif")])
+    jobs_count = max(1, min(jobs_count or os.cpu_count() or 1, len(jobs)))
+    print(f"🚀 배치 변환 시작: {len(jobs)}개 파일, 작업자 {jobs_count}개")
+
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+    start = time.perf_counter()
+    results = []
+    with tempfile.TemporaryDirectory(prefix="eoppp_gimple_") as dump_dir:
+        with profiling() if profile_path else contextlib.nullcontext() as profiler:
+            prefetch_gimple(jobs, dump_dir, cache_opts, jobs_count, options)
+        with ProcessPoolExecutor(max_workers=jobs_count) as pool:
+            futures = {pool.submit(run_batch_job, job, debug, cache_opts, options, profile_path is not None): job
+                       for job in jobs}
+            for future in as_completed(futures):
+                job = futures[future]
+                try:
+                    res = future.result()
+                except Exception as e:
+                    # 작업 프로세스 자체가 비정상 종료된 경우
+                    res = {"name": job["name"], "input": job["input"], "output": job["output"],
+                           "log": None, "ok": False, "error": str(e), "elapsed": 0.0}
+                mark = "✅" if res["ok"] else "❌"
+                print(f"{mark} {res['name']} ({res['elapsed']:.2f}s)")
+                results.append(res)
+    elapsed = time.perf_counter() - start
+
+    failed = sorted((r for r in results if not r["ok"]), key=lambda r: r["name"])
+    print("\n===== 배치 변환 요약 =====")
+    print(f"전체: {len(results)}  성공: {len(results) - len(failed)}  실패: {len(failed)}  소요: {elapsed:.2f}s")
+    for r in failed:
+        print(f"  ❌ {r['input']}: {r['error']} (로그: {r['log']})")
+    if profiler is not None:
+        profiled = sorted((r for r in results if "profile" in r), key=lambda r: r["name"])
+        save_profile(profile_path, [profiler.snapshot()] + [r["profile"] for r in profiled],
+                     ["batch"] + [r["name"] for r in profiled])
+        print(f"📊 프로파일 저장 -> {profile_path}, {metrics_path(profile_path)}")
+    return 1 if failed else 0
 
 def main():
+    # 상주 변환 서버 모드: 'py main.py serve [옵션]' (옵션은 src/server.py 참고)
+    if len(sys.argv) > 1 and sys.argv[1] == "serve":
+        from src.server import main as serve_main
+        sys.exit(serve_main(sys.argv[2:]))
+
     # 1. 커맨드 라인 인자 설정
     parser = argparse.ArgumentParser(description="C 코드를 EOPPP 아키텍처용 .mif 파일로 변환합니다.")
-    parser.add_argument("input_file", help="변환할 C 소스 파일 경로 (예: examples/test.c)")
-    parser.add_argument("-o", "--output", help="최종 저장될 MIF 파일 경로 (기본값: output/입력파일명.mif)")
+    parser.add_argument("input_file", help="변환할 C 소스 파일 경로 (예: examples/test.c). 디렉터리나 매니페스트 파일을 주면 배치 모드로 동작합니다.")
+    parser.add_argument("-o", "--output", help="최종 저장될 MIF 파일 경로 (기본값: output/입력파일명.mif, 배치 모드에서는 출력 폴더)")
+    parser.add_argument("--format", choices=list(FORMATS), default="mif", help="출력 형식: mif(텍스트 MIF), hex(Intel HEX), bin(리틀 엔디언 바이너리), coe(Xilinx COE), mem($readmemh) (기본값: mif)")
+    parser.add_argument("--depth", type=int, default=DEFAULT_DEPTH, help=f"메모리 깊이(32비트 워드 수, {GPC_REGS}의 배수). 배치할 GPC가 이 크기를 넘으면 점유 현황을 출력하고 실패합니다. (기본값: {DEFAULT_DEPTH})")
+    parser.add_argument("-j", "--jobs", type=int, default=0, help="배치 모드에서 동시에 실행할 작업 수. 단일 파일 모드에서는 함수가 많을 때(16개 이상) 함수별 매칭/GPC 빌드를 나눌 작업자 수이며 1이면 직렬로 실행합니다. 출력은 작업자 수와 관계없이 같습니다. (기본값: CPU 개수)")
     parser.add_argument("--debug", action="store_true", help="디버그 모드를 활성화하고 중간 파일을 유지합니다.")
+    parser.add_argument("--data-segment", action="store_true", help="전역 배열(초기값이 없으면 0)을 이어 붙인 데이터 메모리 이미지를 출력 옆의 [이름].data[확장자](--format과 같은 형식)로, 배열별 워드 주소표를 [이름].sym.json으로 저장합니다.")
+    parser.add_argument("--no-hwloop", action="store_true", help="반복 횟수가 정해진 루프도 하드웨어 루프(loopen_1d/2d)에 배정하지 않고 모두 r7 조건 비교/분기로 처리합니다.")
+    parser.add_argument("--ir", action="store_true", help="GIMPLE 매칭 결과를 이진 중간 형식(build/matched_gimple.eir, 함수별 오프셋 색인 포함)으로 저장합니다. makeEflow는 이 파일을 메모리 매핑하여 필요한 함수만 풀어 씁니다. (단일 파일 모드)")
+    parser.add_argument("--no-cache", action="store_true", help="컴파일 캐시를 사용하지 않습니다.")
+    parser.add_argument("--cache-dir", default=None, help="컴파일 캐시 폴더 (기본값: $EOPPP_CACHE_DIR 또는 ~/.cache/eoppp)")
+    parser.add_argument("--cache-max-mb", type=int, default=512, help="캐시 최대 크기(MB), 초과 시 오래 사용하지 않은 항목부터 삭제 (기본값: 512)")
+    parser.add_argument("--profile", default=None, metavar="TRACE", help="단계별 벽시계/CPU 시간, 최대 메모리(tracemalloc), 카운터를 Chrome/Perfetto trace-event JSON(TRACE)과 평탄한 metrics JSON(TRACE에서 확장자를 .metrics.json으로 바꾼 경로)으로 저장합니다.")
+    parser.add_argument("--incremental", action="store_true", help="이전 빌드의 함수별 지문(출력.mif.fp.json)과 비교하여 바뀐 함수의 GPC만 기존 .mif에 다시 씁니다. (단일 파일 모드, 캐시 미사용)")
     args = parser.parse_args()
 
+    options = {"format": args.format, "depth": args.depth}
+    if args.data_segment:
+        options["data_segment"] = True
+    if args.no_hwloop:
+        options["hwloop"] = False
+    cache_opts = None
+    if not args.no_cache:
+        cache_opts = {"dir": args.cache_dir or default_cache_dir(), "max_bytes": args.cache_max_mb * 1024 * 1024}
+
     # 2. 경로 자동 설정 및 생성
     input_c_file = args.input_file
-    
+
+    # 배치 모드: 디렉터리 또는 매니페스트 입력
+    # 없는 경로(오타 등)는 매니페스트로 넘기지 않고 .c 파일이 없을 때와 같은 오류로 보고
+    if not input_c_file.endswith(".c") and not os.path.exists(input_c_file):
+        print(f"\n❌ 변환 중 오류 발생: 파일을 찾을 수 없습니다: {input_c_file}")
+        sys.exit(1)
+    if os.path.isdir(input_c_file) or not input_c_file.endswith(".c"):
+        output_dir = args.output or "output"
+        sys.exit(run_batch(input_c_file, output_dir, os.path.join("build", "jobs"), args.jobs, args.debug, cache_opts,
+                           options, args.profile))
+
     # 출력 MIF 파일 경로 설정
     if args.output:
         output_mif_path = args.output
     else:
-        # 자동으로 'output' 폴더에 '[입력파일명].mif'로 생성
+        # 자동으로 'output' 폴더에 '[입력파일명].mif'(형식별 확장자)로 생성
         base_name = os.path.splitext(os.path.basename(input_c_file))[0]
-        output_mif_path = os.path.join("output", f"{base_name}.mif")
-
-    # 중간 파일들을 저장할 'build' 폴더 설정
-    build_dir = "build"
-    os.makedirs(build_dir, exist_ok=True)
-    os.makedirs(os.path.dirname(output_mif_path), exist_ok=True)
-
-    # 중간 파일 경로 정의
-    c_json_path = os.path.join(build_dir, "parsed_.json")
-    gimple_json_path = os.path.join(build_dir, "matched_gimple.json")
+        output_mif_path = os.path.join("output", f"{base_name}{FORMATS[args.format]}")
 
     # 3. 변환 파이프라인 실행
+    from src.pipeline import compile_file
     try:
-        print(f"🚀 변환 시작: {input_c_file}")
-
-        # 1단계: C -> JSON
-        print("\n[1/3] C 코드 파싱 중...")
-        c_parser = CParser(input_c_file)
-        c_parser.save_to_json(c_json_path)
-        print(f"✅ C 파싱 완료 -> {c_json_path}")
-
-        # 2단계: GIMPLE -> JSON
-        print("\n[2/3] GIMPLE 매칭 중...")
-        gim_parser = GimpleParser(input_c_file, c_json_path)
-        gim_parser.save_to_json(gimple_json_path)
-        print(f"✅ GIMPLE 매칭 완료 -> {gimple_json_path}")
-
-        # 3단계: JSON -> MIF
-        print("\n[3/3] eFlow MIF 파일 생성 중...")
-        eflow_parser = MIFGenerator(gimple_json_path, c_json_path, output_mif_path, args.debug)
-        eflow_parser.run()
-        print(f"✅ MIF 생성 완료 -> {output_mif_path}")
-
+        with profiling() if args.profile else contextlib.nullcontext() as profiler:
+            with span("compile", input=input_c_file):
+                if args.incremental:
+                    if args.format != "mif":
+                        raise Exception("--incremental은 mif 형식에서만 사용할 수 있습니다.")
+                    from src.incremental import compile_incremental
+                    compile_incremental(input_c_file, output_mif_path, "build", args.debug, options)
+                else:
+                    compile_file(input_c_file, output_mif_path, "build", args.debug, open_cache(cache_opts), options,
+                                 jobs=args.jobs, ir=args.ir)
+        if profiler is not None:
+            save_profile(args.profile, [profiler.snapshot()])
+            print(f"📊 프로파일 저장 -> {args.profile}, {metrics_path(args.profile)}")
     except FileNotFoundError as e:
         print(f"\n❌ 파일 오류: {e.filename} 파일을 찾을 수 없습니다.")
         sys.exit(1)
@@ -71,4 +250,4 @@ def main():
     print("\n🎉 모든 작업이 성공적으로 완료되었습니다!")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
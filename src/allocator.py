@@ -0,0 +1,81 @@
+import hashlib
+
+# GPC 하나의 레지스터(워드) 수와 기본 메모리 깊이 (MIFGenerator.REGS/DEPTH, 변환 단계를 불러오지 않고 쓸 수 있도록 여기에 둠)
+GPC_REGS = 128
+DEFAULT_DEPTH = 8192
+
+
+class GPCAllocator:
+    # GPC 블록(레지스터 워드 128개)을 메모리 깊이 안에 순서대로 배치
+    # 워드와 레지스터 주석이 같은 블록은 내용 해시로 찾아 물리 GPC 하나를 공유
+    def __init__(self, depth, regs):
+        if depth <= 0 or depth % regs:
+            raise Exception(f"메모리 깊이(DEPTH)는 GPC 크기 {regs}의 배수여야 합니다: {depth}")
+        self.depth = depth
+        self.regs = regs
+        self.capacity = depth // regs
+        self.owners = []  # [물리 GPC마다 처음 배치된 논리 GPC]
+        self.hashes = []  # [물리 GPC마다 블록 해시]
+        self.by_hash = {}  # {블록 해시: 물리 GPC}
+        self.placement = {}  # {논리 GPC: 물리 GPC}
+        self.labels = {}  # {논리 GPC: "함수 이름 역할"}
+
+    @staticmethod
+    def block_hash(words, comments=()):
+        # 데이터 워드와 레지스터별 주석 내용(명령어, 설명, 레지스터 조합)을 함께 해시
+        # 명령어와 조합은 .mif 주석에만 남고 시뮬레이터도 주석에서 읽으므로, 워드만 같은 블록을 공유하면 다른 함수의 프로그램이 됨
+        h = hashlib.sha256(words.tobytes())
+        for text in comments:
+            data = text.encode("utf-8")
+            h.update(len(data).to_bytes(4, "little"))
+            h.update(data)
+        return h.hexdigest()
+
+    def place(self, gpc, words, label, comments=()):
+        # 논리 GPC 하나를 배치하고 물리 GPC 번호를 반환
+        h = self.block_hash(words, comments)
+        slot = self.by_hash.get(h)
+        if slot is None:
+            slot = len(self.owners)
+            self.owners.append(gpc)
+            self.hashes.append(h)
+            self.by_hash[h] = slot
+        self.placement[gpc] = slot
+        self.labels[gpc] = label
+        return slot
+
+    @property
+    def used(self):
+        return len(self.owners)
+
+    def sharing(self):
+        # {물리 GPC: [논리 GPC, ...]} 중 둘 이상이 공유하는 것만
+        users = {}
+        for gpc, slot in self.placement.items():
+            users.setdefault(slot, []).append(gpc)
+        return {slot: gpcs for slot, gpcs in users.items() if len(gpcs) > 1}
+
+    def summary(self):
+        saved = len(self.placement) - self.used
+        return (f"GPC 사용량: {self.used}/{self.capacity} ({self.used * 100 // self.capacity}%), "
+                f"블록 공유로 {saved}개 절약")
+
+    def report(self):
+        # 점유 현황: 요약 한 줄과 논리 GPC별 배치 표
+        lines = [self.summary()]
+        shared = self.sharing()
+        for gpc, slot in self.placement.items():
+            mark = " (공유)" if slot in shared else ""
+            lines.append(f"  GPC {slot:<4} <- {self.labels[gpc]}{mark}")
+        return lines
+
+    def check(self):
+        # 메모리 깊이를 넘으면 출력 전에 점유 현황과 함께 실패
+        if self.used > self.capacity:
+            report = "\n".join(self.report())
+            raise Exception(f"GPC 공간 부족: {self.used}개 블록이 필요하지만 DEPTH = {self.depth}에는 "
+                            f"{self.capacity}개만 들어갑니다.\n{report}")
+
+    def placement_comments(self):
+        # 블록을 공유하면 함수별 GPC 번호가 더 이상 2i / 2i+1이 아니므로 .mif 앞에 배치 표를 남김
+        return [f"-- placement: GPC {slot:<4} <- {self.labels[gpc]}" for gpc, slot in self.placement.items()]
@@ -0,0 +1,345 @@
+import os
+import sys
+import json
+import math
+import time
+import random
+import argparse
+import platform
+import tempfile
+import tracemalloc
+import contextlib
+
+from src.c_parse_json import CParser
+from src.gimpleToJson import GimpleParser
+from src.makeEflow import MIFGenerator
+from src.pipeline import COMPILER_VERSION, PARALLEL_MIN_FUNCTIONS, run_stages
+from src.preprocess import preprocess
+from src.toolchain import dump_gimple_text, gcc_version
+
+# 기본 기준 결과 파일 (--update-baseline으로 갱신)
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks",
+                                "baseline.json")
+
+# 측정 단계 (순서대로 실행)
+STAGES = ("gcc", "c_parse", "gimple_match", "mif_build", "mif_render")
+# 회귀 판단 대상 (gcc는 외부 도구이고 시스템 부하에 따라 흔들리므로 기록만 함)
+CHECKED_STAGES = ("c_parse", "gimple_match", "mif_build", "mif_render")
+# 증가율 상한: 묶음에서 가장 큰 두 경우 사이의 log-log 기울기가 이 값을 넘으면 기준 결과와 상관없이 회귀
+# (선형이면 1, 작은 경우에 섞인 고정 비용과 측정 잡음을 감안한 여유분 포함)
+MAX_SLOPE = 1.35
+# 기울기를 비교할 두 경우의 입력 크기 비율 하한 (크기 차이가 작으면 기울기가 잡음에 크게 흔들림)
+MIN_SLOPE_SIZE_RATIO = 2
+
+# 합성 커널 기본 크기
+DEFAULT_PARAMS = {"functions": 4, "loops": 2, "depth": 1, "body": 8, "array": 64, "seed": 1}
+
+# 병렬 빌드 검사용 커널: 함수별 프로세스 풀을 쓰도록 PARALLEL_MIN_FUNCTIONS보다 함수가 많고 본문이 긴 커널
+PARALLEL_CHECK_PARAMS = dict(DEFAULT_PARAMS, functions=max(24, PARALLEL_MIN_FUNCTIONS), body=64)
+PARALLEL_CHECK_JOBS = 4
+
+# 규모별 측정 묶음: 매개변수 하나만 키우면서 나머지는 기본값 유지 (단계별 증가율을 비교하기 위함)
+SCALING_SERIES = {
+    "functions": [2, 8, 24],
+    "loops": [1, 4, 12],
+    "depth": [1, 2, 4],
+    "body": [4, 16, 64, 160, 640],
+    "array": [64, 4096, 65536],
+}
+
+
+def kernel_source(functions=4, loops=2, depth=1, body=8, array=64, seed=1):
+    # 합성 C 커널 생성: 전역 배열 하나(array개 초기화 값)와 main에서 호출하는 함수 functions개
+    # 함수마다 깊이 depth로 중첩된 for 루프 loops개, 가장 안쪽 루프에 대입문 body개와 조기 종료 if
+    rng = random.Random(seed)
+    nvars = max(2, min(body, 16))
+    out = ["#include <stdio.h>", ""]
+    values = ", ".join(str(rng.randrange(-1000, 1000)) for _ in range(array))
+    out.append(f"int gtab[{array}] = {{{values}, }};")
+    out.append("")
+    for f in range(functions):
+        out.append(f"void kern{f}()")
+        out.append("{")
+        for d in range(depth):
+            out.append(f"    int i{d} = 0;")
+            out.append(f"    int n{d} = {rng.randrange(4, 64)};")
+        for v in range(nvars):
+            out.append(f"    int a{v} = {rng.randrange(0, 100)};")
+        out.append(f"    int lim = {rng.randrange(1000, 100000)};")
+        for _ in range(loops):
+            for d in range(depth):
+                indent = "    " * (d + 1)
+                out.append(f"{indent}for( i{d}=0;i{d}<n{d}; i{d}=i{d}+1) {{")
+            indent = "    " * (depth + 1)
+            for s in range(body):
+                dst, a, b = s % nvars, rng.randrange(nvars), rng.randrange(nvars)
+                if s % 4 == 3:
+                    out.append(f"{indent}a{dst} = a{a} + gtab[i{depth - 1}];")
+                else:
+                    out.append(f"{indent}a{dst} = a{a} + a{b};")
+            out.append(f"{indent}if(a0>lim) {{")
+            out.append(f"{indent}    break;")
+            out.append(f"{indent}}}")
+            for d in reversed(range(depth)):
+                out.append("    " * (d + 1) + "}")
+        out.append("    return ;")
+        out.append("};")
+        out.append("")
+    out.append("int main(void) {")
+    for f in range(functions):
+        out.append(f"    kern{f}();")
+    out.append("    return 0 ;")
+    out.append("}")
+    return "\n".join(out) + "\n"
+
+
+def required_depth(functions):
+    # 함수당 초기화/연산 GPC 2개 + 추가 상태 여유분 (GPC 128워드 단위)
+    return max(MIFGenerator.DEPTH, MIFGenerator.REGS * 4 * (functions + 1))
+
+
+def run_case(c_text, depth, work_dir, measure_memory=False):
+    # 단계별로 한 번 실행하여 {단계: 소요 시간(초)}와 {단계: 최대 메모리(KB)}, 규모 정보를 반환
+    # measure_memory면 tracemalloc으로 단계별 최대 할당량을 측정 (시간 측정과 분리하여 따로 실행)
+    c_file = os.path.join(work_dir, "kernel.c")
+    with open(c_file, "w", encoding="utf-8") as f:
+        f.write(c_text)
+    times, peaks = {}, {}
+    state = {}
+
+    def stage(name, fn):
+        if measure_memory:
+            tracemalloc.reset_peak()
+        start = time.perf_counter()
+        state[name] = fn()
+        times[name] = time.perf_counter() - start
+        if measure_memory:
+            peaks[name] = tracemalloc.get_traced_memory()[1] // 1024
+
+    if measure_memory:
+        tracemalloc.start()
+    dump_dir = tempfile.mkdtemp(prefix="gcc_", dir=work_dir)
+    try:
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            # gcc: 파이프라인과 같이 전처리 한 번 + 전처리된 텍스트에서 GIMPLE 덤프
+            def run_gcc():
+                unit = preprocess(c_text, c_file)
+                return unit, dump_gimple_text(unit.text, dump_dir, language="cpp-output")
+            stage("gcc", run_gcc)
+            unit, gimple_file = state["gcc"]
+            stage("c_parse", lambda: CParser(c_file, c_text=unit.source, macros=unit.macros).parse_multiple_functions())
+            gim_parser = GimpleParser(c_file, json_data=state["c_parse"], c_text=c_text, gimple_file=gimple_file)
+            stage("gimple_match", gim_parser.parse_and_match_gimple)
+
+            def build():
+                generator = MIFGenerator(parsed_data=state["c_parse"], gimple_data=state["gimple_match"], depth=depth)
+                generator.init_data()
+                return generator, generator.build_lines()
+            stage("mif_build", build)
+            generator, lines = state["mif_build"]
+            stage("mif_render", lambda: generator.render_mif(lines, generator.depth))
+    finally:
+        if measure_memory:
+            tracemalloc.stop()
+    with open(gimple_file, "r", encoding="utf-8") as f:
+        gimple_lines = sum(1 for _ in f)
+    sizes = {
+        "c_lines": c_text.count("\n"),
+        "c_bytes": len(c_text),
+        "gimple_lines": gimple_lines,
+        "gpcs": len(generator.mp.files),
+    }
+    return times, peaks, sizes
+
+
+def benchmark_case(name, params, repeat=3):
+    # 같은 커널을 repeat번 실행하여 단계별 최소 시간을 기록하고, 한 번 더 실행하여 메모리를 측정
+    c_text = kernel_source(**params)
+    depth = required_depth(params["functions"])
+    best = {}
+    with tempfile.TemporaryDirectory(prefix="eoppp_bench_") as work_dir:
+        for _ in range(max(1, repeat)):
+            times, _, sizes = run_case(c_text, depth, work_dir)
+            for stage, t in times.items():
+                best[stage] = min(best.get(stage, t), t)
+        _, peaks, _ = run_case(c_text, depth, work_dir, measure_memory=True)
+    return {
+        "name": name,
+        "params": params,
+        "sizes": sizes,
+        "seconds": {stage: round(best[stage], 6) for stage in STAGES},
+        "total": round(sum(best.values()), 6),
+        "peak_kb": peaks,
+    }
+
+
+def check_parallel(params=None, jobs=PARALLEL_CHECK_JOBS):
+    # 같은 커널을 직렬(-j 1)과 jobs개 작업자로 변환하여 .mif가 바이트 단위로 같은지 확인
+    # 다르면 처음 달라진 줄을 담은 회귀 설명, 같으면 None
+    params = params or PARALLEL_CHECK_PARAMS
+    c_text = kernel_source(**params)
+    options = {"depth": required_depth(params["functions"])}
+    outputs = []
+    with tempfile.TemporaryDirectory(prefix="eoppp_bench_") as work_dir:
+        c_file = os.path.join(work_dir, "kernel.c")
+        with open(c_file, "w", encoding="utf-8") as f:
+            f.write(c_text)
+        for n in (1, jobs):
+            with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+                generator, lines, _ = run_stages(c_text=c_text, c_file_path=c_file, options=options, jobs=n)
+            outputs.append(generator.render_mif(lines, generator.depth))
+    if outputs[0] == outputs[1]:
+        return None
+    serial, parallel = outputs[0].split("\n"), outputs[1].split("\n")
+    line = next((i for i, (a, b) in enumerate(zip(serial, parallel)) if a != b), min(len(serial), len(parallel)))
+    return f"병렬 빌드(-j {jobs}) 출력이 직렬 빌드와 다릅니다: {line + 1}번째 줄부터 (함수 {params['functions']}개)"
+
+
+def scaling_exponents(cases):
+    # 가장 작은 경우와 가장 큰 경우 사이의 단계별 log-log 기울기 (1이면 선형, 2면 제곱)
+    # C 소스 크기(바이트)를 입력 크기로 사용 (전역 배열 초기화 값은 줄 수가 늘지 않음)
+    first, last = cases[0], cases[-1]
+    x0, x1 = first["sizes"]["c_bytes"], last["sizes"]["c_bytes"]
+    if x1 <= x0:
+        return {}
+    slopes = {}
+    for stage in STAGES:
+        t0, t1 = first["seconds"][stage], last["seconds"][stage]
+        if t0 > 0 and t1 > 0:
+            slopes[stage] = round(math.log(t1 / t0) / math.log(x1 / x0), 3)
+    return slopes
+
+
+def run_suite(series=None, repeat=3, log=print):
+    # 규모별 측정 묶음을 실행하여 결과 딕셔너리를 반환
+    results = {
+        "version": COMPILER_VERSION,
+        "python": platform.python_version(),
+        "gcc": gcc_version().splitlines()[0],
+        "platform": platform.platform(),
+        "repeat": repeat,
+        "cases": [],
+        "scaling": {},
+    }
+    for param in series or SCALING_SERIES:
+        cases = []
+        for value in SCALING_SERIES[param]:
+            params = dict(DEFAULT_PARAMS, **{param: value})
+            case = benchmark_case(f"{param}={value}", params, repeat)
+            log(f"  {case['name']:<16} {case['sizes']['c_lines']:>7}줄  "
+                + "  ".join(f"{stage} {case['seconds'][stage] * 1000:8.1f}ms" for stage in STAGES)
+                + f"  최대 {max(case['peak_kb'].values())}KB")
+            cases.append(case)
+        results["cases"].extend(cases)
+        results["scaling"][param] = scaling_exponents(cases)
+    return results
+
+
+def compare(results, baseline, threshold=1.5, min_seconds=0.01, slope_margin=0.3, max_slope=MAX_SLOPE):
+    # 기준 결과와 비교하여 회귀 목록을 반환
+    #   단계 시간: 기준보다 threshold배 이상 느리고 차이가 min_seconds 이상이면 회귀
+    #   증가율: 단계별 log-log 기울기가 기준보다 slope_margin 이상 커지면 회귀 (선형 경로가 초선형이 된 경우)
+    #           가장 큰 경우의 시간이 min_seconds보다 짧은 단계는 잡음이 크므로 제외
+    #   증가율 상한: 가장 큰 두 경우 사이의 기울기가 max_slope를 넘으면 기준 결과와 상관없이 회귀
+    #                (기준 결과를 초선형인 상태에서 만들었더라도 걸리도록)
+    regressions = []
+    old_cases = {case["name"]: case for case in baseline.get("cases", [])}
+    for case in results["cases"]:
+        old = old_cases.get(case["name"])
+        if old is None or old.get("params") != case["params"]:
+            continue
+        for stage in CHECKED_STAGES:
+            t, t0 = case["seconds"][stage], old["seconds"].get(stage)
+            if t0 is None:
+                continue
+            if t > t0 * threshold and t - t0 >= min_seconds:
+                regressions.append(f"{case['name']} {stage}: {t0 * 1000:.1f}ms -> {t * 1000:.1f}ms ({t / max(t0, 1e-9):.2f}배)")
+    groups = {}
+    for case in results["cases"]:
+        groups.setdefault(case["name"].split("=")[0], []).append(case)
+    largest = {param: cases[-1] for param, cases in groups.items()}
+    for param, slopes in results["scaling"].items():
+        cases = groups[param]
+        if cases[-1]["sizes"]["c_bytes"] < cases[0]["sizes"]["c_bytes"] * MIN_SLOPE_SIZE_RATIO:
+            continue
+        old_slopes = baseline.get("scaling", {}).get(param, {})
+        for stage, slope in slopes.items():
+            if stage not in CHECKED_STAGES or largest[param]["seconds"][stage] < min_seconds:
+                continue
+            if stage in old_slopes and slope > old_slopes[stage] + slope_margin:
+                regressions.append(f"증가율 {param} {stage}: {old_slopes[stage]} -> {slope}")
+    for param, cases in groups.items():
+        if len(cases) < 2 or cases[-1]["sizes"]["c_bytes"] < cases[-2]["sizes"]["c_bytes"] * MIN_SLOPE_SIZE_RATIO:
+            continue
+        for stage, slope in scaling_exponents(cases[-2:]).items():
+            if stage in CHECKED_STAGES and cases[-1]["seconds"][stage] >= min_seconds and slope > max_slope:
+                regressions.append(f"증가율 상한 {param} {stage}: {slope} > {max_slope} "
+                                   f"({cases[-2]['name']} -> {cases[-1]['name']})")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="합성 C 커널로 변환 단계별 시간과 메모리를 측정합니다.")
+    parser.add_argument("--series", action="append", choices=list(SCALING_SERIES),
+                        help="측정할 규모 묶음 (여러 번 지정 가능, 기본값: 전체)")
+    parser.add_argument("--repeat", type=int, default=3, help="경우마다 반복 실행 횟수, 최소 시간을 기록 (기본값: 3)")
+    parser.add_argument("-o", "--output", default=None, help="결과 JSON 저장 경로")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help=f"비교할 기준 결과 JSON (기본값: {DEFAULT_BASELINE})")
+    parser.add_argument("--update-baseline", action="store_true", help="비교하지 않고 결과를 기준 결과로 저장")
+    parser.add_argument("--threshold", type=float, default=1.5, help="회귀로 판단할 시간 배율 (기본값: 1.5)")
+    parser.add_argument("--skip-parallel-check", action="store_true",
+                        help=f"직렬/병렬(-j {PARALLEL_CHECK_JOBS}) 빌드 출력 비교를 건너뜀")
+    parser.add_argument("--emit", metavar="C_FILE", default=None, help="기본 크기(--set으로 변경)의 합성 커널만 저장하고 종료")
+    parser.add_argument("--set", action="append", metavar="NAME=VALUE", default=[],
+                        help=f"--emit 커널 크기 ({', '.join(DEFAULT_PARAMS)})")
+    args = parser.parse_args(argv)
+
+    if args.emit:
+        params = dict(DEFAULT_PARAMS)
+        for item in args.set:
+            key, _, value = item.partition("=")
+            if key not in params:
+                raise Exception(f"알 수 없는 커널 매개변수입니다: {key}")
+            params[key] = int(value)
+        with open(args.emit, "w", encoding="utf-8") as f:
+            f.write(kernel_source(**params))
+        print(f"✅ 합성 커널 저장 -> {args.emit}")
+        return 0
+
+    print("🚀 변환 벤치마크 시작")
+    results = run_suite(args.series, args.repeat)
+    text = json.dumps(results, indent=1, ensure_ascii=False)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text)
+        print(f"✅ 결과 저장 -> {args.output}")
+
+    if args.update_baseline:
+        os.makedirs(os.path.dirname(os.path.abspath(args.baseline)), exist_ok=True)
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            f.write(text)
+        print(f"✅ 기준 결과 갱신 -> {args.baseline}")
+        return 0
+
+    try:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+    except OSError:
+        print(f"기준 결과가 없습니다: {args.baseline} (--update-baseline으로 생성)")
+        return 0
+    regressions = compare(results, baseline, args.threshold)
+    if not args.skip_parallel_check:
+        mismatch = check_parallel()
+        if mismatch:
+            regressions.append(mismatch)
+    if regressions:
+        print("\n❌ 성능 회귀:")
+        for item in regressions:
+            print(f"  {item}")
+        return 1
+    print("\n✅ 기준 결과 대비 회귀 없음")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
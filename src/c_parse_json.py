@@ -1,10 +1,109 @@
 import re
 import json
 
+from src.preprocess import int_constant
+from src.data_segment import json_default, parse_array_values
+
+# 주석과 문자열/문자 리터럴 (리터럴 안의 '//', '/*'를 주석으로 오인하지 않도록 함께 매칭)
+COMMENT_OR_LITERAL_RE = re.compile(r'//[^\n]*|/\*.*?\*/|"(?:\\.|[^"\\\n])*"|\'(?:\\.|[^\'\\\n])*\'', re.DOTALL)
+# 함수 범위 색인에 필요한 토큰: 리터럴, 전처리 지시문 라인, 중괄호, 세미콜론
+STRUCTURE_TOKEN_RE = re.compile(r'"(?:\\.|[^"\\\n])*"|\'(?:\\.|[^\'\\\n])*\'|^[ \t]*#[^\n]*|[{};]', re.MULTILINE)
+# 최상위 '{' 앞의 함수 시그니처 (반환형 + 이름 + 매개변수)
+FUNC_HEADER_RE = re.compile(r'(?:[A-Za-z_]\w*[\s*]+)+([A-Za-z_]\w*)\s*\((.*)\)', re.DOTALL)
+C_KEYWORDS = {"if", "for", "while", "switch", "return", "sizeof", "do", "else"}
+
+# 라인 단위 파싱 정규식 (모듈 로드 시 한 번만 컴파일)
+C_TYPES = r'(int|float|double|long long int)'
+PROTOTYPE_RE = re.compile(r'(void|int)\s+\w+\s*\(.+\)(\s*\{)?')
+DECL_RE = re.compile(C_TYPES + r'\s+(\w+)\s*;')
+INIT_LINE_RE = re.compile(C_TYPES + r'\s+\w+\s*=.*')
+INIT_VALUE_RE = re.compile(C_TYPES + r'\s+(\w+)\s*=\s*(0x[0-9a-fA-F]+|\d*\.?\d+)')
+INIT_EXPR_RE = re.compile(C_TYPES + r'\s+(\w+)\s*=\s*(.+?)\s*;')
+SCALAR_INIT_RE = re.compile(C_TYPES + r'\s+(\w+)\s*=\s*(0x[0-9a-fA-F]+|\d*\.?\d+)\s*;')
+ARRAY_DECL_RE = re.compile(C_TYPES + r'\s+(\w+)\s*\[\s*([^\]]+?)\s*\]\s*(=\s*\{(.+?)\})?\s*;')
+ARRAY_START_RE = re.compile(C_TYPES + r'\s+\w+\s*\[[^\]]*\]\s*=\s*\{')
+NUMBER_RE = re.compile(r'-?\d*\.?\d+')
+CONST_ASSIGN_RE = re.compile(r'(\w+)\s*=\s*(0x[0-9a-fA-F]+|\d*\.?\d+)\s*;')
+FOR_HEADER_RE = re.compile(r'for\s*\((.+?)\)\s*\{')
+IF_HEADER_RE = re.compile(r'if\s*\((.+?)\)\s*\{')
+MAIN_CALL_RE = re.compile(r'(\w+)\s*\([^)]*\)\s*(?:;|\n|$)')
+
+
+def strip_comments(text):
+    # 한 번의 순회로 주석을 공백으로 치환 (줄 번호가 유지되도록 블록 주석의 줄바꿈은 보존)
+    def repl(m):
+        token = m.group(0)
+        if token.startswith('/*'):
+            return ' ' + '\n' * token.count('\n')
+        if token.startswith('//'):
+            return ' '
+        return token
+    return COMMENT_OR_LITERAL_RE.sub(repl, text)
+
+
+def build_function_index(code):
+    # 주석이 제거된 소스를 한 번 순회하며 실제 중괄호 짝을 맞춰 함수 범위 색인을 만듦
+    # 반환값: {함수 이름: (시작, 끝, 본문 시작, 본문 끝)}  (본문은 중괄호 안쪽)
+    index = {}
+    depth = 0
+    boundary = 0        # 최상위에서 마지막 문장 경계(';', '}', 전처리 지시문) 직후 위치
+    current = None      # 현재 열려 있는 함수 (이름, 시작, 본문 시작)
+    for m in STRUCTURE_TOKEN_RE.finditer(code):
+        token = m.group(0)
+        ch = token[0] if token[0] in '{};' else None
+        if ch is None:
+            if depth == 0 and token.lstrip().startswith('#'):
+                boundary = m.end()
+            continue
+        if ch == ';':
+            if depth == 0:
+                boundary = m.end()
+        elif ch == '{':
+            if depth == 0:
+                header = code[boundary:m.start()]
+                stripped = header.strip()
+                hm = FUNC_HEADER_RE.fullmatch(stripped)
+                if hm and hm.group(1) not in C_KEYWORDS:
+                    start = boundary + (len(header) - len(header.lstrip()))
+                    current = (hm.group(1), start, m.end())
+            depth += 1
+        else:
+            depth -= 1
+            if depth == 0:
+                if current is not None:
+                    name, start, body_start = current
+                    index.setdefault(name, (start, m.end(), body_start, m.start()))
+                    current = None
+                boundary = m.end()
+            elif depth < 0:
+                depth = 0
+    return index
+
+
 class CParser:
-    def __init__(self, file_path):
+    def __init__(self, file_path=None, c_text=None, macros=None):
+        # c_text가 주어지면 파일을 읽지 않고 메모리 상의 소스를 그대로 사용
+        # macros: 전처리 단계(TranslationUnit)의 매크로 표. 주어지면 c_text는 전처리된 주 소스로 보고
+        # 배열 크기 등의 상수식을 정수로 계산하며, 결과에 "macros"로 함께 기록
         self.file_path = file_path
-        self.c_text = self._read_file()
+        self.c_text = c_text if c_text is not None else self._read_file()
+        self.macros = macros
+        self._code = None
+        self._func_index = None
+
+    @property
+    def code(self):
+        # 주석이 제거된 소스 (처음 사용할 때 한 번만 생성)
+        if self._code is None:
+            self._code = strip_comments(self.c_text)
+        return self._code
+
+    @property
+    def function_index(self):
+        # {함수 이름: (시작, 끝, 본문 시작, 본문 끝)}
+        if self._func_index is None:
+            self._func_index = build_function_index(self.code)
+        return self._func_index
 
     def _read_file(self):
         # 파일을 읽어서 텍스트를 반환하는 함수
@@ -18,25 +117,28 @@ class CParser:
 
     def parse_global_variables(self):
         # C 파일의 상단에서 전역 변수 선언 및 초기화 내용을 추출
-        global_vars = {"declarations": [], "initializations": {}}
-        lines = self.c_text.split('\n')
+        # arrays: {배열 이름: {"type": C 원소형, "size": 크기}} (데이터 메모리 배치용, 초기값은 initializations의 array)
+        global_vars = {"declarations": [], "initializations": {}, "arrays": {}}
+        # 함수부 시작 전까지만 분석 (함수 범위 색인 기준)
+        first_func = min((span[0] for span in self.function_index.values()), default=len(self.code))
+        lines = self.code[:first_func].split('\n')
         i = 0
         while i < len(lines):
-            #함수부
             line = lines[i].strip()
-            func_match = re.match(r'(void|int)\s+\w+\s*\(.+\)(\s*\{)?', line)
+            #함수 원형 선언부
+            func_match = PROTOTYPE_RE.match(line)
             if func_match:
                 break  # 함수부 시작 시 전역 변수 파싱 종료
 
             #선언 및 초기화 파싱
-            decl_match = re.match(r'(int|float|double|long long int)\s+(\w+)\s*;', line)
+            decl_match = DECL_RE.match(line)
             if decl_match:
                 type_name, var_name = decl_match.groups()
                 if var_name not in global_vars["declarations"]:
                     global_vars["declarations"].append(var_name)
                     global_vars["initializations"][var_name] = None
             #초기화 파싱 int부분과 longlong int가 아닌 부분 float
-            init_match = re.match(r'(int|float|double|long long int)\s+(\w+)\s*=\s*(0x[0-9a-fA-F]+|\d*\.?\d+)\s*;', line)
+            init_match = SCALAR_INIT_RE.match(line)
             if init_match:
                 type_name, var_name, value = init_match.groups()
                 if var_name not in global_vars["declarations"]:
@@ -45,46 +147,52 @@ class CParser:
                     global_vars["initializations"][var_name] = int(value, 16) if value.startswith('0x') else int(float(value))
                 else:
                     global_vars["initializations"][var_name] = float(value)
-            #배열 초기화 파싱
-            array_match = re.match(r'(int|float|double|long long int)\s+(\w+)\s*\[\s*(\w+|\d+)\s*\]\s*(=\s*\{(.+?)\})?\s*;', line)
+            #배열 초기화 파싱 (초기값이 여러 줄에 걸치면 닫는 중괄호까지 이어 붙임)
+            if '{' in line and '}' not in line and ARRAY_START_RE.match(line):
+                end = i
+                while end + 1 < len(lines) and '}' not in lines[end]:
+                    end += 1
+                line = " ".join(part.strip() for part in lines[i:end + 1])
+                i = end
+            array_match = ARRAY_DECL_RE.match(line)
             if array_match:
                 type_name, var_name, size, _, init_values = array_match.groups()
-                size = int(size) if size.isdigit() else size
+                if size.isdigit():
+                    size = int(size)
+                elif self.macros is not None:
+                    value = int_constant(size, self.macros)
+                    size = value if value is not None else size
                 if var_name not in global_vars["declarations"]:
                     global_vars["declarations"].append(f"{var_name}[{size}]")
+                global_vars["arrays"][var_name] = {"type": type_name, "size": size}
                 if init_values:
-                    values = [v.strip() for v in init_values.split(',') if v.strip()]
-                    parsed_values = []
-                    for v in values:
-                        # 16진수, 정수, 실수 등 형태에 맞게 리스트에 담기
-                        if v.startswith('0x'):
-                            parsed_values.append(int(v, 16))
-                        elif v.isdigit() or re.match(r'-?\d*\.?\d+', v):
-                            parsed_values.append(float(v) if '.' in v else int(v))
-                        else:
-                            parsed_values.append(v)
-
-                    # C언어 규칙: 초기화 값이 크기보다 적고 콤마가 있으면 나머지를 0으로 채움       
-                    if init_values.strip().endswith(',') and isinstance(size, int):
-                        while len(parsed_values) < size:
-                            parsed_values.append(0)
-                    global_vars["initializations"][f"{var_name}[{size}]"] = parsed_values
+                    # array로 한 번에 변환하고 C 규칙대로 나머지 원소를 0으로 채움 (src/data_segment.py)
+                    global_vars["initializations"][f"{var_name}[{size}]"] = parse_array_values(
+                        type_name, init_values, size, self.macros, var_name)
                 else:
                     global_vars["initializations"][f"{var_name}[{size}]"] = None
             i += 1
         return global_vars
 
-    def parse_function(self, text):
+    def parse_function(self, text, body=None):
         # 함수 하나를 입력받아 그 내부의 변수 선언과 실행문(Body)을 분리
-        func_match = re.match(r'(void|int)\s+(\w+)\s*\(.*?\)\s*(?:\s*/\*.*?\*/)?\s*\{', text.strip(), re.DOTALL)
-        if not func_match:
-            print(f"함수 매칭 실패: {text[:50]}...")
-            return None
-        func_name = func_match.group(2)
+        # body: 함수 범위 색인에서 얻은 중괄호 안쪽 본문 (없으면 text에서 중괄호 짝을 맞춰 추출)
+        if body is None:
+            index = build_function_index(strip_comments(text))
+            if not index:
+                print(f"함수 매칭 실패: {text[:50]}...")
+                return None
+            func_name, (start, end, body_start, body_end) = next(iter(index.items()))
+            text = strip_comments(text)
+            body = text[body_start:body_end]
+        else:
+            func_match = FUNC_HEADER_RE.match(text.strip())
+            if not func_match:
+                print(f"함수 매칭 실패: {text[:50]}...")
+                return None
+            func_name = func_match.group(1)
         #함수 이름 추출
-        body_match = re.search(r'\{(.+?)\}', text, re.DOTALL)
-        #함수 중괄호 내부 추출
-        body_content = body_match.group(1).strip() if body_match else ""
+        body_content = body.strip()
         #본문 내용 분리
         
         lines = body_content.split('\n')
@@ -106,10 +214,10 @@ class CParser:
             # #ifdef와 #endif 사이의 내용은 건너뜀
             
             #선언 및 초기화 분리
-            if re.match(r'(int|float|double|long long int)\s+\w+\s*=.*', line):
+            if INIT_LINE_RE.match(line):
                 init_lines.append(line)
-            elif re.match(r'(int|float|double|long long int)\s+\w+\s*;', line):
-                var_match = re.match(r'(int|float|double|long long int)\s+(\w+)\s*;', line)
+            elif DECL_RE.match(line):
+                var_match = DECL_RE.match(line)
                 if var_match:
                     type_name, var_name = var_match.groups()
                     declared_vars[var_name] = {"type": type_name, "value": None}
@@ -120,7 +228,7 @@ class CParser:
         i = 0
         processed_body = []
         while i < len(body_lines):
-            assign_match = re.match(r'(\w+)\s*=\s*(0x[0-9a-fA-F]+|\d*\.?\d+)\s*;', body_lines[i])
+            assign_match = CONST_ASSIGN_RE.match(body_lines[i])
             if assign_match:
                 var_name, value = assign_match.groups()
                 if var_name in declared_vars:
@@ -148,7 +256,7 @@ class CParser:
 
         #각 라인을 분석하여 변수명과 값을 추출
         for line in init_lines:
-            match = re.match(r'(int|float|double|long long int)\s+(\w+)\s*=\s*(0x[0-9a-fA-F]+|\d*\.?\d+)', line)
+            match = INIT_VALUE_RE.match(line)
             if match:
                 #초기화된 변수 처리
                 type_name, var_name, value = match.groups()
@@ -166,9 +274,16 @@ class CParser:
                         init_dict[var_name] = int(value, 16)
                     else:
                         init_dict[var_name] = int(float(value))
+                continue
+            # 전처리된 소스에서는 매크로가 '(6 * 10)' 같은 상수식으로 전개되므로 정수로 계산
+            expr_match = INIT_EXPR_RE.match(line) if self.macros is not None else None
+            value = int_constant(expr_match.group(3), self.macros) if expr_match else None
+            if value is not None:
+                type_name, var_name = expr_match.group(1), expr_match.group(2)
+                init_dict[var_name] = float(value) if type_name in ('float', 'double') else value
             else:
                 # 선언만 된 변수 처리
-                decl_match = re.match(r'(int|float|double|long long int)\s+(\w+)\s*;', line)
+                decl_match = DECL_RE.match(line)
                 if decl_match:
                     type_name, var_name = decl_match.groups()
                     init_dict[var_name] = None
@@ -185,7 +300,7 @@ class CParser:
             if isinstance(item, str) and item.strip().startswith('for'):
                 for_line = item.strip()
                 body_start = i + 1 
-                for_content = re.search(r'for\s*\((.+?)\)\s*\{', for_line).group(1)
+                for_content = FOR_HEADER_RE.search(for_line).group(1)
                 init, cond, incr = [x.strip() for x in for_content.split(';')] #초기화, 조건, 증감 추출
                 
                 #본문 내용 추출
@@ -223,7 +338,7 @@ class CParser:
             if isinstance(item, str) and item.strip().startswith('if'):
                 if_line = item.strip()
                 body_start = i + 1
-                cond = re.search(r'if\s*\((.+?)\)\s*\{', if_line).group(1) #조건 추출
+                cond = IF_HEADER_RE.search(if_line).group(1) #조건 추출
                 
                 body_list = []
                 brace_count = 1
@@ -249,86 +364,79 @@ class CParser:
 
     def extract_main_calls(self):
         # main 함수 내에서 호출된 함수 이름들을 추출
-        main_pattern = r'int\s+main\s*\(.+?\)\s*\{(.+?)\}'
-        main_match = re.search(main_pattern, self.c_text, re.DOTALL)
-        if not main_match:
+        main_span = self.function_index.get("main")
+        if not main_span:
             print("main 함수를 찾을 수 없습니다.")
             return set()
-        
-        main_body = main_match.group(1)
-        call_pattern = r'(\w+)\s*\([^)]*\)\s*(?:;|\n|$)'
-        calls = re.findall(call_pattern, main_body)
+
+        main_body = self.code[main_span[2]:main_span[3]]
+        calls = MAIN_CALL_RE.findall(main_body)
         #print(f"main에서 호출된 함수: {calls}")
         return set(calls)
 
+    def main_function_names(self):
+        # main에서 호출된 함수 이름을 소스 순서대로 반환 (함수 범위 색인은 소스 순서를 유지)
+        main_calls = self.extract_main_calls()
+        return [name for name in self.function_index if name in main_calls]
+
+    def function_source(self, func_name):
+        # 주석을 제거한 코드에서 함수 전체(헤더 ~ 닫는 중괄호) 텍스트
+        start, end, _, _ = self.function_index[func_name]
+        return self.code[start:end]
+
+    def parse_indexed_function(self, func_name):
+        # 색인된 함수 하나를 파싱하여 결과 딕셔너리 반환, 실패 시 None
+        print(f"{func_name} 파싱 중...")
+        code = self.code
+        start, end, body_start, body_end = self.function_index[func_name]
+        parsed_func = self.parse_function(code[start:end], code[body_start:body_end])
+        if parsed_func is None:
+            print(f"경고: {func_name} 파싱 실패")
+            return None
+        init_vars = self.parse_initializations(parsed_func["initializations"])
+        for_loops = self.parse_for_loop(parsed_func["body"])
+        if_stmts = self.parse_if(parsed_func["body"])
+
+        return {
+            "function_name": parsed_func["function_name"],
+            "initializations": init_vars,
+            "for_loops": [
+                {
+                    "variable": for_loop["variable"],
+                    "condition": for_loop["condition"],
+                    "increment": for_loop["increment"],
+                    "body": for_loop["body"]
+                } for for_loop in for_loops
+            ],
+            "if_stmts": [
+                {
+                    "condition": if_stmt["condition"],
+                    "body": if_stmt["body"]
+                } for if_stmt in if_stmts
+            ]
+        }
+
     def parse_multiple_functions(self):
         # main 함수에서 호출된 함수들만 파싱하여 결과 반환
         global_vars = self.parse_global_variables()
-        main_calls = self.extract_main_calls()
-        function_pattern = r'void\s+(\w+)\s*\(.*?\)\s*(?:\s*/\*.*?\*/)?\s*\{([^}]+(?:\{[^}]*\}[^}]*)*)\}'
-        functions = []
-        start = 0
-        while True:
-            match = re.search(function_pattern, self.c_text[start:], re.DOTALL)
-            if not match:
-                break
-            func_name = match.group(1)
-            func_body = match.group(2)
-            functions.append((func_name, func_body))
-            #print(f"탐지된 함수: {func_name}")
-            start += match.start(1)
 
-        #print(f"main에서 호출된 함수: {main_calls}")
-        #print(f"찾아낸 모든 void 함수: {[func[0] for func in functions]}")
-        
-        #파싱
         results = []
-        processed_funcs = set()
-        for func_name, func_body in functions:
-            if func_name in main_calls and func_name not in processed_funcs:
-                print(f"{func_name} 파싱 중...")
-                func_match = re.search(rf'void\s+{func_name}\s*\(.*?\)\s*(?:\s*/\*.*?\*/)?\s*{{([^}}]+(?:{{[^}}]*\}}[^}]*)*)}}', self.c_text, re.DOTALL)
-                if not func_match:
-                    print(f"경고: {func_name}의 전체 텍스트를 찾을 수 없습니다.")
-                    continue
-                func_text = func_match.group(0)
-                parsed_func = self.parse_function(func_text)
-                if parsed_func is None:
-                    print(f"경고: {func_name} 파싱 실패")
-                    continue
-                init_vars = self.parse_initializations(parsed_func["initializations"])
-                for_loops = self.parse_for_loop(parsed_func["body"])
-                if_stmts = self.parse_if(parsed_func["body"])
-                
-                result = {
-                    "function_name": parsed_func["function_name"],
-                    "initializations": init_vars,
-                    "for_loops": [
-                        {
-                            "variable": for_loop["variable"],
-                            "condition": for_loop["condition"],
-                            "increment": for_loop["increment"],
-                            "body": for_loop["body"]
-                        } for for_loop in for_loops
-                    ],
-                    "if_stmts": [
-                        {
-                            "condition": if_stmt["condition"],
-                            "body": if_stmt["body"]
-                        } for if_stmt in if_stmts
-                    ]
-                }
+        for func_name in self.main_function_names():
+            result = self.parse_indexed_function(func_name)
+            if result is not None:
                 results.append(result)
-                processed_funcs.add(func_name)
-        
-        return {"global_variable": global_vars, "functions": results}
+
+        parsed = {"global_variable": global_vars, "functions": results}
+        if self.macros is not None:
+            parsed["macros"] = self.macros
+        return parsed
 
     def save_to_json(self, output_file="./parsed_2.json"):
         # 파싱 결과를 JSON 파일로 저장
         results = self.parse_multiple_functions()
         try:
             with open(output_file, 'w', encoding='UTF8') as json_file:
-                json.dump(results, json_file, indent=4, ensure_ascii=False)
+                json.dump(results, json_file, indent=4, ensure_ascii=False, default=json_default)
             print(f"파싱 결과가 {output_file}에 저장되었습니다.")
         except Exception as e:
             print(f"JSON 저장 오류: {str(e)}")
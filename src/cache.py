@@ -0,0 +1,102 @@
+import os
+import json
+import shutil
+import hashlib
+import tempfile
+
+
+def default_cache_dir():
+    # EOPPP_CACHE_DIR 환경 변수 또는 ~/.cache/eoppp
+    return os.environ.get("EOPPP_CACHE_DIR") or os.path.join(os.path.expanduser("~"), ".cache", "eoppp")
+
+
+class CompileCache:
+    # 내용 주소 기반(content-addressed) 로컬 디스크 캐시
+    # 항목 하나는 cache_dir/objects/<키>/ 폴더이며, 폴더 mtime을 마지막 사용 시각으로 보고 LRU로 제거
+    def __init__(self, cache_dir=None, max_bytes=512 * 1024 * 1024):
+        self.cache_dir = cache_dir or default_cache_dir()
+        self.objects_dir = os.path.join(self.cache_dir, "objects")
+        self.max_bytes = max_bytes
+        os.makedirs(self.objects_dir, exist_ok=True)
+
+    @staticmethod
+    def make_key(*parts):
+        # 키 구성 요소(문자열/딕셔너리)를 순서대로 해시
+        h = hashlib.sha256()
+        for part in parts:
+            if not isinstance(part, str):
+                part = json.dumps(part, sort_keys=True, ensure_ascii=False)
+            data = part.encode("utf-8")
+            h.update(len(data).to_bytes(8, "little"))
+            h.update(data)
+        return h.hexdigest()
+
+    def _entry_dir(self, key):
+        return os.path.join(self.objects_dir, key)
+
+    def get(self, key):
+        # 적중 시 항목 폴더 경로를 반환하고 사용 시각을 갱신, 없으면 None
+        entry = self._entry_dir(key)
+        if not os.path.isdir(entry):
+            return None
+        try:
+            os.utime(entry)
+        except OSError:
+            return None
+        return entry
+
+    def read(self, key, name):
+        entry = self.get(key)
+        if entry is None:
+            return None
+        try:
+            with open(os.path.join(entry, name), "rb") as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def put(self, key, files):
+        # files: {파일명: bytes}. 임시 폴더에 쓴 뒤 rename으로 원자적으로 등록
+        entry = self._entry_dir(key)
+        if os.path.isdir(entry):
+            os.utime(entry)
+            return entry
+        tmp = tempfile.mkdtemp(prefix=".tmp-", dir=self.objects_dir)
+        try:
+            for name, data in files.items():
+                with open(os.path.join(tmp, name), "wb") as f:
+                    f.write(data)
+            os.replace(tmp, entry)
+        except OSError:
+            # 다른 프로세스가 같은 키를 먼저 등록한 경우
+            shutil.rmtree(tmp, ignore_errors=True)
+        self.evict()
+        return entry
+
+    def evict(self):
+        # 전체 크기가 max_bytes를 넘으면 가장 오래 사용되지 않은 항목부터 삭제
+        entries = []
+        total = 0
+        for name in os.listdir(self.objects_dir):
+            if name.startswith(".tmp-"):
+                continue
+            path = os.path.join(self.objects_dir, name)
+            try:
+                size = sum(os.path.getsize(os.path.join(path, f)) for f in os.listdir(path))
+                mtime = os.stat(path).st_mtime
+            except OSError:
+                continue
+            entries.append((mtime, size, path))
+            total += size
+        if total <= self.max_bytes:
+            return
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            shutil.rmtree(path, ignore_errors=True)
+            total -= size
+
+    def clear(self):
+        shutil.rmtree(self.objects_dir, ignore_errors=True)
+        os.makedirs(self.objects_dir, exist_ok=True)
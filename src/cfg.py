@@ -0,0 +1,196 @@
+class BasicBlock:
+    # 라인 구간 [start, end)와 앞뒤 블록 번호
+    __slots__ = ("index", "start", "end", "succs", "preds")
+
+    def __init__(self, index, start, end):
+        self.index = index
+        self.start = start
+        self.end = end
+        self.succs = []
+        self.preds = []
+
+
+class Loop:
+    # 자연 루프: 헤더 블록, 헤더로 돌아가는 백 에지의 출발 블록(latch), 루프에 속한 블록 집합
+    # parent/children/depth는 루프 중첩 트리 (가장 바깥 루프의 depth가 1)
+    __slots__ = ("header", "latches", "blocks", "parent", "children", "depth")
+
+    def __init__(self, header, latches, blocks):
+        self.header = header
+        self.latches = latches
+        self.blocks = blocks
+        self.parent = None
+        self.children = []
+        self.depth = 1
+
+
+class ControlFlowGraph:
+    # 함수 하나의 라인 목록에서 만든 제어 흐름 그래프 (블록 0이 진입 블록)
+    # labels: {라인 위치: 레이블 이름}, jumps: {라인 위치: 분기 대상 레이블 이름 튜플}
+    # jumps에 있는 라인(goto, 조건 goto, return)은 블록을 끝내고 다음 라인으로 이어지지 않음
+    def __init__(self, line_count, labels, jumps):
+        self.blocks = []
+        self.block_of = [0] * line_count  # 라인 위치 -> 블록 번호
+        self.label_block = {}  # 레이블 이름 -> 블록 번호
+        self._split(line_count, labels, jumps)
+        self._connect(jumps)
+        self.rpo = self._reverse_postorder()
+        self.idom = self._dominators()
+        self._number_dom_tree()
+        self.loops = self._natural_loops()
+
+    def _split(self, line_count, labels, jumps):
+        # 한 번의 순회로 기본 블록 분할: 레이블 라인과 분기 라인 다음 라인에서 새 블록 시작
+        start = 0
+        for idx in range(line_count):
+            if idx in labels and idx > start:
+                self.blocks.append(BasicBlock(len(self.blocks), start, idx))
+                start = idx
+            self.block_of[idx] = len(self.blocks)
+            if idx in labels:
+                self.label_block.setdefault(labels[idx], len(self.blocks))
+            if idx in jumps:
+                self.blocks.append(BasicBlock(len(self.blocks), start, idx + 1))
+                start = idx + 1
+        if start < line_count or not self.blocks:
+            self.blocks.append(BasicBlock(len(self.blocks), start, line_count))
+
+    def _connect(self, jumps):
+        for block in self.blocks:
+            last = block.end - 1
+            if last in jumps:
+                targets = [self.label_block[t] for t in jumps[last] if t in self.label_block]
+            elif block.index + 1 < len(self.blocks):
+                targets = [block.index + 1]
+            else:
+                targets = []
+            for t in dict.fromkeys(targets):
+                block.succs.append(t)
+                self.blocks[t].preds.append(block.index)
+
+    def _reverse_postorder(self):
+        # 진입 블록에서 도달 가능한 블록의 역후위 순서 (재귀 없이 스택으로 순회)
+        seen = [False] * len(self.blocks)
+        order = []
+        stack = [(0, iter(self.blocks[0].succs))]
+        seen[0] = True
+        while stack:
+            node, it = stack[-1]
+            for succ in it:
+                if not seen[succ]:
+                    seen[succ] = True
+                    stack.append((succ, iter(self.blocks[succ].succs)))
+                    break
+            else:
+                order.append(node)
+                stack.pop()
+        order.reverse()
+        return order
+
+    def _dominators(self):
+        # Cooper-Harvey-Kennedy 반복 알고리즘 (도달 불가능한 블록의 idom은 None)
+        # 구조적인 GIMPLE(환원 가능 그래프)에서는 두어 번의 순회로 수렴
+        rpo_index = {b: i for i, b in enumerate(self.rpo)}
+        idom = [None] * len(self.blocks)
+        idom[0] = 0
+
+        def intersect(a, b):
+            while a != b:
+                while rpo_index[a] > rpo_index[b]:
+                    a = idom[a]
+                while rpo_index[b] > rpo_index[a]:
+                    b = idom[b]
+            return a
+
+        changed = True
+        while changed:
+            changed = False
+            for b in self.rpo[1:]:
+                new_idom = None
+                for p in self.blocks[b].preds:
+                    if idom[p] is None:
+                        continue
+                    new_idom = p if new_idom is None else intersect(p, new_idom)
+                if idom[b] != new_idom:
+                    idom[b] = new_idom
+                    changed = True
+        return idom
+
+    def _number_dom_tree(self):
+        # 지배자 트리의 전위/후위 번호: a가 b를 지배 <=> pre[a] <= pre[b] and post[b] <= post[a]
+        self.dom_children = [[] for _ in self.blocks]
+        for b in self.rpo[1:]:
+            self.dom_children[self.idom[b]].append(b)
+        self.pre = [-1] * len(self.blocks)
+        self.post = [-1] * len(self.blocks)
+        counter = 0
+        stack = [(0, False)]
+        while stack:
+            node, done = stack.pop()
+            if done:
+                self.post[node] = counter
+                counter += 1
+                continue
+            self.pre[node] = counter
+            counter += 1
+            stack.append((node, True))
+            stack.extend((child, False) for child in reversed(self.dom_children[node]))
+
+    def reachable(self, b):
+        return self.pre[b] >= 0
+
+    def dominates(self, a, b):
+        return self.reachable(a) and self.reachable(b) and self.pre[a] <= self.pre[b] and self.post[b] <= self.post[a]
+
+    def _natural_loops(self):
+        # 백 에지(헤더가 출발 블록을 지배하는 에지)마다 헤더로 모아 자연 루프를 만들고 중첩 트리를 구성
+        # 헤더가 지배하지 않는 역방향 에지(환원 불가능한 흐름)는 루프로 보지 않음
+        latches = {}
+        for b in self.rpo:
+            for s in self.blocks[b].succs:
+                if self.dominates(s, b):
+                    latches.setdefault(s, []).append(b)
+
+        loops = []
+        for header in sorted(latches, key=lambda h: self.blocks[h].start):
+            blocks = {header}
+            stack = [b for b in latches[header] if b != header]
+            blocks.update(stack)
+            while stack:
+                for p in self.blocks[stack.pop()].preds:
+                    if p not in blocks and self.reachable(p):
+                        blocks.add(p)
+                        stack.append(p)
+            loops.append(Loop(header, latches[header], blocks))
+
+        # 큰 루프부터 블록의 소속을 덮어쓰면, 덮어쓰기 직전 헤더의 소속 루프가 바로 바깥 루프
+        self.loop_of = [None] * len(self.blocks)
+        for loop in sorted(loops, key=lambda lp: len(lp.blocks), reverse=True):
+            parent = self.loop_of[loop.header]
+            if parent is not None:
+                loop.parent = parent
+                loop.depth = parent.depth + 1
+                parent.children.append(loop)
+            for b in loop.blocks:
+                self.loop_of[b] = loop
+        return loops
+
+    def common_dominator(self, blocks):
+        # 여러 블록을 모두 지배하는 가장 가까운 블록
+        result = None
+        for b in blocks:
+            if result is None:
+                result = b
+                continue
+            while not self.dominates(result, b):
+                result = self.idom[result]
+        return result
+
+    def dom_subtree(self, b):
+        # 지배자 트리에서 b와 그 자손 블록 (b가 지배하는 블록 전체)
+        result, stack = [], [b]
+        while stack:
+            node = stack.pop()
+            result.append(node)
+            stack.extend(self.dom_children[node])
+        return result
@@ -0,0 +1,169 @@
+import os
+import re
+import sys
+import json
+from array import array
+from functools import partial
+
+from src.memory_image import encode_image, hex_words
+from src.preprocess import int_constant
+
+# C 원소형: (파싱에 쓰는 array 형 코드, 저장 형 코드). 정수는 64비트로 읽은 뒤 원소 크기로 자름
+ELEMENT_TYPES = {
+    "int": ("q", "i"),
+    "long long int": ("q", "q"),
+    "float": ("d", "f"),
+    "double": ("d", "d"),
+}
+OCTAL_RE = re.compile(r'[-+]?0[0-7]+$')
+FLOAT_SUFFIX_RE = re.compile(r'[fFlL]$')
+
+# 데이터 메모리 .mif 한 줄에 쓰는 워드 수 ('주소 : 값 값 ...;' 형식, 연속 주소에 차례로 들어감)
+MIF_WORDS_PER_LINE = 16
+
+parse_c_int = partial(int, base=0)
+
+
+def c_number(token, ctype, macros=None):
+    # 초기값 하나를 C 규칙으로 해석 (8진수, 접미사, 매크로 상수식), 해석할 수 없으면 None
+    token = token.strip()
+    if ELEMENT_TYPES[ctype][0] == "d":
+        try:
+            return float(FLOAT_SUFFIX_RE.sub("", token))
+        except ValueError:
+            value = int_constant(token, macros)
+            return None if value is None else float(value)
+    if OCTAL_RE.match(token):
+        return int(token, 8)
+    return int_constant(token, macros)
+
+
+def parse_array_values(ctype, init_text, size=None, macros=None, name="?"):
+    # '{...}' 안의 초기값 텍스트를 array로 변환하고 C 규칙대로 나머지 원소를 0으로 채움
+    # 10/16진수 정수와 실수는 map(int/float)으로 한 번에 변환하고, 실패할 때만 원소별로 다시 해석
+    wide, typecode = ELEMENT_TYPES[ctype]
+    tokens = init_text.split(",")
+    if tokens and not tokens[-1].strip():
+        tokens.pop()
+    try:
+        values = array(wide, map(float if wide == "d" else parse_c_int, tokens))
+    except (ValueError, OverflowError):
+        parsed = []
+        for token in tokens:
+            value = c_number(token, ctype, macros)
+            if value is None:
+                print(f"경고: {name}의 초기값 '{token.strip()}'을 해석할 수 없어 0으로 둡니다.")
+                value = 0
+            parsed.append(value)
+        try:
+            values = array(wide, parsed)
+        except OverflowError:
+            raise Exception(f"{name}의 초기값이 {ctype} 범위를 벗어납니다.")
+    if isinstance(size, int):
+        if len(values) > size:
+            raise Exception(f"{name}의 초기값이 배열 크기({size})보다 많습니다: {len(values)}개")
+        values.frombytes(bytes(values.itemsize * (size - len(values))))
+    if typecode == wide:
+        return values
+    if typecode == "f":
+        return array("f", values)
+    # 32비트 int: 64비트 값의 하위 워드만 남김 (C의 정수 변환과 같이 2의 보수로 자름)
+    narrowed = array("i")
+    narrowed.frombytes(word_array(values)[0::2].tobytes())
+    return narrowed
+
+
+def word_array(values):
+    # 원소 배열을 32비트 워드 배열로 다시 해석 (64비트 원소는 하위 워드가 먼저 오도록 리틀 엔디언 기준)
+    words = array("I")
+    if sys.byteorder == "little":
+        words.frombytes(values.tobytes())
+    else:
+        swapped = array(values.typecode, values)
+        swapped.byteswap()
+        words.frombytes(swapped.tobytes())
+        words.byteswap()
+    return words
+
+
+def json_default(value):
+    # json.dump의 default: array 초기값은 리스트로 기록 (디버그 JSON 용)
+    if isinstance(value, array):
+        return value.tolist()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+class DataSegment:
+    # 전역 배열을 이어 붙인 데이터 메모리 이미지 (32비트 워드, 주소는 워드 단위로 0부터)
+    # symbols: {이름: {"address", "words", "type", "length"}}. 64비트 원소는 하위 워드가 먼저 옴
+    def __init__(self):
+        self.words = array("I")
+        self.symbols = {}
+
+    def add(self, name, ctype, length, values=None):
+        # values가 없으면(초기화하지 않은 전역 배열) 0으로 채운 공간만 잡음
+        itemsize = array(ELEMENT_TYPES[ctype][1]).itemsize
+        nwords = length * itemsize // 4
+        address = len(self.words)
+        if values is None:
+            self.words.frombytes(bytes(nwords * 4))
+        else:
+            self.words.extend(word_array(values))
+        self.symbols[name] = {"address": address, "words": nwords, "type": ctype, "length": length}
+        return address
+
+    @classmethod
+    def from_globals(cls, global_vars):
+        # CParser.parse_global_variables 결과의 배열("arrays")을 선언 순서대로 배치
+        # 크기를 정수로 알 수 없는 배열은 건너뜀
+        segment = cls()
+        inits = global_vars.get("initializations", {})
+        for name, info in global_vars.get("arrays", {}).items():
+            size = info["size"]
+            if not isinstance(size, int):
+                print(f"경고: {name}의 크기({size})를 알 수 없어 데이터 메모리에 넣지 않습니다.")
+                continue
+            segment.add(name, info["type"], size, inits.get(f"{name}[{size}]"))
+        return segment
+
+    def symbol_map(self):
+        return {"words": len(self.words), "symbols": self.symbols}
+
+    def render_mif(self):
+        # 데이터 메모리 .mif: 배열마다 주석 한 줄과 16워드씩 묶은 내용 라인
+        lines = [f"DEPTH = {max(len(self.words), 1)};", "WIDTH = 32;", "ADDRESS_RADIX = DEC;", "DATA_RADIX = HEX;",
+                 "CONTENT", "BEGIN"]
+        # 전체 워드를 한 번에 16진수로 바꾼 뒤 (워드당 9글자) 구간별로 잘라 씀
+        text = hex_words(self.words, " ")
+        for name, sym in self.symbols.items():
+            lines.append(f"-- {name}: {sym['type']}[{sym['length']}] @ {sym['address']} ({sym['words']} words)")
+            start, end = sym["address"], sym["address"] + sym["words"]
+            for addr in range(start, end, MIF_WORDS_PER_LINE):
+                last = min(addr + MIF_WORDS_PER_LINE, end)
+                lines.append(f"{addr} : {text[addr * 9:last * 9 - 1]};")
+        lines.append("END;")
+        return "\n".join(lines) + "\n"
+
+    def encode(self, fmt="mif"):
+        if fmt == "mif":
+            return self.render_mif().encode("utf-8")
+        return encode_image(self.words, fmt)
+
+
+def data_paths(output_path):
+    # 출력 파일 옆의 데이터 메모리 파일('[이름].data[확장자]')과 심볼 주소표('[이름].sym.json') 경로
+    root, ext = os.path.splitext(output_path)
+    return f"{root}.data{ext}", f"{root}.sym.json"
+
+
+def symbols_text(segment):
+    return json.dumps(segment.symbol_map(), indent=1, ensure_ascii=False)
+
+
+def write_data_segment(segment, output_path, fmt="mif"):
+    data_path, sym_path = data_paths(output_path)
+    with open(data_path, "wb") as f:
+        f.write(segment.encode(fmt))
+    with open(sym_path, "w", encoding="utf-8") as f:
+        f.write(symbols_text(segment))
+    print(f"데이터 메모리 저장 완료: {data_path} ({len(segment.words)} 워드, 심볼 {len(segment.symbols)}개)")
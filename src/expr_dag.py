@@ -0,0 +1,508 @@
+import re
+
+# 식 DAG: 노드는 Node이며 intern으로 같은 식은 같은 객체 하나로 만듦 (해시 콘싱)
+# 노드마다 정수 번호가 있고, intern 키는 자식을 번호로 적은 평평한 튜플이므로 식이 깊어도 해시 비용이 일정함
+# node[0]은 종류, node[1:]은 아래 필드 (자식 자리에는 Node)
+#   ("const", 정수)             상수 (끝까지 접힘)
+#   ("var", 이름)               반복 시작 시점의 변수 값 (레지스터)
+#   ("sum", (항, ...))          덧셈 (항은 정렬, 같은 항은 계수로 묶음, 상수 항은 맨 뒤에 하나)
+#   ("neg", x)                  부호 반전
+#   ("mul", (인수, ...))        곱셈 (인수는 정렬, 상수 인수는 맨 뒤에 하나)
+#   ("bin", 연산자, a, b)       그 밖의 이항 연산 (/ % << >> & | ^, 교환 법칙이 성립하면 정렬)
+#   ("not", x)                  비트 반전
+#   ("load", 배열, 인덱스, 버전) 배열 읽기 (배열에 쓰거나 함수를 호출하면 버전이 바뀌어 공유되지 않음)
+#   ("lit", 텍스트)             실수 리터럴 등 값을 알 수 없는 리터럴
+#   ("call", 이름, 인수, 번호)  함수 호출 (부수 효과가 있을 수 있으므로 공유하지 않음)
+#   ("opaque", 텍스트, 번호)    해석하지 못한 식
+
+TOKEN_RE = re.compile(
+    r"\s*(?:"
+    r"(?P<float>\d+\.\d*(?:[eE][+-]?\d+)?|\d+[eE][+-]?\d+)"
+    r"|(?P<int>0[xX][0-9a-fA-F]+|\d+)[uUlL]*"
+    r"|(?P<name>D\.\d+|[A-Za-z_]\w*)"
+    r"|(?P<op><<|>>|[-+*/%&|^~!()\[\],])"
+    r")"
+)
+# 배열 쓰기 문장 'real[_25] = _26;'
+ARRAY_STORE_RE = re.compile(r"^([A-Za-z_]\w*)\s*\[.*\]\s*=")
+# 형 변환 '(long long int) x'의 괄호 안에 올 수 있는 단어
+TYPE_WORDS = {"int", "long", "short", "char", "unsigned", "signed", "float", "double", "_Bool", "bool"}
+# 이항 연산자 우선순위 (높을수록 먼저 결합)
+BINARY_PRECEDENCE = {"|": 1, "^": 2, "&": 3, "<<": 4, ">>": 4, "+": 5, "-": 5, "*": 6, "/": 6, "%": 6}
+COMMUTATIVE = {"&", "|", "^"}
+# 노드 종류별 정렬 순위: 변수 < 연산 < 상수 (같은 순위는 노드 번호 = 처음 만든 순서)
+ORDER_RANK = {"var": 0, "const": 2}
+# render(limit=...)로 잘라 쓸 때 붙이는 표시
+TRUNCATED = "..."
+
+
+class Node:
+    # DAG 노드 하나: parts = (종류, 필드, ...), id = DAG 안에서 만든 순서 (같은 식이면 같은 객체이므로 비교는 객체 동일성)
+    __slots__ = ("parts", "id")
+
+    def __init__(self, parts, nid):
+        self.parts = parts
+        self.id = nid
+
+    def __getitem__(self, i):
+        return self.parts[i]
+
+    def __len__(self):
+        return len(self.parts)
+
+    def __hash__(self):
+        return self.id
+
+    def __repr__(self):
+        return f"{self.parts[0]}#{self.id}"
+
+
+def intern_key(parts):
+    # 자식 노드(와 노드 튜플)를 번호로 바꾼 키
+    key = []
+    for p in parts:
+        if isinstance(p, Node):
+            p = p.id
+        elif isinstance(p, tuple):
+            p = tuple(c.id if isinstance(c, Node) else c for c in p)
+        key.append(p)
+    return tuple(key)
+
+
+def order_key(node):
+    return ORDER_RANK.get(node[0], 1), node.id
+
+
+def is_const(node, value=None):
+    return node[0] == "const" and (value is None or node[1] == value)
+
+
+def c_div(a, b):
+    # C 정수 나눗셈 (0 방향으로 버림)
+    q = abs(a) // abs(b)
+    return q if (a >= 0) == (b >= 0) else -q
+
+
+def fold_binary(op, a, b):
+    # 두 상수의 이항 연산, 접을 수 없으면 None
+    if op in ("/", "%") and b == 0:
+        return None
+    if op in ("<<", ">>") and not 0 <= b < 64:
+        return None
+    if op == "/":
+        return c_div(a, b)
+    if op == "%":
+        return a - b * c_div(a, b)
+    if op == "<<":
+        return a << b
+    if op == ">>":
+        return a >> b
+    if op == "&":
+        return a & b
+    if op == "|":
+        return a | b
+    return a ^ b
+
+
+class ExprDAG:
+    # 한 GPC 상태(루프 한 번 반복) 안의 대입문을 실행 순서대로 받아 변수마다 '반복 시작 값의 식'을 유지
+    # 대입된 변수를 읽으면 그 식으로 치환(다단계 치환)하고, 상수는 끝까지 접으며, 같은 식은 노드 하나로 공유
+    def __init__(self, constants=None):
+        self.constants = dict(constants or {})  # {이름: 정수}, 값이 바뀌지 않아 접어도 되는 변수
+        self.nodes = {}  # {intern 키: 노드}, intern 테이블
+        self.env = {}  # {이름: 노드}, 지금까지 실행한 대입문 기준 현재 값
+        self.memory = {}  # {배열 이름: 쓰기 횟수}
+        self.epoch = 0  # 모든 배열을 바꿀 수 있는 문장(함수 호출) 횟수
+        self.serial = 0
+
+    # ------------------------------------------------------------------ #
+    # 노드 생성 (접기와 정규화)
+    # ------------------------------------------------------------------ #
+    def intern(self, parts):
+        key = intern_key(parts)
+        node = self.nodes.get(key)
+        if node is None:
+            node = self.nodes[key] = Node(parts, len(self.nodes))
+        return node
+
+    def const(self, value):
+        return self.intern(("const", value))
+
+    def unique(self, *node):
+        # 공유되면 안 되는 노드 (호출, 해석하지 못한 식)
+        self.serial += 1
+        return self.intern((*node, self.serial))
+
+    def name(self, name):
+        # 이름 하나의 현재 값
+        if name in self.env:
+            return self.env[name]
+        if name in self.constants:
+            return self.const(self.constants[name])
+        return self.intern(("var", name))
+
+    def split_coefficient(self, term):
+        # 항을 (밑, 정수 계수)로 나눔: -x -> (x, -1), x * 3 -> (x, 3)
+        if term[0] == "neg":
+            return term[1], -1
+        if term[0] == "mul" and is_const(term[1][-1]):
+            rest = term[1][:-1]
+            return (rest[0] if len(rest) == 1 else self.intern(("mul", rest))), term[1][-1][1]
+        return term, 1
+
+    def add(self, *terms):
+        # 같은 밑의 항은 계수를 더해 하나로 묶음 (x + x -> x * 2, x + (-x) -> 상쇄)
+        # 묶지 않으면 a = b + c를 거듭할 때 항 수가 지수적으로 늘어남
+        coefficients = {}
+        total = 0
+        for term in terms:
+            for t in (term[1] if term[0] == "sum" else (term,)):
+                if t[0] == "const":
+                    total += t[1]
+                    continue
+                base, k = self.split_coefficient(t)
+                coefficients[base] = coefficients.get(base, 0) + k
+        flat = []
+        for base, k in coefficients.items():
+            if k == 1:
+                flat.append(base)
+            elif k == -1:
+                flat.append(self.neg(base))
+            elif k:
+                flat.append(self.mul(base, self.const(k)))
+        if total:
+            flat.append(self.const(total))
+        if not flat:
+            return self.const(0)
+        if len(flat) == 1:
+            return flat[0]
+        return self.intern(("sum", tuple(sorted(flat, key=order_key))))
+
+    def neg(self, x):
+        if x[0] == "const":
+            return self.const(-x[1])
+        if x[0] == "neg":
+            return x[1]
+        if x[0] == "sum":
+            return self.add(*(self.neg(t) for t in x[1]))
+        if x[0] == "mul" and x[1][-1][0] == "const":
+            return self.mul(*x[1][:-1], self.const(-x[1][-1][1]))
+        return self.intern(("neg", x))
+
+    def mul(self, *factors):
+        flat = []
+        total = 1
+        for factor in factors:
+            for f in (factor[1] if factor[0] == "mul" else (factor,)):
+                if f[0] == "const":
+                    total *= f[1]
+                elif f[0] == "neg":
+                    total = -total
+                    flat.append(f[1])
+                else:
+                    flat.append(f)
+        if total == 0 or not flat:
+            return self.const(total)
+        if len(flat) == 1 and flat[0][0] == "sum" and total != 1:
+            # 상수 배는 덧셈의 항마다 나눠 곱함 ((a + b) * 2 -> a * 2 + b * 2)
+            # GCC는 x + x를 x * 2로 바꾸므로, 나누지 않으면 항이 합쳐지지 않아 덧셈이 본문 길이만큼 길어짐
+            factor = self.const(total)
+            return self.add(*(self.mul(t, factor) for t in flat[0][1]))
+        if total != 1:
+            flat.append(self.const(total))
+        if len(flat) == 1:
+            return flat[0]
+        return self.intern(("mul", tuple(sorted(flat, key=order_key))))
+
+    def binary(self, op, a, b):
+        if op == "+":
+            return self.add(a, b)
+        if op == "-":
+            return self.add(a, self.neg(b))
+        if op == "*":
+            return self.mul(a, b)
+        if a[0] == "const" and b[0] == "const":
+            value = fold_binary(op, a[1], b[1])
+            if value is not None:
+                return self.const(value)
+        if b[0] == "const":
+            if (op in ("<<", ">>", "|", "^") and b[1] == 0) or (op == "/" and b[1] == 1):
+                return a
+            if op == "&" and b[1] == 0:
+                return b
+        if op in COMMUTATIVE and order_key(b) < order_key(a):
+            a, b = b, a
+        return self.intern(("bin", op, a, b))
+
+    def bit_not(self, x):
+        if x[0] == "const":
+            return self.const(~x[1])
+        if x[0] == "not":
+            return x[1]
+        return self.intern(("not", x))
+
+    def load(self, array, index):
+        return self.intern(("load", array, index, (self.memory.get(array, 0), self.epoch)))
+
+    # ------------------------------------------------------------------ #
+    # 파싱
+    # ------------------------------------------------------------------ #
+    def parse(self, text):
+        # GIMPLE 식 텍스트를 현재 값 기준의 노드로 변환, 해석하지 못하면 opaque 노드
+        tokens = []
+        pos = 0
+        text = text.strip().rstrip(";")
+        while pos < len(text):
+            m = TOKEN_RE.match(text, pos)
+            if not m or m.end() == pos:
+                return self.unique("opaque", text)
+            pos = m.end()
+            kind = m.lastgroup
+            tokens.append((kind, m.group(kind)))
+        if not tokens:
+            return self.unique("opaque", text)
+        parser = ExprParser(self, tokens)
+        try:
+            node = parser.expression(0)
+        except (IndexError, ValueError):
+            return self.unique("opaque", text)
+        if parser.pos != len(tokens):
+            return self.unique("opaque", text)
+        return node
+
+    def assign(self, name, text):
+        # 'name = text;' 실행, 새 노드를 반환
+        node = self.parse(text)
+        self.env[name] = node
+        return node
+
+    def clobber(self, array=None):
+        # 배열(없으면 모든 배열)에 쓰기가 일어나 이전에 읽은 값과 공유할 수 없게 됨
+        if array is None:
+            self.epoch += 1
+        else:
+            self.memory[array] = self.memory.get(array, 0) + 1
+
+    # ------------------------------------------------------------------ #
+    # 평가, 출력, 연산 수
+    # ------------------------------------------------------------------ #
+    def evaluate(self, node, values, cache=None):
+        # values: {변수 이름: 반복 시작 값}, 값을 알 수 없는 노드(배열, 호출 등)는 0
+        cache = {} if cache is None else cache
+        for x in self.postorder((node,), cache):
+            kind = x[0]
+            if kind == "const":
+                value = x[1]
+            elif kind == "var":
+                value = values.get(x[1], 0)
+            elif kind == "sum":
+                value = sum(cache[t] for t in x[1])
+            elif kind == "neg":
+                value = -cache[x[1]]
+            elif kind == "mul":
+                value = 1
+                for f in x[1]:
+                    value *= cache[f]
+            elif kind == "bin":
+                value = fold_binary(x[1], cache[x[2]], cache[x[3]])
+                value = 0 if value is None else value
+            elif kind == "not":
+                value = ~cache[x[1]]
+            else:
+                value = 0
+            cache[x] = value
+        return cache[node]
+
+    @staticmethod
+    def postorder(roots, done=()):
+        # 자식이 부모보다 먼저 오는 순서로 노드를 한 번씩 (done에 있는 노드와 그 아래는 건너뜀)
+        # 재귀 대신 스택을 쓰므로 대입문이 길게 이어진 식도 깊이 제한에 걸리지 않음
+        order = []
+        seen = set()
+        stack = [(root, False) for root in reversed(roots)]
+        while stack:
+            node, expanded = stack.pop()
+            if expanded:
+                order.append(node)
+                continue
+            if node in seen or node in done:
+                continue
+            seen.add(node)
+            stack.append((node, True))
+            for child in reversed(ExprDAG.children(node)):
+                if child not in seen and child not in done:
+                    stack.append((child, False))
+        return order
+
+    @staticmethod
+    def render(node, leaf=None, const=None, spaced=True, limit=None, cache=None):
+        # leaf(이름) / const(값)로 변수와 상수의 표기를 바꿔 출력 (레지스터 조합은 rN으로 출력)
+        # 노드마다 한 번만 만들어 부모가 이어 붙이므로 공유가 많은 DAG도 노드 수에 비례
+        # limit: 노드 텍스트를 이 길이에서 자르고 '...'를 붙임 (주석용 설명이 식 크기만큼 길어지지 않도록)
+        # cache: 같은 leaf/const 표기로 여러 노드를 출력할 때 함께 쓰는 {노드: 텍스트}
+        leaf = leaf or (lambda name: name)
+        const = const or str
+        sep = " " if spaced else ""
+        texts = {} if cache is None else cache
+
+        def operand(x):
+            return f"({texts[x]})" if x[0] in ("sum", "mul", "bin") else texts[x]
+
+        def term(x):
+            # 덧셈의 항: 덧셈보다 우선순위가 낮은 연산(시프트, 비트 연산)은 괄호로 감쌈
+            return operand(x) if x[0] == "bin" else texts[x]
+
+        def text(x):
+            kind = x[0]
+            if kind == "const":
+                return const(x[1])
+            if kind == "var":
+                return leaf(x[1])
+            if kind == "sum":
+                parts = [term(x[1][0])]
+                for t in x[1][1:]:
+                    if t[0] == "neg":
+                        parts.append(f"{sep}-{sep}{operand(t[1])}")
+                    elif t[0] == "const" and t[1] < 0:
+                        parts.append(f"{sep}-{sep}{const(-t[1])}")
+                    else:
+                        parts.append(f"{sep}+{sep}{term(t)}")
+                return "".join(parts)
+            if kind == "neg":
+                return f"-{operand(x[1])}"
+            if kind == "mul":
+                if is_const(x[1][-1], -1):
+                    return "-" + f"{sep}*{sep}".join(operand(f) for f in x[1][:-1])
+                return f"{sep}*{sep}".join(operand(f) for f in x[1])
+            if kind == "bin":
+                return f"{operand(x[2])}{sep}{x[1]}{sep}{operand(x[3])}"
+            if kind == "not":
+                return f"~{operand(x[1])}"
+            if kind == "load":
+                return f"{x[1]}[{texts[x[2]]}]"
+            if kind == "call":
+                return f"{x[1]}({', '.join(texts[a] for a in x[2])})"
+            return x[1]
+
+        for x in ExprDAG.postorder((node,), texts):
+            value = text(x)
+            if limit is not None and len(value) > limit:
+                value = value[:limit] + TRUNCATED
+            texts[x] = value
+        return texts[node]
+
+    @staticmethod
+    def node_operations(node):
+        # 노드 자신이 하드웨어에서 필요로 하는 연산 수 (n항 덧셈/곱셈은 n-1개)
+        kind = node[0]
+        if kind in ("sum", "mul"):
+            return len(node[1]) - 1
+        if kind in ("neg", "bin", "not"):
+            return 1
+        return 0
+
+    @staticmethod
+    def children(node):
+        kind = node[0]
+        if kind in ("sum", "mul"):
+            return node[1]
+        if kind in ("neg", "not"):
+            return (node[1],)
+        if kind == "bin":
+            return node[2], node[3]
+        if kind == "load":
+            return (node[2],)
+        if kind == "call":
+            return node[2]
+        return ()
+
+    def operations(self, roots):
+        # (공유 노드를 한 번만 센 연산 수, 식마다 따로 계산할 때의 연산 수)
+        costs = {}
+        shared = 0
+        for node in self.postorder(roots):
+            shared += self.node_operations(node)
+            costs[node] = self.node_operations(node) + sum(costs[c] for c in self.children(node))
+        return shared, sum(costs[root] for root in roots)
+
+
+class ExprParser:
+    # 우선순위 기반 재귀 하강 파서 (토큰: (종류, 텍스트))
+    def __init__(self, dag, tokens):
+        self.dag = dag
+        self.tokens = tokens
+        self.pos = 0
+
+    def peek(self):
+        return self.tokens[self.pos] if self.pos < len(self.tokens) else (None, None)
+
+    def take(self, text=None):
+        tok = self.tokens[self.pos]
+        if text is not None and tok[1] != text:
+            raise ValueError(text)
+        self.pos += 1
+        return tok
+
+    def expression(self, min_prec):
+        left = self.unary()
+        while True:
+            kind, text = self.peek()
+            prec = BINARY_PRECEDENCE.get(text) if kind == "op" else None
+            if prec is None or prec <= min_prec:
+                return left
+            self.take()
+            right = self.expression(prec)
+            left = self.dag.binary(text, left, right)
+
+    def is_cast(self):
+        # '(' 형 이름들 ')' 인지 확인
+        i = self.pos + 1
+        words = 0
+        while i < len(self.tokens) and self.tokens[i][0] == "name" and self.tokens[i][1] in TYPE_WORDS:
+            i += 1
+            words += 1
+        return words > 0 and i < len(self.tokens) and self.tokens[i][1] == ")"
+
+    def unary(self):
+        kind, text = self.peek()
+        if kind == "op" and text == "-":
+            self.take()
+            return self.dag.neg(self.unary())
+        if kind == "op" and text == "~":
+            self.take()
+            return self.dag.bit_not(self.unary())
+        if kind == "op" and text == "(" and self.is_cast():
+            # 형 변환은 값을 바꾸지 않는 것으로 취급 (레지스터는 32비트 워드)
+            while self.take()[1] != ")":
+                pass
+            return self.unary()
+        return self.postfix()
+
+    def postfix(self):
+        kind, text = self.take()
+        if kind == "int":
+            return self.dag.const(int(text, 0))
+        if kind == "float":
+            return self.dag.intern(("lit", text))
+        if kind == "op" and text == "(":
+            node = self.expression(0)
+            self.take(")")
+            return node
+        if kind != "name":
+            raise ValueError(text)
+        nxt = self.peek()[1]
+        if nxt == "[":
+            self.take()
+            index = self.expression(0)
+            self.take("]")
+            return self.dag.load(text, index)
+        if nxt == "(":
+            self.take()
+            args = []
+            while self.peek()[1] != ")":
+                args.append(self.expression(0))
+                if self.peek()[1] == ",":
+                    self.take()
+            self.take(")")
+            return self.dag.unique("call", text, tuple(args))
+        return self.dag.name(text)
@@ -1,15 +1,97 @@
 import re
 import json
-import subprocess
 import os
+import tempfile
+from collections import deque
+
+from src.toolchain import gcc_version, dump_gimple, dump_gimple_text
+from src.profiler import count
+from src.cfg import ControlFlowGraph
+from src.linetable import LineTable
+from src.data_segment import json_default
+
+# GIMPLE 라인 종류
+LINE_OTHER = 0
+LINE_FUNC = 1
+LINE_LABEL = 2
+LINE_COND_GOTO = 3
+LINE_GOTO = 4
+LINE_DECL = 5
+LINE_TMP_DECL = 6
+LINE_CONST_ASSIGN = 7
+
+# 라인 분류 및 매칭에 쓰는 정규식 (모듈 로드 시 한 번만 컴파일)
+# 함수 시작: 'main ()' 또는 반환형이 함께 출력되는 'void main ()', 'int f (int n)' (호출문처럼 ';'로 끝나는 라인 제외)
+FUNC_RE = re.compile(r'(?:[\w*]+\s+)*?(?!__attribute__)(\w+)\s*\(([^;]*)\)$')
+LABEL_RE = re.compile(r'<D\.\d+>:$')
+COND_GOTO_RE = re.compile(r'if \((.*?)\) goto <D\.(\d+)>;\s*else goto <D\.(\d+)>;')
+GOTO_RE = re.compile(r'goto (<D\.\d+>);$')
+TMP_DECL_RE = re.compile(r'(int|long long int|float|double)\s+D\.\d+;')
+DECL_RE = re.compile(r'(int|long long int|float|double)\s+(\w+);')
+CONST_ASSIGN_RE = re.compile(r'(\w+)\s*=\s*([-]?\d+);')
+LESS_EQ_RE = re.compile(r'(\w+)\s*(<=|<|>|=)\s*(\w+|\d+)')
+WORD_RE = re.compile(r'\b(\w+)\b')
+INCREMENT_RE = re.compile(r'(\w+)=(\w+)([+\-*/])(\w+|\d+)')
+COMPARE_RE = re.compile(r'(.+?) (<=|>=|==|!=|<|>) (.+)$')
+# 조건이 거짓일 때 루프를 계속하는 경우 조건을 뒤집기 위한 비교 연산자 표
+NEGATED_OPS = {"<": ">=", ">=": "<", ">": "<=", "<=": ">", "==": "!=", "!=": "=="}
+# 프로세스 풀로 매칭할 때 결과를 기다리는 함수 블록 최대 수 (넘으면 앞의 결과부터 라인 표에 넣고 원래 라인을 버림)
+MATCH_WINDOW = 64
+
+
+def classify_line(line):
+    # GIMPLE 라인 하나의 종류와 매치 결과를 반환
+    if line.startswith("if "):
+        return LINE_COND_GOTO, COND_GOTO_RE.match(line)
+    if line.startswith("<"):
+        if LABEL_RE.match(line):
+            return LINE_LABEL, None
+    elif line.startswith("goto "):
+        m = GOTO_RE.match(line)
+        if m:
+            return LINE_GOTO, m
+    m = FUNC_RE.match(line)
+    if m:
+        return LINE_FUNC, m
+    m = TMP_DECL_RE.match(line)
+    if m:
+        return LINE_TMP_DECL, m
+    m = DECL_RE.match(line)
+    if m:
+        return LINE_DECL, m
+    m = CONST_ASSIGN_RE.match(line)
+    if m:
+        # goto/if가 섞인 라인은 초기화로 보지 않음
+        if 'goto' in line or 'if' in line:
+            return LINE_OTHER, None
+        return LINE_CONST_ASSIGN, m
+    return LINE_OTHER, None
 
 class GimpleParser:
-    def __init__(self, c_file_path, json_file_path):
+    def __init__(self, c_file_path=None, json_file_path=None, json_data=None, c_text=None, cache=None,
+                 gimple_file=None, preprocessed=None, debug=False):
+        # json_data / c_text가 주어지면 중간 JSON 파일이나 소스 파일을 다시 읽지 않음
+        # json_data와 json_file_path가 모두 없으면 C 쪽 정보 없이 GIMPLE만으로 매칭
+        # cache(CompileCache)가 주어지면 같은 소스/GCC 버전의 GIMPLE 덤프를 재사용
+        # gimple_file이 주어지면(배치 덤프 등) GCC를 다시 실행하지 않고 그 덤프를 사용
+        # preprocessed(전처리된 전체 텍스트)가 주어지면 GCC는 전처리 없이 그 텍스트에서 GIMPLE만 생성
+        # debug면 C 파싱 결과에 없는 함수(main에서 호출하지 않는 함수 등)를 GIMPLE만으로 매칭할 때 알림
         self.c_file_path = c_file_path
         self.json_file_path = json_file_path
-        self.c_text = self._read_file(self.c_file_path)
-        self.json_data = self._read_json_file()
-        self.gimple_file = self._generate_gimple()
+        self.c_text = c_text if c_text is not None else self._read_file(self.c_file_path)
+        if json_data is None and json_file_path is not None:
+            json_data = self._read_json_file()
+        self.json_data = json_data
+        self.preprocessed = preprocessed
+        self.cache = cache
+        self.debug = debug
+        self._dump_dir = None
+        self._owns_gimple_file = gimple_file is None
+        self.gimple_file = gimple_file or self._generate_gimple_cached()
+
+    def dprint(self, *args, **kwargs):
+        if self.debug:
+            print(*args, **kwargs)
 
     def _read_file(self, file_path):
         # 파일 읽기
@@ -31,263 +113,429 @@ class GimpleParser:
         except Exception as e:
             raise Exception(f"JSON 파일 읽기 오류: {str(e)}")
 
+    def _generate_gimple_cached(self):
+        # GCC 호출은 파이프라인에서 가장 비싼 단계이므로 소스 내용과 GCC 버전으로 캐시
+        if self.cache is None or (self.c_file_path and os.path.exists(f"{self.c_file_path}.gimple")):
+            return self._generate_gimple_any()
+
+        # 전처리된 텍스트가 있으면 그것으로 키를 만들어 포함된 헤더가 바뀌어도 다시 생성
+        key = self.cache.make_key("gimple", gcc_version(cache_dir=self.cache.cache_dir), self.preprocessed or self.c_text)
+        entry = self.cache.get(key)
+        if entry is not None:
+            print("캐시된 GIMPLE 덤프를 사용합니다.")
+            self._owns_gimple_file = False
+            return os.path.join(entry, "dump.gimple")
+
+        gimple_file = self._generate_gimple_any()
+        with open(gimple_file, 'rb') as f:
+            self.cache.put(key, {"dump.gimple": f.read()})
+        return gimple_file
+
+    def _generate_gimple_any(self):
+        # 전처리 결과가 있으면 그 텍스트로, 없으면(또는 소스 옆에 .gimple 파일이 있으면) 소스 파일로 생성
+        if self.c_file_path and (self.preprocessed is None or os.path.exists(f"{self.c_file_path}.gimple")):
+            return self._generate_gimple()
+        return self._generate_gimple_from_text()
+
     def _generate_gimple(self):
         # GIMPLE 파일 생성 또는 기존 파일 사용
+        # GCC는 전용 임시 폴더에서 실행되므로 작업 디렉터리를 공유하는 빌드끼리 충돌하지 않음
         gimple_file = f"{self.c_file_path}.gimple"
-        base_name = os.path.splitext(os.path.basename(self.c_file_path))[0]
-
         if os.path.exists(gimple_file):
             print(f"기존 GIMPLE 파일 발견: {gimple_file}. 이를 사용합니다.")
             return gimple_file
 
-        try:
-            print("GCC 버전 확인 중...")
-            result = subprocess.run(["gcc", "--version"], check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-            print(result.stdout.decode())
-
-            print(f"{self.c_file_path}에 대해 GIMPLE 생성 시도 중...")
-            result = subprocess.run(
-                ["gcc", "-fdump-tree-gimple", "-c", self.c_file_path],
-                check=True,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE
-            )
-            print(f"GCC 실행 결과: {result.stdout.decode()}")
-            if result.stderr:
-                print(f"GCC 에러 출력: {result.stderr.decode()}")
-
-            print("생성된 GIMPLE 파일 검색 중...")
-            found = False
-            for fname in os.listdir('.'):
-                if fname.startswith(base_name) and '.gimple' in fname:
-                    print(f"GIMPLE 파일 발견: {fname}")
-                    os.rename(fname, gimple_file)
-                    found = True
-                    break
-            if not found:
-                raise Exception("GIMPLE 파일이 생성되지 않았습니다. GCC 출력 파일을 확인하세요.")
-            return gimple_file
-        except FileNotFoundError:
-            raise Exception("GCC가 설치되지 않았거나 PATH에 없습니다. MinGW를 설치하고 PATH를 확인하세요.")
-        except subprocess.CalledProcessError as e:
-            raise Exception(f"GIMPLE 생성 실패: {e.stderr.decode()}")
-        except Exception as e:
-            raise Exception(f"GIMPLE 파일 처리 오류: {str(e)}")
+        cache_dir = self.cache.cache_dir if self.cache else None
+        print(f"GCC: {gcc_version(cache_dir=cache_dir).splitlines()[0]}")
+        print(f"{self.c_file_path}에 대해 GIMPLE 생성 시도 중...")
+        self._dump_dir = tempfile.TemporaryDirectory(prefix="eoppp_gimple_")
+        return dump_gimple(self.c_file_path, self._dump_dir.name, cache_dir=cache_dir)
+
+    def _generate_gimple_from_text(self):
+        # 메모리 상의 소스(또는 전처리된 텍스트)를 표준 입력으로 GCC에 전달하고, 덤프는 임시 폴더에만 생성
+        self._dump_dir = tempfile.TemporaryDirectory(prefix="eoppp_gimple_")
+        cache_dir = self.cache.cache_dir if self.cache else None
+        if self.preprocessed is not None:
+            return dump_gimple_text(self.preprocessed, self._dump_dir.name, language="cpp-output", cache_dir=cache_dir)
+        return dump_gimple_text(self.c_text, self._dump_dir.name, cache_dir=cache_dir)
+
+    def cleanup(self):
+        # 중간 산출물인 .gimple 파일(또는 임시 덤프 폴더) 삭제
+        if self._dump_dir is not None:
+            self._dump_dir.cleanup()
+            self._dump_dir = None
+        elif self._owns_gimple_file and os.path.exists(self.gimple_file):
+            os.remove(self.gimple_file)
 
-    def parse_and_match_gimple(self):
-        # GIMPLE 파일 읽기 및 JSON 데이터와 매칭
+    @staticmethod
+    def iter_gimple_blocks(gimple_file):
+        # GIMPLE 파일을 한 줄씩 읽으며 함수 단위 블록을 하나씩 생성 (전체 파일을 메모리에 올리지 않음)
+        # 블록: (함수 시작 매치 또는 첫 함수 이전 영역이면 None, 라인 목록, 라인 종류 목록, 매치 목록)
         try:
-            with open(self.gimple_file, 'rt', encoding='UTF8') as file:
-                gimple_text = file.read()
+            file = open(gimple_file, 'rt', encoding='UTF8')
         except Exception as e:
             raise Exception(f"GIMPLE 파일 읽기 오류: {str(e)}")
+        with file:
+            func_match = None
+            lines, kinds, matches = [], [], []
+            for raw in file:
+                line = raw.strip()
+                if not line:
+                    continue
+                kind, m = classify_line(line)
+                if kind == LINE_FUNC:
+                    if func_match is not None or lines:
+                        yield func_match, lines, kinds, matches
+                    func_match = m
+                    lines, kinds, matches = [], [], []
+                    continue
+                lines.append(line)
+                kinds.append(kind)
+                matches.append(m)
+            if func_match is not None or lines:
+                yield func_match, lines, kinds, matches
+
+    @staticmethod
+    def build_cfg(lines, kinds, matches):
+        # 함수 블록의 레이블/goto/조건 goto/return 라인으로 제어 흐름 그래프 구성
+        labels, jumps = {}, {}
+        for idx, kind in enumerate(kinds):
+            if kind == LINE_LABEL:
+                labels[idx] = lines[idx][:-1]
+            elif kind == LINE_GOTO:
+                jumps[idx] = (matches[idx].group(1),)
+            elif kind == LINE_COND_GOTO and matches[idx] is not None:
+                m = matches[idx]
+                jumps[idx] = (f"<D.{m.group(2)}>", f"<D.{m.group(3)}>")
+            elif lines[idx].startswith("return"):
+                jumps[idx] = ()
+        return ControlFlowGraph(len(lines), labels, jumps)
+
+    @staticmethod
+    def loop_tests(cfg, kinds):
+        # 루프마다 반복 여부를 정하는 조건 goto 라인: 헤더(for/while) 또는 latch(do-while) 블록 끝에서
+        # 한쪽은 루프 안, 다른 쪽은 루프 밖으로 가는 분기
+        # 반환값: {조건 라인 위치: (루프, 조건이 참일 때 루프를 계속하는지)}
+        tests = {}
+        for loop in cfg.loops:
+            for b in [loop.header] + loop.latches:
+                block = cfg.blocks[b]
+                last = block.end - 1
+                if kinds[last] != LINE_COND_GOTO or len(block.succs) != 2 or last in tests:
+                    continue
+                true_in, false_in = (s in loop.blocks for s in block.succs)
+                if true_in != false_in:
+                    tests[last] = (loop, true_in)
+                    break
+        return tests
+
+    @staticmethod
+    def loop_body_blocks(cfg, loop):
+        # 매 반복마다 실행되는 블록: 모든 latch를 지배하는 블록 중 안쪽 루프에 속하지 않은 것 (라인 순서)
+        # if 분기 안의 블록이나 안쪽 루프 본문은 제외됨
+        blocks = []
+        b = cfg.common_dominator(loop.latches)
+        while True:
+            if cfg.loop_of[b] is loop:
+                blocks.append(b)
+            if b == loop.header:
+                break
+            b = cfg.idom[b]
+        return sorted(blocks, key=lambda blk: cfg.blocks[blk].start)
+
+    @staticmethod
+    def is_noise(line):
+        return line in ("{", "}") or line.startswith("//")
+
+    @classmethod
+    def skip_positions(cls, lines, kinds):
+        # 본문에 넣지 않는 라인 위치 (레이블, 분기, 임시 변수 선언, 중괄호/주석 라인)
+        return [j for j, kind in enumerate(kinds)
+                if kind in (LINE_LABEL, LINE_GOTO, LINE_COND_GOTO, LINE_TMP_DECL) or cls.is_noise(lines[j])]
+
+    @staticmethod
+    def jump_lines(cfg, lines, kinds):
+        # if 본문에서 보이는 goto: 그 goto를 감싸는 가장 가까운 조건 분기가 속한 루프를 벗어나면 'break;',
+        # 그 루프의 헤더/latch로 가면 'continue;' (break 블록은 루프 밖에 있으므로 조건 분기 쪽 루프를 기준으로 봄)
+        # 반환값: [[라인 위치, 텍스트], ...] (루프 밖의 goto와 그 밖의 goto는 본문에서 빠짐)
+        jumps = []
+        for j, kind in enumerate(kinds):
+            if kind != LINE_GOTO:
+                continue
+            b = cfg.block_of[j]
+            cond = cfg.idom[b]
+            while cond is not None and cond != 0 and kinds[cfg.blocks[cond].end - 1] != LINE_COND_GOTO:
+                cond = cfg.idom[cond]
+            loop = cfg.loop_of[cond if cond is not None else b]
+            target = cfg.label_block.get(lines[j][5:-1])
+            if loop is None or target is None:
+                continue
+            if target not in loop.blocks:
+                jumps.append([j, "break;"])
+            elif target == loop.header or target in loop.latches:
+                jumps.append([j, "continue;"])
+        return jumps
+
+    @staticmethod
+    def block_ranges(cfg, blocks):
+        # 블록들을 라인 순서로 정렬하여 이어지는 블록끼리 합친 [시작, 끝) 구간 목록
+        ranges = []
+        for b in sorted(blocks, key=lambda blk: cfg.blocks[blk].start):
+            block = cfg.blocks[b]
+            if ranges and ranges[-1][1] == block.start:
+                ranges[-1][1] = block.end
+            else:
+                ranges.append([block.start, block.end])
+        return ranges
+
+    @classmethod
+    def if_ranges(cls, cfg, cond_block):
+        # 조건이 참일 때만 실행되는 블록(참 분기 블록이 지배하는 블록)의 구간
+        succs = cfg.blocks[cond_block].succs
+        if len(succs) != 2 or len(cfg.blocks[succs[0]].preds) != 1:
+            return []
+        return cls.block_ranges(cfg, cfg.dom_subtree(succs[0]))
 
-        lines = gimple_text.split('\n')
-        indexed_lines = [line.strip() for line in lines if line.strip()]
+    @staticmethod
+    def range_lines(ranges, lines, skip):
+        # 구간 안의 본문 라인 텍스트 (skip: 빠지는 라인 위치 집합)
+        return [lines[j] for start, end in ranges for j in range(start, end) if j not in skip]
 
-        #print("Indexed lines (first 10):", indexed_lines[:10])
+    @staticmethod
+    def json_condition(condition):
+        # <= 연산자를 < 연산자로 변환하여 JSON과 일치시키기 위한 처리
+        less_eq_match = LESS_EQ_RE.match(condition)
+        if less_eq_match:
+            var, op, bound = less_eq_match.groups()
+            if op == "<=" and bound.isdigit():
+                return f"{var}<{int(bound) + 1}"
+        return condition.replace(" ", "")
 
-        # 기존 JSON 데이터에서 전역 변수 및 함수 정보 추출
-        json_data = self.json_data
-        #print("json_data successfully extracted:", json_data)
-        if isinstance(json_data, dict) and "global_variable" in json_data:
+    @staticmethod
+    def negate_condition(condition):
+        m = COMPARE_RE.match(condition)
+        if m is None:
+            return f"!({condition})"
+        left, op, right = m.groups()
+        return f"{left} {NEGATED_OPS[op]} {right}"
+
+    @staticmethod
+    def normalize_increment(increment, variable):
+        # 'i++' 또는 'i=i+1' 형태의 증감식을 'i = i + 1' 형태로 변환
+        if increment == f"{variable}++":
+            return f"{variable} = {variable} + 1"
+        m = INCREMENT_RE.match(increment)
+        if m:
+            var, left, op, right = m.groups()
+            return f"{var} = {left} {op} {right}"
+        return increment
+
+    @staticmethod
+    def split_json_data(json_data):
+        # parsed_.json 데이터에서 전역 변수와 함수 목록 추출 (None이면 GIMPLE만으로 매칭)
+        if json_data is None:
+            global_variables = {"declarations": [], "initializations": {}}
+            json_functions = []
+        elif isinstance(json_data, dict) and "global_variable" in json_data:
             global_variables = json_data.get("global_variable", {"declarations": [], "initializations": {}})
             json_functions = json_data.get("functions", [])
-            #print("global_variable successfully extracted:", global_variables)
         elif isinstance(json_data, list):
-            #print("경고: parsed_.json이 리스트 형태입니다. global_variable가 없으면 기본값 사용.")
             global_variables = {"declarations": [], "initializations": {}}
             json_functions = json_data
         else:
             raise Exception("parsed_.json의 형식이 예상과 다릅니다.")
+        return global_variables, json_functions
 
-        # 효율적인 검색을 위해 JSON의 조건문 정보를 딕셔너리로 재정리
-        json_for_conditions = {}
-        json_if_conditions = {}
+    @staticmethod
+    def index_json_functions(json_functions):
+        # 효율적인 검색을 위해 JSON의 함수 및 조건문 정보를 함수 이름별 딕셔너리로 재정리
+        # {함수 이름: (함수 항목, {for 조건: 증감식}, {if 조건: 증감식})}
+        index = {}
         for func in json_functions:
             func_name = func["function_name"]
+            entry = index.setdefault(func_name, (func, {}, {}))
             for for_loop in func.get("for_loops", []):
                 if "condition" in for_loop:
                     condition = for_loop["condition"].strip().replace(" ", "")
-                    json_for_conditions[(func_name, condition)] = for_loop.get("increment", "unknown")
+                    entry[1][condition] = for_loop.get("increment", "unknown")
             for if_stmt in func.get("if_stmts", []):
                 if "condition" in if_stmt:
                     condition = if_stmt["condition"].strip().replace(" ", "")
-                    json_if_conditions[(func_name, condition)] = if_stmt.get("increment", "unknown")
-
-        matched_data = []
-        current_func = None
-        func_line_idx = 0
-
-        i = 0
-        while i < len(indexed_lines):
-            line = indexed_lines[i]
-            # 1. 함수 시작 매칭 (예: main())
-            func_match = re.match(r'(\w+)\s*\(\)', line)
-            
-            # 2. 전역 변수 선언 및 초기화 매칭
-            if not current_func and not func_match:
-                decl_match = re.match(r'(int|long long int|float|double)\s+(\w+);', line)
-                if decl_match:
-                    var_name = decl_match.group(2)
-                    if var_name not in global_variables["declarations"]:
-                        global_variables["declarations"].append(var_name)
-                        global_variables["initializations"].setdefault(var_name, None)
-                    i += 1
-                    continue
-                
-                
-                init_match = re.match(r'(\w+)\s*=\s*([-]?\d+);', line)
-                if init_match:
-                    var_name, value = init_match.groups()
-                    if var_name not in global_variables["declarations"]:
-                        global_variables["declarations"].append(var_name)
-                    global_variables["initializations"][var_name] = value
-                    i += 1
-                    continue
+                    entry[2][condition] = if_stmt.get("increment", "unknown")
+        return index
+
+    @staticmethod
+    def collect_global_lines(lines, kinds, matches, global_variables):
+        # 첫 함수 이전 영역의 전역 변수 선언 및 초기화 매칭
+        for line, kind, m in zip(lines, kinds, matches):
+            if kind == LINE_DECL:
+                var_name = m.group(2)
+                if var_name not in global_variables["declarations"]:
+                    global_variables["declarations"].append(var_name)
+                    global_variables["initializations"].setdefault(var_name, None)
+            elif kind == LINE_CONST_ASSIGN:
+                var_name, value = m.groups()
+                if var_name not in global_variables["declarations"]:
+                    global_variables["declarations"].append(var_name)
+                global_variables["initializations"][var_name] = value
+            # 전역 변수 선언/초기화 외의 라인은 건너뜀
+
+    @classmethod
+    def match_function(cls, func_name, lines, kinds, matches, json_entry):
+        # 함수 블록 하나의 루프/if 문을 제어 흐름 그래프에서 복원
+        # 루프는 지배자 트리의 백 에지로 찾은 자연 루프이고, 본문/증감식도 GIMPLE에서 직접 추출
+        # parsed_.json의 함수 정보(json_entry)는 선택 사항: 초기화 대상 변수와, GIMPLE에서 증감식을 찾지 못한 경우의 힌트로만 사용
+        if json_entry is None:
+            json_func, for_conditions, if_conditions = None, {}, {}
+        else:
+            json_func, for_conditions, if_conditions = json_entry
+
+        # 라인 텍스트는 "lines"/"jumps"에만 두고 루프/if 본문은 라인 위치 구간으로 기록
+        # (parse_and_match_gimple이 LineTable로 번역 단위 라인 표 번호로 바꿈, src/linetable.py 참고)
+        cfg = cls.build_cfg(lines, kinds, matches)
+        skip = cls.skip_positions(lines, kinds)
+        skip_set = set(skip)
+        current_func = {
+            "function_name": func_name,
+            "initializations": {},
+            "for_loops": [],
+            "if_stmts": [],
+            "lines": list(lines),
+            "skip": skip,
+            "jumps": cls.jump_lines(cfg, lines, kinds),
+        }
+        tests = cls.loop_tests(cfg, kinds)
+        loop_index = {}  # {id(루프): for_loops 안의 위치} (중첩 관계 표시용)
+
+        # 초기화 매칭: JSON이 있으면 C 소스에서 초기화된 변수만, 없으면 루프 밖에서 처음 나오는 상수 대입
+        json_inits = json_func.get("initializations", {}) if json_func is not None else None
+        for i, kind in enumerate(kinds):
+            if kind != LINE_CONST_ASSIGN:
+                continue
+            var_name, value = matches[i].groups()
+            if json_inits is not None:
+                if json_inits.get(var_name) is not None:
+                    current_func["initializations"][var_name] = value
+            elif cfg.loop_of[cfg.block_of[i]] is None and cfg.reachable(cfg.block_of[i]):
+                current_func["initializations"].setdefault(var_name, value)
 
-                # 전역 변수 선언/초기화 외의 라인은 건너뜀
-            if func_match:
-                if current_func:
-                    matched_data.append(current_func)
-
-                func_name = func_match.group(1)
-                json_func = next((f for f in json_functions if f["function_name"] == func_name), None)
-                if not json_func:
-                    print(f"경고: {func_name} 함수가 JSON에서 발견되지 않았습니다.")
-                    json_func = {"function_name": func_name, "initializations": {}, "for_loops": [], "if_stmts": []}
-
-                current_func = {
-                    "function_name": func_name,
-                    "initializations": {},
-                    "for_loops": [],
-                    "if_stmts": [],
-                    "all_lines": []
-                }
-                func_line_idx = 0
-                i += 1
+        # 조건문 매칭 (라인 순서)
+        for i, kind in enumerate(kinds):
+            m = matches[i]
+            if kind != LINE_COND_GOTO or m is None:
                 continue
+            condition = m.group(1)
+            json_cond = cls.json_condition(condition)
+
+            if i in tests:
+                loop, continue_if_true = tests[i]
+                if not continue_if_true:
+                    condition = cls.negate_condition(condition)
+                variable_match = WORD_RE.search(condition)
+                variable = variable_match.group(1) if variable_match else "unknown"
+                body = cls.block_ranges(cfg, cls.loop_body_blocks(cfg, loop))
+
+                # 증감식: 매 반복 실행되는 루프 변수 대입문 중 마지막 것, 없으면 JSON 힌트
+                increment = None
+                for line in reversed(cls.range_lines(body, lines, skip_set)):
+                    if line.startswith(f"{variable} = "):
+                        increment = line.rstrip(";")
+                        break
+                if increment is None:
+                    increment = cls.normalize_increment(for_conditions.get(json_cond, "unknown"), variable)
+
+                loop_index[id(loop)] = len(current_func["for_loops"])
+                current_func["for_loops"].append({
+                    "variable": variable,
+                    "condition": condition,
+                    "increment": increment,
+                    "body": body,
+                    "depth": loop.depth,
+                    "parent": id(loop.parent) if loop.parent is not None else None,
+                })
+            else:
+                # 루프 내부의 if 문 처리
+                variable_match = WORD_RE.search(condition)
+                variable = variable_match.group(1) if variable_match else "unknown"
+                json_if_increment = if_conditions.get(json_cond, "unknown")
+                current_func["if_stmts"].append({
+                    "variable": variable,
+                    "condition": condition,
+                    "increment": cls.normalize_increment(json_if_increment, variable),
+                    "body": cls.if_ranges(cfg, cfg.block_of[i])
+                })
+
+        # 바깥 루프를 for_loops 안의 위치로 표시 (바깥 루프의 조건 라인이 뒤에 오므로 마지막에 변환)
+        for blk in current_func["for_loops"]:
+            if blk["parent"] is not None:
+                blk["parent"] = loop_index.get(blk["parent"])
+
+        return current_func
+
+    def parse_and_match_gimple(self, select=None, pool=None):
+        # GIMPLE 파일을 함수 단위로 스트리밍하며 JSON 데이터와 매칭 (iter_matched_functions의 결과를 모음)
+        # 모아 두는 함수 레코드는 라인 표 번호와 구간만 가지므로 크기는 GIMPLE 텍스트가 아니라 라인/블록 수에 비례
+        global_variables, _ = self.split_json_data(self.json_data)
+        table = LineTable()
+        functions = list(self.iter_matched_functions(table, global_variables, select, pool))
+        count("functions_matched", len(functions))
+        count("gimple_unique_lines", len(table.lines))
+        return {"global_variables": global_variables, "line_table": table.lines, "functions": functions}
 
-                # 함수 내부 라인 매칭
-            if current_func:
-                current_func["all_lines"].append((func_line_idx, line))
-                func_line_idx += 1
-                # 초기화 매칭
-                init_match = re.match(r'(\w+)\s*=\s*([-]?\d+);', line)
-                if init_match and not ('goto' in line or 'if' in line):
-                    var_name, value = init_match.groups()
-                    json_init = json_func["initializations"].get(var_name)
-                    if json_init is not None:
-                        current_func["initializations"][var_name] = value
-                # 조건문 매칭
-                if_match = re.match(r'if \((.*?)\) goto <D\.(\d+)>;\s*else goto <D\.(\d+)>;', line)
-                if if_match:
-                    condition = if_match.group(1)
-                    true_label = f"<D.{if_match.group(2)}>:"
-                    false_label = f"<D.{if_match.group(3)}>:"
-
-                    try:
-                        true_idx = indexed_lines.index(true_label)
-                    except ValueError:
-                        true_idx = None
-                    try:
-                        false_idx = indexed_lines.index(false_label)
-                    except ValueError:
-                        false_idx = None
-
-                    # 조건 변환
-                    # <= 연산자를 < 연산자로 변환하여 JSON과 일치시키기 위한 처리
-                    less_eq_match = re.match(r'(\w+)\s*(<=|<|>|=)\s*(\w+|\d+)', condition)
-                    if less_eq_match:
-                        var, op, bound = less_eq_match.groups()
-                        if op == "<=" and bound.isdigit():
-                            json_cond = f"{var}<{int(bound) + 1}"
-                        else:
-                            json_cond = condition.replace(" ", "")
-                    else:
-                        json_cond = condition.replace(" ", "")
-
-                    # for 루프 처리
-                    if true_idx is not None and false_idx is not None:
-                        json_for_increment = json_for_conditions.get((current_func["function_name"], json_cond))
-                        if json_for_increment is not None:
-                            variable_match = re.search(r'\b(\w+)\b', condition)
-                            variable = variable_match.group(1) if variable_match else "unknown"
-                            body = []
-                            body_start = true_idx + 1
-                            while body_start < len(indexed_lines):
-                                b_line = indexed_lines[body_start]
-                                if b_line == false_label or re.match(r'if ', b_line):
-                                    break
-                                if not re.match(r'(int|long long int|float|double)\s+D\.\d+;', b_line):
-                                    body.append(b_line)
-                                body_start += 1
-                            final_increment = json_for_increment
-                            if final_increment == f"{variable}++":
-                                final_increment = f"{variable} = {variable} + 1"
-                            elif re.match(r'(\w+)=(\w+)([+\-*/])(\w+|\d+)', final_increment):
-                                var, left, op, right = re.match(r'(\w+)=(\w+)([+\-*/])(\w+|\d+)', final_increment).groups()
-                                final_increment = f"{var} = {left} {op} {right}"
-                            for_loop_data = {
-                                "variable": variable,
-                                "condition": condition,
-                                "increment": final_increment,
-                                "body": body
-                            }
-                            current_func["for_loops"].append(for_loop_data)
-                            #print(f"Matched for loop in {current_func['function_name']}: condition={condition}, increment={final_increment}")
-                        else:
-
-                            # 루프 내부의 if 문 처리
-                            json_if_increment = json_if_conditions.get((current_func["function_name"], json_cond), "unknown")
-                            variable_match = re.search(r'\b(\w+)\b', condition)
-                            variable = variable_match.group(1) if variable_match else "unknown"
-                            body = []
-                            body_start = true_idx + 1
-                            while body_start < len(indexed_lines):
-                                b_line = indexed_lines[body_start]
-                                if b_line == false_label or re.match(r'if ', b_line):
-                                    break
-                                if not re.match(r'(int|long long int|float|double)\s+D\.\d+;', b_line):
-                                    body.append(b_line)
-                                    if "goto" in b_line and false_label not in b_line:  # break 감지
-                                        body[-1] = "break;"
-                                body_start += 1
-                            final_increment = json_if_increment
-                            # 조건문의 증감식 변환
-                            if final_increment == f"{variable}++":
-                                final_increment = f"{variable} = {variable} + 1"
-                        
-                            elif re.match(r'(\w+)=(\w+)([+\-*/])(\w+|\d+)', final_increment):
-                                var, left, op, right = re.match(r'(\w+)=(\w+)([+\-*/])(\w+|\d+)', final_increment).groups()
-                                final_increment = f"{var} = {left} {op} {right}"
-                            if_stmt_data = {
-                                "variable": variable,
-                                "condition": condition,
-                                "increment": final_increment,
-                                "body": body
-                            }
-                            current_func["if_stmts"].append(if_stmt_data)
-                            #print(f"Matched if stmt in {current_func['function_name']}: condition={condition}, increment={final_increment}")
-
-            i += 1
-
-        if current_func:
-            matched_data.append(current_func)
-
-        return {"global_variables": global_variables, "functions": matched_data}
+    def iter_matched_functions(self, table, global_variables, select=None, pool=None):
+        # 함수 블록을 하나씩 매칭하여 라인 표(table)에 넣은 레코드를 파일 순서대로 생성
+        # 함수의 라인 텍스트는 매칭 직후 라인 표로 옮기고 버리므로, 원래 라인 목록은 한 번에 한 함수분만 남음
+        # (풀을 쓸 때는 결과를 기다리는 MATCH_WINDOW개까지)
+        # global_variables: 첫 함수 이전 영역의 전역 변수 선언을 채워 넣을 딕셔너리
+        # select(함수 이름, 라인 목록)가 주어지면 True를 돌려준 함수만 매칭 (증분 빌드용)
+        # pool(프로세스 풀)이 주어지면 함수 블록마다 작업자에서 매칭
+        _, json_functions = self.split_json_data(self.json_data)
+        json_index = self.index_json_functions(json_functions)
+
+        pending = deque()
+        for func_match, lines, kinds, matches in self.iter_gimple_blocks(self.gimple_file):
+            # 분류한 라인 수 (라인마다 classify_line의 정규식 검사를 한 번 거침, 함수 시작 라인 포함)
+            count("gimple_lines", len(lines) + (func_match is not None))
+            if func_match is None:
+                self.collect_global_lines(lines, kinds, matches, global_variables)
+                continue
+            count("gimple_functions")
+            func_name = func_match.group(1)
+            if select is not None and not select(func_name, lines):
+                continue
+            if json_functions and func_name not in json_index:
+                count("gimple_only_functions")
+                self.dprint(f"{func_name} 함수가 JSON에서 발견되지 않았습니다. GIMPLE만으로 매칭합니다.")
+            if pool is None:
+                yield table.intern_function(self.match_function(func_name, lines, kinds, matches, json_index.get(func_name)))
+                continue
+            pending.append(pool.submit(match_lines, func_name, lines, json_index.get(func_name)))
+            while len(pending) > MATCH_WINDOW:
+                yield table.intern_function(pending.popleft().result())
+        while pending:
+            yield table.intern_function(pending.popleft().result())
 
     def save_to_json(self, output_file="matched_gimple.json"):
         matched_data = self.parse_and_match_gimple()
         try:
             with open(output_file, 'w', encoding='UTF8') as json_file:
-                json.dump(matched_data, json_file, indent=4, ensure_ascii=False)
+                json.dump(matched_data, json_file, indent=4, ensure_ascii=False, default=json_default)
             print(f"매핑된 GIMPLE 데이터가 {output_file}에 저장되었습니다.")
         except Exception as e:
             print(f"JSON 저장 오류: {str(e)}")
         finally:
-            if os.path.exists(self.gimple_file):
-                os.remove(self.gimple_file)
+            self.cleanup()
+
+
+def match_lines(func_name, lines, json_entry):
+    # 작업자 프로세스에서 함수 블록 하나를 매칭 (정규식 매치 객체는 넘길 수 없으므로 라인을 다시 분류)
+    kinds, matches = [], []
+    for line in lines:
+        kind, m = classify_line(line)
+        kinds.append(kind)
+        matches.append(m)
+    return GimpleParser.match_function(func_name, lines, kinds, matches, json_entry)
+
 
 if __name__ == "__main__":
     c_file_path = './fft_test.c'
@@ -0,0 +1,172 @@
+import re
+
+# 하드웨어 루프 제어 (GPC 헤더 주석의 y[127] 형식)
+#   y[127][31]: loopen_1d, y[127][30]: loopen_2d
+#   y[127][15:0]: loopin_offset_1d, y[127][29:16]: loopin_offset_2d (연산 상태 체인 안의 워드 위치 = 상태 번호 * 128 + 레지스터)
+#   y[125]: 1-D 반복 횟수, y[124]: 2-D 반복 횟수 (y[126]은 복귀 주소)
+HW_CONTROL_REG = 127
+HW_COUNT_1D_REG = 125
+HW_COUNT_2D_REG = 124
+LOOPEN_1D = 1 << 31
+LOOPEN_2D = 1 << 30
+LOOPIN_1D_MASK = 0xFFFF
+LOOPIN_2D_MASK = 0x3FFF
+LOOPIN_2D_SHIFT = 16
+MAX_TRIP_COUNT = 0xFFFFFFFF
+
+ASSIGN_LINE_RE = re.compile(r'(\w+) = (.+);$')
+CONST_LINE_RE = re.compile(r'(\w+) = (-?\d+);$')
+STEP_RE = re.compile(r'(\w+) = (\w+) ([+-]) (-?\d+)$')
+BOUND_RE = re.compile(r'(-?\w+) (<=|>=|==|!=|<|>) (-?\w+)$')
+INT_RE = re.compile(r'-?\d+$')
+SWAPPED_OPS = {"<": ">", ">": "<", "<=": ">=", ">=": "<=", "!=": "!=", "==": "=="}
+
+
+def trip_count(start, op, bound, step):
+    # 'for (v = start; v op bound; v += step)'의 반복 횟수, 끝나지 않거나 셀 수 없으면 None
+    if step == 0:
+        return None
+    if op in ("<", "<=") and step > 0:
+        span = bound - start + (1 if op == "<=" else 0)
+        return max(0, -(-span // step))
+    if op in (">", ">=") and step < 0:
+        span = start - bound + (1 if op == ">=" else 0)
+        return max(0, -(-span // -step))
+    if op == "!=":
+        distance = bound - start
+        if distance % step == 0 and distance // step >= 0:
+            return distance // step
+    return None
+
+
+def function_constants(lines, init=None):
+    # 함수 안에서 한 번만, 정수 상수로만 대입되는 변수 {이름: 값} (루프 안에서 바뀌지 않는 상한 판정용)
+    # 본문에서 대입하지 않는 변수(매개변수 등)는 initializations의 값을 그대로 씀
+    assigned = {}
+    for pos in range(len(lines)):
+        m = ASSIGN_LINE_RE.match(lines[pos])
+        if m:
+            assigned.setdefault(m.group(1), []).append(m.group(2))
+    constants = {}
+    for name, values in assigned.items():
+        if len(values) == 1 and INT_RE.match(values[0]):
+            constants[name] = int(values[0])
+    for name, value in (init or {}).items():
+        if name not in assigned and INT_RE.match(str(value)):
+            constants[name] = int(value)
+    return constants
+
+
+def start_value(lines, body_start, var):
+    # 루프 본문 앞(goto/레이블 직전)에서 루프 변수에 대입한 정수 상수, 찾지 못하면 None
+    # 조건 분기나 다른 레이블을 만나면 다른 흐름이 합쳐질 수 있으므로 멈춤
+    pos = body_start - 1
+    while pos >= 0:
+        line = lines[pos]
+        if line.startswith("goto "):
+            pos -= 1
+            continue
+        if line.startswith("if (") or line.endswith(">:"):
+            return None
+        m = ASSIGN_LINE_RE.match(line)
+        if m and m.group(1) == var:
+            c = CONST_LINE_RE.match(line)
+            return int(c.group(2)) if c else None
+        pos -= 1
+    return None
+
+
+def operand_value(token, constants):
+    if INT_RE.match(token):
+        return int(token)
+    return constants.get(token)
+
+
+def early_exit_loops(lines, loops):
+    # break(루프 밖으로 가는 goto)나 return이 있는 루프의 for_loops 위치 집합
+    # 루프 범위(첫 본문 구간 시작 ~ 마지막 구간 끝)가 그 라인을 감싸는 가장 안쪽 루프에 속한 것으로 봄
+    spans = [(blk["body"][0][0], blk["body"][-1][1]) if blk.get("body") else None for blk in loops]
+    exits = [pos for pos, i in lines.jumps.items() if lines.table[i] == "break;"]
+    exits += [pos for pos in range(len(lines)) if lines[pos].startswith("return")]
+    result = set()
+    for pos in exits:
+        inside = [k for k, span in enumerate(spans) if span and span[0] <= pos < span[1]]
+        if inside:
+            result.add(max(inside, key=lambda k: loops[k].get("depth", 1)))
+    return result
+
+
+def loop_trip_counts(func, lines):
+    # for_loops마다 반복 횟수 (시작 값, 조건, 증감식이 모두 상수로 정해지는 루프만, 나머지는 None)
+    # lines: FunctionLines (src/linetable.py)
+    loops = func.get("for_loops", []) or []
+    constants = function_constants(lines, func.get("initializations"))
+    exits = early_exit_loops(lines, loops)
+    trips = []
+    for k, blk in enumerate(loops):
+        trips.append(None if k in exits else single_trip_count(blk, lines, constants))
+    return trips
+
+
+def single_trip_count(blk, lines, constants):
+    var = blk.get("variable")
+    bound = BOUND_RE.match((blk.get("condition") or "").strip())
+    step = STEP_RE.match((blk.get("increment") or "").strip())
+    if not bound or not step or not blk.get("body"):
+        return None
+    lhs, op, rhs = bound.groups()
+    if rhs == var and lhs != var:
+        lhs, op, rhs = rhs, SWAPPED_OPS[op], lhs
+    target, source, sign, amount = step.groups()
+    if lhs != var or target != var or source != var:
+        return None
+    # 본문에서 루프 변수를 바꾸는 문장은 증감식 하나뿐이어야 함
+    body = lines.body(blk)
+    if sum(1 for line in body if line.startswith(f"{var} = ")) != 1:
+        return None
+    limit = operand_value(rhs, constants)
+    start = start_value(lines, blk["body"][0][0], var)
+    if limit is None or start is None:
+        return None
+    count = trip_count(start, op, limit, int(amount) if sign == "+" else -int(amount))
+    if not count or count > MAX_TRIP_COUNT:
+        return None
+    return count
+
+
+def plan_hardware_loops(func, lines):
+    # 하드웨어 루프 엔진에 올릴 루프 고르기: 반복 횟수가 정해진 가장 안쪽 루프를 1-D로,
+    # 그 루프만 품고 있고 반복 횟수가 정해진 바깥 루프가 있으면 2-D로 배정
+    # 반환값: {"1d": for_loops 위치, "2d": 위치 또는 None, "trips": {위치: 반복 횟수}} 또는 None
+    loops = func.get("for_loops", []) or []
+    trips = loop_trip_counts(func, lines)
+    children = {}
+    for k, blk in enumerate(loops):
+        if blk.get("parent") is not None:
+            children.setdefault(blk["parent"], []).append(k)
+
+    def outer_of(k):
+        parent = loops[k].get("parent")
+        if parent is not None and trips[parent] is not None and len(children.get(parent, [])) == 1:
+            return parent
+        return None
+
+    leaves = [k for k in range(len(loops)) if trips[k] is not None and k not in children]
+    if not leaves:
+        return None
+    inner = max(leaves, key=lambda k: (outer_of(k) is not None, loops[k].get("depth", 1), -k))
+    outer = outer_of(inner)
+    plan = {"1d": inner, "2d": outer, "trips": {inner: trips[inner]}}
+    if outer is not None:
+        plan["trips"][outer] = trips[outer]
+    return plan
+
+
+def control_word(loopin_1d, loopin_2d=None):
+    # y[127] 값: loopen 비트와 loopin 오프셋
+    if loopin_1d > LOOPIN_1D_MASK or (loopin_2d is not None and loopin_2d > LOOPIN_2D_MASK):
+        raise Exception(f"하드웨어 루프 loopin 오프셋이 너무 큽니다: 1D={loopin_1d}, 2D={loopin_2d}")
+    word = LOOPEN_1D | loopin_1d
+    if loopin_2d is not None:
+        word |= LOOPEN_2D | (loopin_2d << LOOPIN_2D_SHIFT)
+    return word
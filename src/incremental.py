@@ -0,0 +1,252 @@
+import os
+import re
+import json
+import hashlib
+
+from src.c_parse_json import CParser
+from src.gimpleToJson import GimpleParser
+from src.makeEflow import MIFGenerator
+from src.linetable import LineTable
+from src.data_segment import DataSegment, write_data_segment
+from src.allocator import GPCAllocator
+from src.pipeline import COMPILER_VERSION, run_stages
+from src.preprocess import preprocess
+from src.toolchain import gcc_version
+
+# 출력 .mif 옆에 저장되는 함수별 지문 파일 (<출력>.fp.json)
+FINGERPRINT_SUFFIX = ".fp.json"
+
+# .mif 레지스터 라인의 주소: '--<주소> :<값>; -- r...'
+MIF_ADDR_RE = re.compile(r'--(\d+)\s*:')
+# GIMPLE 라벨 번호는 파일 전체에서 이어지므로 앞쪽 함수가 바뀌면 뒤쪽 함수의 번호도 밀림
+GIMPLE_LABEL_RE = re.compile(r'<D\.\d+>')
+
+
+def fingerprint_path(output_mif_path):
+    return output_mif_path + FINGERPRINT_SUFFIX
+
+
+def text_digest(text):
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def file_digest(path):
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def gimple_digest(lines):
+    # 함수 블록의 GIMPLE 지문. 라벨 번호는 블록 안에서 등장 순서대로 다시 매겨 다른 함수의 변경에 영향받지 않게 함
+    labels = {}
+
+    def renumber(m):
+        return labels.setdefault(m.group(0), f"<L{len(labels)}>")
+
+    h = hashlib.sha256()
+    for line in lines:
+        h.update(GIMPLE_LABEL_RE.sub(renumber, line).encode("utf-8"))
+        h.update(b"\n")
+    return h.hexdigest()
+
+
+def toolchain_fingerprint():
+    # 변환기/GCC 버전이 바뀌면 모든 지문을 무효화
+    return {"version": COMPILER_VERSION, "gcc": text_digest(gcc_version())}
+
+
+def load_fingerprints(path):
+    try:
+        with open(path, 'r', encoding='UTF8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def write_atomic(path, text):
+    # 같은 폴더의 임시 파일에 쓴 뒤 교체하여 중단되더라도 이전 파일이 남도록 함
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(tmp, path)
+
+
+def patch_mif_lines(lines, blocks, regs=MIFGenerator.REGS):
+    # .mif 라인 목록에서 blocks({gpc: 레지스터 라인})에 해당하는 GPC 구간만 교체
+    # 교체할 GPC 구간을 찾지 못하면 None
+    patched = []
+    found = set()
+    for line in lines:
+        m = MIF_ADDR_RE.match(line)
+        gpc = int(m.group(1)) // regs if m else None
+        if gpc not in blocks:
+            patched.append(line)
+        elif gpc not in found:
+            found.add(gpc)
+            patched.extend(blocks[gpc])
+    if found != set(blocks):
+        return None
+    return patched
+
+
+def state_slots(generator, name, slots):
+    # [[역할, 물리 GPC], ...] (init, init.1, ..., action, ... 순서, 빌드되지 않은 상태는 제외)
+    return [[role, slots[gpc]] for gpc, role in generator.function_states(name) if gpc in slots]
+
+
+def full_build(c_parser, unit, input_c_file, output_mif_path, build_dir, debug, options):
+    # 전체 변환 후 함수별 지문(C 본문, GIMPLE 블록)과 GPC 배치를 기록
+    gimple_hashes = {}
+
+    def record(func_name, lines):
+        gimple_hashes.setdefault(func_name, gimple_digest(lines))
+        return True
+
+    generator, lines, _ = run_stages(c_file_path=input_c_file, debug=debug, build_dir=build_dir, select=record,
+                                     options=options, unit=unit)
+    generator.output_mif_path = output_mif_path
+    generator.save_mif_file(lines)
+
+    names = c_parser.main_function_names()
+    allocator = generator.allocator
+    fingerprints = dict(toolchain_fingerprint())
+    fingerprints.update({
+        "options": options,
+        "mif": file_digest(output_mif_path),
+        "names": names,
+        # 함수별 상태(역할, 물리 GPC) 목록과 물리 GPC별 블록 해시 (블록 공유 여부 확인용)
+        "states": {name: state_slots(generator, name, allocator.placement) for name in generator.function_gpcs()},
+        "blocks": allocator.hashes,
+        "functions": {
+            name: {"c": text_digest(c_parser.function_source(name)), "gimple": gimple_hashes.get(name)}
+            for name in names
+        },
+    })
+    write_atomic(fingerprint_path(output_mif_path), json.dumps(fingerprints, indent=1, ensure_ascii=False))
+
+
+def update_block_hashes(generator, changed, states, hashes):
+    # 다시 만든 함수의 상태를 이전 빌드의 물리 GPC에 순서대로 대응시켜 {물리 GPC: 논리 GPC}로 반환
+    # 상태 구성(추가 상태 개수)이 달라졌거나, 다시 만든 블록이 다른 함수와 물리 GPC를 공유하고 있었거나
+    # 새로 공유할 수 있게 되면 전체 변환과 배치가 달라지므로 None (hashes는 물리 GPC별 블록 해시, 제자리에서 갱신)
+    users = {}
+    for entries in states.values():
+        for _, slot in entries:
+            users[slot] = users.get(slot, 0) + 1
+    built = {}
+    updated = {}
+    for name in changed:
+        new = [(gpc, role) for gpc, role in generator.function_states(name) if gpc in generator.mp.files]
+        if [role for _, role in new] != [role for role, _ in states[name]]:
+            return None
+        for (gpc, _), (_, slot) in zip(new, states[name]):
+            if users[slot] > 1:
+                return None
+            built[slot] = gpc
+            regs = generator.mp.files[gpc]
+            updated[slot] = GPCAllocator.block_hash(regs.words, regs.comments())
+    if len(set(updated.values())) != len(updated):
+        return None
+    unchanged = {h for slot, h in enumerate(hashes) if slot not in updated}
+    if unchanged & set(updated.values()):
+        return None
+    for slot, h in updated.items():
+        hashes[slot] = h
+    return built
+
+
+def rebuild_changed(c_parser, unit, input_c_file, output_mif_path, old, debug):
+    # 지문이 바뀐 함수만 다시 파싱/매칭하여 해당 GPC 구간을 기존 .mif에 덮어씀
+    # GPC 배치가 달라지는 변경이면 False를 반환하여 전체 변환으로 넘김
+    names = old["names"]
+    c_hashes = {name: text_digest(c_parser.function_source(name)) for name in names}
+    gimple_hashes = {}
+    parsed, matched = [], []
+    table = LineTable()
+
+    gim_parser = GimpleParser(input_c_file, json_data={}, c_text=c_parser.c_text, preprocessed=unit.text)
+    try:
+        for func_match, lines, kinds, matches in gim_parser.iter_gimple_blocks(gim_parser.gimple_file):
+            if func_match is None:
+                continue
+            func_name = func_match.group(1)
+            if func_name not in c_hashes or func_name in gimple_hashes:
+                continue
+            gimple_hashes[func_name] = gimple_digest(lines)
+            prev = old["functions"][func_name]
+            if prev["c"] == c_hashes[func_name] and prev["gimple"] == gimple_hashes[func_name]:
+                continue
+            if func_name not in old["states"]:
+                return False
+            func = c_parser.parse_indexed_function(func_name)
+            if func is None:
+                return False
+            parsed.append(func)
+            json_index = GimpleParser.index_json_functions([func])
+            matched.append(table.intern_function(
+                GimpleParser.match_function(func_name, lines, kinds, matches, json_index.get(func_name))))
+    finally:
+        gim_parser.cleanup()
+
+    # GIMPLE 블록이 생기거나 사라진 함수가 있으면 GPC 개수가 달라짐
+    if any((old["functions"][name]["gimple"] is None) != (name not in gimple_hashes) for name in names):
+        return False
+
+    changed = [func["function_name"] for func in matched]
+    for name in names:
+        old["functions"][name] = {"c": c_hashes[name], "gimple": gimple_hashes.get(name)}
+    if not changed:
+        print("변경된 함수가 없습니다.")
+        write_atomic(fingerprint_path(output_mif_path), json.dumps(old, indent=1, ensure_ascii=False))
+        return True
+
+    print(f"변경된 함수: {', '.join(changed)}")
+    generator = MIFGenerator(debug=debug, parsed_data={"functions": parsed}, gimple_data={"line_table": table.lines, "functions": matched},
+                             depth=(old["options"] or {}).get("depth"),
+                             hwloop=(old["options"] or {}).get("hwloop", True))
+    generator.init_data()
+    generator.build_functions(changed)
+    built = update_block_hashes(generator, changed, old["states"], old["blocks"])
+    if built is None:
+        return False
+    blocks = {slot: generator.lines_for_gpc(gpc, slot) for slot, gpc in built.items()}
+
+    with open(output_mif_path, 'r', encoding='utf-8') as f:
+        mif_lines = f.read().split("\n")
+    patched = patch_mif_lines(mif_lines, blocks)
+    if patched is None:
+        return False
+    write_atomic(output_mif_path, "\n".join(patched))
+    old["mif"] = file_digest(output_mif_path)
+    write_atomic(fingerprint_path(output_mif_path), json.dumps(old, indent=1, ensure_ascii=False))
+    return True
+
+
+def compile_incremental(input_c_file, output_mif_path, build_dir="build", debug=False, options=None):
+    # 이전 빌드의 지문과 비교하여 바뀐 함수의 GPC 상태(초기화/연산과 추가 상태) 구간만 다시 생성
+    # 지문이나 출력이 없거나, 버전/GPC 배치가 바뀌었거나, .mif가 외부에서 수정된 경우 전체 변환
+    output_dir = os.path.dirname(output_mif_path)
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+
+    print(f"🚀 변환 시작: {input_c_file}")
+    # 함수 지문과 파싱은 전체 변환과 같은 전처리 결과(주 소스)로 계산
+    unit = preprocess(CParser(input_c_file).c_text, input_c_file)
+    c_parser = CParser(input_c_file, c_text=unit.source, macros=unit.macros)
+    old = load_fingerprints(fingerprint_path(output_mif_path))
+    reusable = (
+        old is not None
+        and os.path.exists(output_mif_path)
+        and all(old.get(k) == v for k, v in toolchain_fingerprint().items())
+        and old.get("options") == options
+        and old.get("mif") == file_digest(output_mif_path)
+        and old.get("names") == c_parser.main_function_names()
+    )
+    if reusable and rebuild_changed(c_parser, unit, input_c_file, output_mif_path, old, debug):
+        print(f"✅ MIF 증분 갱신 완료 -> {output_mif_path}")
+    else:
+        print("전체 변환을 수행합니다.")
+        full_build(c_parser, unit, input_c_file, output_mif_path, build_dir, debug, options)
+        print(f"✅ MIF 생성 완료 -> {output_mif_path}")
+    # 데이터 메모리는 전역 배열만으로 정해지므로 항상 다시 씀
+    if (options or {}).get("data_segment"):
+        write_data_segment(DataSegment.from_globals(c_parser.parse_global_variables()), output_mif_path)
@@ -0,0 +1,145 @@
+import os
+import mmap
+import pickle
+import struct
+from collections.abc import Mapping, Sequence
+
+# 매칭된 GIMPLE(matched_gimple.json과 같은 내용)의 이진 중간 형식
+# [MAGIC 8바이트][헤더 길이 u64][헤더 pickle][함수 레코드 pickle ...]
+# 헤더: {"global_variables": ..., "line_table": [...], "index": [(함수 이름, 레코드 시작 위치, 길이), ...]}
+# (위치는 레코드 영역 기준, 라인 표는 모든 함수가 함께 쓰므로 헤더에 둠)
+# 함수 레코드는 각각 따로 pickle(프로토콜 5)하므로 필요한 함수만 풀어서 씀
+IR_MAGIC = b"EOPPPIR1"
+IR_HEADER = struct.Struct("<8sQ")
+IR_SUFFIX = ".eir"
+IR_FILE = "matched_gimple" + IR_SUFFIX
+PICKLE_PROTOCOL = 5
+
+
+def encode_intermediate(matched):
+    # parse_and_match_gimple 결과 딕셔너리를 이진 중간 형식 바이트열로 변환
+    records = [pickle.dumps(func, protocol=PICKLE_PROTOCOL) for func in matched.get("functions", [])]
+    index = []
+    offset = 0
+    for func, record in zip(matched.get("functions", []), records):
+        index.append((func["function_name"], offset, len(record)))
+        offset += len(record)
+    header = pickle.dumps({"global_variables": matched.get("global_variables", {}),
+                           "line_table": matched.get("line_table", []), "index": index}, protocol=PICKLE_PROTOCOL)
+    return b"".join([IR_HEADER.pack(IR_MAGIC, len(header)), header, *records])
+
+
+def write_intermediate(path, matched):
+    # 임시 파일에 쓴 뒤 교체 (읽는 쪽이 mmap 중이어도 기존 파일 내용은 그대로 남음)
+    data = encode_intermediate(matched)
+    tmp = f"{path}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+    return len(data)
+
+
+class FunctionTable(Sequence):
+    # 함수 레코드 목록을 리스트처럼 보여 주되, 접근한 레코드만 풀어서 보관
+    def __init__(self, ir):
+        self.ir = ir
+        self.decoded = {}
+
+    def __len__(self):
+        return len(self.ir.index)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[k] for k in range(*i.indices(len(self)))]
+        if i < 0:
+            i += len(self)
+        if i not in self.decoded:
+            self.decoded[i] = self.ir.decode(i)
+        return self.decoded[i]
+
+    def by_name(self):
+        # {함수 이름: 레코드} 매핑 (같은 이름이 여럿이면 처음 것, 레코드는 꺼낼 때 풀어 씀)
+        return FunctionsByName(self)
+
+
+class FunctionsByName(Mapping):
+    def __init__(self, table):
+        self.table = table
+        self.positions = {}
+        for i, (name, _, _) in enumerate(table.ir.index):
+            self.positions.setdefault(name, i)
+
+    def __getitem__(self, name):
+        return self.table[self.positions[name]]
+
+    def __iter__(self):
+        return iter(self.positions)
+
+    def __len__(self):
+        return len(self.positions)
+
+
+class Intermediate:
+    # 이진 중간 형식 읽기: 헤더(전역 변수, 라인 표, 함수 색인)만 먼저 읽고, 함수 레코드는 요청할 때 풀어 씀
+    # buffer: bytes 또는 mmap. MIFGenerator가 딕셔너리처럼 쓸 수 있도록 get("functions")은 FunctionTable을 반환
+    def __init__(self, buffer, source="<memory>"):
+        self.buffer = buffer
+        self.view = memoryview(buffer)
+        if len(buffer) < IR_HEADER.size:
+            raise Exception(f"이진 중간 파일이 너무 짧습니다: {source}")
+        magic, header_len = IR_HEADER.unpack_from(self.view, 0)
+        if magic != IR_MAGIC:
+            raise Exception(f"이진 중간 파일 형식이 아닙니다: {source}")
+        start = IR_HEADER.size
+        header = pickle.loads(self.view[start:start + header_len])
+        self.global_variables = header["global_variables"]
+        self.line_table = header["line_table"]
+        self.index = header["index"]
+        self.records_start = start + header_len
+        self.functions = FunctionTable(self)
+
+    @property
+    def names(self):
+        return [name for name, _, _ in self.index]
+
+    def decode(self, i):
+        _, offset, length = self.index[i]
+        start = self.records_start + offset
+        return pickle.loads(self.view[start:start + length])
+
+    def function(self, name):
+        return self.functions.by_name()[name]
+
+    def get(self, key, default=None):
+        if key == "functions":
+            return self.functions
+        if key == "global_variables":
+            return self.global_variables
+        if key == "line_table":
+            return self.line_table
+        return default
+
+    def to_dict(self):
+        # 전체를 풀어서 parse_and_match_gimple 결과와 같은 딕셔너리로 반환 (디버그 JSON 출력용)
+        return {"global_variables": self.global_variables, "line_table": self.line_table, "functions": list(self.functions)}
+
+    def close(self):
+        self.view.release()
+        if isinstance(self.buffer, mmap.mmap):
+            self.buffer.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def open_intermediate(path):
+    # 파일을 메모리 매핑하여 Intermediate로 반환 (파일 전체를 읽지 않음)
+    with open(path, "rb") as f:
+        try:
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            raise Exception(f"이진 중간 파일이 비어 있습니다: {path}")
+    return Intermediate(buffer, path)
@@ -0,0 +1,93 @@
+from array import array
+from collections.abc import Sequence
+
+# 매칭된 함수 레코드는 라인 텍스트를 복사하지 않고 번역 단위 하나의 라인 표를 번호로 가리킴
+#   "lines": 함수 블록의 모든 라인 (라인 표 번호, array('I'))
+#   "skip":  본문 보기에서 빠지는 라인 위치 (레이블, 분기, 임시 변수 선언, 중괄호/주석, array('I'))
+#   "jumps": if 본문에서 break;/continue;로 보이는 goto의 [위치, 라인 표 번호]
+#   for_loops/if_stmts의 "body": 함수 라인 위치의 [시작, 끝) 구간 목록
+# 루프가 아무리 깊게 중첩되어도 레코드 크기는 GIMPLE 라인 수와 블록 수에 비례
+
+
+class LineTable:
+    # 번역 단위 하나의 GIMPLE 라인 표 (같은 텍스트는 한 번만 저장)
+    def __init__(self, lines=None):
+        self.lines = list(lines or [])
+        self.ids = {line: i for i, line in enumerate(self.lines)}
+
+    def intern(self, line):
+        i = self.ids.get(line)
+        if i is None:
+            i = self.ids[line] = len(self.lines)
+            self.lines.append(line)
+        return i
+
+    def intern_function(self, func):
+        # match_function 결과의 라인 텍스트("lines", "jumps")를 라인 표 번호로 바꿈 (레코드를 직접 고쳐서 반환)
+        # 번호는 라인당 4바이트 배열로 두고 원래 텍스트 목록은 버림
+        func["lines"] = array("I", map(self.intern, func["lines"]))
+        func["skip"] = array("I", func.get("skip", []))
+        func["jumps"] = [[pos, self.intern(text)] for pos, text in func["jumps"]]
+        return func
+
+
+def function_table(table, func):
+    # 함수 하나가 쓰는 라인만 담은 {번호: 텍스트} (작업자 프로세스에 라인 표 전체를 보내지 않기 위함)
+    used = {i: table[i] for i in func.get("lines", [])}
+    for _, i in func.get("jumps", []):
+        used[i] = table[i]
+    return used
+
+
+class FunctionLines:
+    # 함수 레코드 하나의 라인 보기 (skip/jumps 색인은 함수마다 한 번만 만듦)
+    def __init__(self, table, func):
+        self.table = table
+        self.ids = func.get("lines", [])
+        self.skip = set(func.get("skip", []))
+        self.jumps = dict(func.get("jumps", []))
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __getitem__(self, pos):
+        return self.table[self.ids[pos]]
+
+    def body(self, blk, with_jumps=False):
+        # 루프/if 레코드의 본문 라인 (with_jumps: if 본문처럼 break;/continue;를 포함)
+        return LineView(self, blk.get("body", []), with_jumps)
+
+
+class LineView(Sequence):
+    # 본문 구간 위의 지연 보기: 처음 접근할 때 라인 번호 목록을 만들고 텍스트는 라인 표에서 꺼냄
+    def __init__(self, lines, ranges, with_jumps=False):
+        self.lines = lines
+        self.ranges = ranges
+        self.with_jumps = with_jumps
+        self._ids = None
+
+    def line_ids(self):
+        if self._ids is None:
+            ids = []
+            lines = self.lines
+            for start, end in self.ranges:
+                for pos in range(start, end):
+                    if pos in lines.skip:
+                        if self.with_jumps and pos in lines.jumps:
+                            ids.append(lines.jumps[pos])
+                        continue
+                    ids.append(lines.ids[pos])
+            self._ids = ids
+        return self._ids
+
+    def __len__(self):
+        return len(self.line_ids())
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self.lines.table[k] for k in self.line_ids()[i]]
+        return self.lines.table[self.line_ids()[i]]
+
+    def __iter__(self):
+        table = self.lines.table
+        return (table[k] for k in self.line_ids())
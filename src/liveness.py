@@ -0,0 +1,67 @@
+import re
+import heapq
+
+# GIMPLE 임시 변수 (구버전 GCC: D.1234, 신버전 GCC: _12)
+TEMP_RE = re.compile(r'^(?:D\.\d+|_\d+)$')
+# 본문 안에서 선언된 지역 변수 ('double angle;')
+LOCAL_DECL_RE = re.compile(r'^(?:int|long long int|float|double)\s+(\w+)\s*;$')
+NAME_RE = re.compile(r'D\.\d+|[A-Za-z_]\w*')
+LABEL_LINE_RE = re.compile(r'^<D\.\d+>:$')
+
+# 상태가 끝날 때까지 유지되는 값의 수명 끝
+LIVE_TO_END = float("inf")
+
+
+def is_temporary(name):
+    return TEMP_RE.match(name) is not None
+
+
+def names_in(text):
+    return set(NAME_RE.findall(text))
+
+
+def local_live_ranges(statements, candidates, live_out=()):
+    # statements: [(정의하는 이름 또는 None, 읽는 이름 집합)] (GPC 상태 안에서 실행되는 순서)
+    # candidates: 재사용 대상 이름 (임시 변수, 본문에서 선언된 지역 변수)
+    # live_out: 상태가 끝난 뒤에도 필요한 이름 (조건식 등)
+    # 반환: {이름: (첫 정의 위치, 마지막 정의/사용 위치)}, 정의보다 먼저 읽히는(루프를 건너 전달되는) 값은 제외
+    first_def, last_seen, exposed = {}, {}, set()
+    for pos, (lhs, uses) in enumerate(statements):
+        for name in uses:
+            if name not in first_def:
+                exposed.add(name)
+            last_seen[name] = pos
+        if lhs is not None:
+            first_def.setdefault(lhs, pos)
+            last_seen[lhs] = pos
+    ranges = {}
+    for name, start in first_def.items():
+        if name in candidates and name not in exposed and name not in live_out:
+            ranges[name] = (start, last_seen[name])
+    return ranges
+
+
+class LinearScan:
+    # GPC 상태 하나의 레지스터 배정: 수명이 끝난 값의 레지스터를 다음 값이 재사용
+    # reserved: 배정하지 않는 레지스터(조건 레지스터 등), taken: 상태 시작부터 끝까지 점유된 레지스터
+    def __init__(self, size, reserved=(), taken=()):
+        self.size = size
+        self.reserved = set(reserved)
+        self.busy = set(taken)
+        self.expiry = []  # [(수명 끝, 레지스터)]
+
+    def expire(self, pos):
+        # pos 이전에 수명이 끝난 값의 레지스터를 반납
+        while self.expiry and self.expiry[0][0] < pos:
+            _, reg = heapq.heappop(self.expiry)
+            self.busy.discard(reg)
+
+    def alloc(self, end=LIVE_TO_END):
+        # 비어 있는 가장 낮은 번호의 레지스터, 남은 레지스터가 없으면 None
+        for reg in range(self.size):
+            if reg not in self.busy and reg not in self.reserved:
+                self.busy.add(reg)
+                if end != LIVE_TO_END:
+                    heapq.heappush(self.expiry, (end, reg))
+                return reg
+        return None
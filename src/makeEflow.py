@@ -1,9 +1,34 @@
+import io
 import json
 import re
+import contextlib
+from array import array
+
+from src.memory_image import hex_words
+from src.intermediate import IR_SUFFIX, open_intermediate
+from src.linetable import FunctionLines, function_table
+from src.hwloop import (HW_CONTROL_REG, HW_COUNT_1D_REG, HW_COUNT_2D_REG, control_word,
+                        plan_hardware_loops)
+from src.allocator import DEFAULT_DEPTH, GPC_REGS, GPCAllocator
+from src.expr_dag import ARRAY_STORE_RE, ExprDAG
+from src.profiler import count, gauge, span
+from src.liveness import LIVE_TO_END, LOCAL_DECL_RE, LABEL_LINE_RE, LinearScan, is_temporary, local_live_ranges, names_in
+
+
+# 대입문/조건문/이름 판별 정규식 (모듈 로드 시 한 번만 컴파일)
+ASSIGNMENT_RE = re.compile(r"(\w+)\s*=\s*(.+);")
+CONDITION_RE = re.compile(r"(\w+)\s*[<>=!]+\s*(.+)")
+CONDITION_RHS_RE = re.compile(r"\w+\s*[<>=!]+\s*(\w+)")
+OLD_TEMP_RE = re.compile(r"D\.\d+")
+H_CONSTANT_RE = re.compile(r"h\d+")
+CONST_INCREMENT_RE = re.compile(r"\w+\s*=\s*\w+\s*\+\s*(\d+)")
+# .mif 주석의 식 설명/레지스터 조합 최대 길이 (넘으면 '...'로 줄임, 식 DAG를 펼친 텍스트가 끝없이 길어지지 않도록)
+DESC_LIMIT = 160
 
 
 class MIFGenerator:
-    REGS = 128
+    REGS = GPC_REGS
+    DEPTH = DEFAULT_DEPTH
 
     def __init__(
         self,
@@ -11,15 +36,37 @@ class MIFGenerator:
         parsed_json_path: str = "parsed_.json",
         output_mif_path: str = "test.mif",
         debug: bool = False,
+        parsed_data: dict = None,
+        gimple_data: dict = None,
+        depth: int = None,
+        pool=None,
+        hwloop: bool = True,
     ):
         self.gimple_json_path = gimple_json_path
         self.parsed_json_path = parsed_json_path
         self.output_mif_path = output_mif_path
         self.debug = debug
-
-        self.mp = self.RegMap()
+        # 앞 단계 결과 딕셔너리를 직접 받으면 JSON 파일을 읽지 않음
+        self.parsed_data = parsed_data
+        self.gimple_data = gimple_data
+        # 메모리 깊이(워드 수): GPC 배치 가능 개수 = depth // REGS
+        self.depth = depth or self.DEPTH
+        # 함수별 상태 빌드를 나눠 맡길 프로세스 풀 (None이면 직렬 빌드, 출력은 어느 쪽이든 같음)
+        self.pool = pool
+        # 반복 횟수가 정해진 루프를 하드웨어 루프(loopen_1d/2d)로 돌릴지 (False면 모든 루프를 r7 비교/분기로 처리)
+        self.hwloop = hwloop
+        self.allocator = None
+        # 전역 배열의 데이터 메모리 이미지 (생성 옵션 data_segment일 때 run_stages가 채움, src/data_segment.py)
+        self.data_segment = None
+        # 레지스터가 128개를 넘는 상태를 이어 받는 추가 논리 GPC: {함수 상태의 논리 GPC: [추가 GPC, ...]}
+        self.spills = {}
+        self.next_state = 0
+
+        self.mp = self.RegMap(self.REGS)
         self.funcs_parsed = []
         self.funcs_gimple = []
+        # 매칭 결과의 번역 단위 라인 표 (함수/루프/if 레코드는 이 표의 번호와 라인 위치 구간을 가리킴)
+        self.line_table = []
         self.global_vars = {}
 
     # --------------------------------------------------------------------- #
@@ -29,14 +76,18 @@ class MIFGenerator:
         if self.debug:
             print(*args, **kwargs)
 
+    @staticmethod
+    def to_word(val):
+        # 32비트 워드 값으로 변환 (정수로 해석할 수 없으면 0)
+        try:
+            return int(val) & 0xFFFFFFFF
+        except (TypeError, ValueError):
+            return 0
+
     @staticmethod
     def to_hex32(val):
         # 32비트 헥사 문자열로 변환
-        try:
-            intval = int(val)
-        except Exception:
-            intval = 0
-        return f"{(intval & 0xFFFFFFFF):08x}"
+        return f"{MIFGenerator.to_word(val):08x}"
 
     @staticmethod
     def parse_assignment(line: str):
@@ -44,35 +95,34 @@ class MIFGenerator:
         line = line.strip()
         if not line.endswith(";"):
             line += ";"
-        m = re.match(r"(\w+)\s*=\s*(.+);", line)
+        m = ASSIGNMENT_RE.match(line)
         return m.groups() if m else (None, None)
 
     @staticmethod
     def parse_condition_parts(cond: str):
         # 조건문 파싱 'a < b' 형태의 조건문에서 왼쪽과 오른쪽을 분리
-        m = re.match(r"(\w+)\s*[<>=!]+\s*(.+)", cond)
+        m = CONDITION_RE.match(cond)
         return m.groups() if m else (None, None)
 
     @staticmethod
     def is_temporary_var(var_name):
         # 임시 변수인지 확인 (D.숫자 형태)
-        return re.match(r"^D\.\d+$", var_name) is not None
+        return OLD_TEMP_RE.fullmatch(var_name) is not None
 
     @staticmethod
     def is_h_constant(var_name):
         # h 상수인지 확인 (h숫자 형태)
-        return re.match(r"^h\d+$", var_name) is not None
+        return H_CONSTANT_RE.fullmatch(var_name) is not None
 
     @staticmethod
     def constants_in_body(for_loops, if_stmts):
         # 본문 내 상수 추출
-        pat = re.compile(r"\w+\s*=\s*\w+\s*\+\s*(\d+)")
         consts = set()
         if_list = if_stmts if isinstance(if_stmts, list) else []
         for blk in for_loops + if_list:
             inc = blk.get("increment", "")
             if inc:
-                m = pat.fullmatch(inc.replace(" ", ""))
+                m = CONST_INCREMENT_RE.fullmatch(inc.replace(" ", ""))
                 if m:
                     consts.add(int(m.group(1)))
         return consts
@@ -82,75 +132,17 @@ class MIFGenerator:
         # 조건문에서 RHS(오른쪽) 변수 추출
         rhs = set()
         for c in conds:
-            m = re.match(r"\w+\s*[<>=!]+\s*(\w+)", c)
-            if m and not re.match(r"D\.\d+", m.group(1)):
+            m = CONDITION_RHS_RE.match(c)
+            if m and not OLD_TEMP_RE.match(m.group(1)):
                 rhs.add(m.group(1))
         return rhs
 
-    @staticmethod
-    def build_var_expr_map(func):
-        # mif c코드 부분 식 변형 
-        var_map = {}
-        for blk in func.get("for_loops", []):
-            for line in blk.get("body", []):
-                lhs, rhs = MIFGenerator.parse_assignment(line)
-                if lhs and rhs and ("+" in rhs or "-" in rhs):
-                    if not MIFGenerator.is_temporary_var(lhs):
-                        var_map[lhs.strip()] = rhs.strip().rstrip(";")
-        for blk in func.get("for_loops", []) + func.get("if_stmts", []):
-            inc = blk.get("increment")
-            if inc:
-                lhs, rhs = MIFGenerator.parse_assignment(inc)
-                if lhs and rhs and ("+" in rhs or "-" in rhs):
-                    if not MIFGenerator.is_temporary_var(lhs):
-                        var_map[lhs.strip()] = rhs.strip().rstrip(";")
-        return var_map
-
-    @staticmethod
-    def one_level_substitute(var, var_map):
-        # 한 단계 변수 치환
-        return var_map.get(var, var)
-
     @staticmethod
     def parenthesize_if_expr(expr):
         # 식에 덧셈/뺄셈이 포함되면 괄호로 감싸기
         expr = expr.strip()
         return f"({expr})" if ("+" in expr or "-" in expr) else expr
 
-    @staticmethod
-    def sum_vars_val(expr, current_vals, rhs_neg):
-        # 식 내 변수 값 합산
-        parts = [p.strip() for p in expr.split("+")]
-        total = 0
-        for part in parts:
-            if part.lstrip("-").isdigit():
-                total += int(part)
-            else:
-                val = current_vals.get(part, 0)
-                total += -val if part in rhs_neg else val
-        return total
-
-    @staticmethod
-    def evaluate_rhs_val(rhs, current_vals, rhs_neg):
-        # RHS 식의 값을 평가
-        rhs = rhs.strip()
-        if rhs.lstrip("-").isdigit():
-            return int(rhs)
-        m_var = re.match(r"^(\w+)$", rhs)
-        if m_var:
-            val = current_vals.get(m_var.group(1), 0)
-            return -val if m_var.group(1) in rhs_neg else val
-        m_plus = re.match(r"^(\w+)\s*\+\s*(\w+)$", rhs)
-        if m_plus:
-            v1 = current_vals.get(m_plus.group(1), 0)
-            v2 = current_vals.get(m_plus.group(2), 0)
-            if m_plus.group(1) in rhs_neg:
-                v1 = -v1
-            if m_plus.group(2) in rhs_neg:
-                v2 = -v2
-            return v1 + v2
-        return 0
-
     @staticmethod
     def convert_tmp_var_name(var_name: str, mode=None):
         # 임시 변수 이름 변환 D.숫자 -> t숫자 또는 _숫자
@@ -167,20 +159,7 @@ class MIFGenerator:
     @staticmethod
     def convert_rhs_tmp_vars(rhs: str):
         # RHS 식 내 임시 변수 변환
-        return re.sub(r"D\.(\d+)", lambda m: MIFGenerator.convert_tmp_var_name(m.group(0)), rhs)
-
-    @staticmethod
-    def construct_reg_sum(mp, gpc, expr):
-        # 식을 레지스터 조합으로 변환
-        parts = [p.strip() for p in expr.split("+")]
-        regs = []
-        for p in parts:
-            if p.lstrip("-").isdigit():
-                reg = mp.get_const(gpc, int(p)) or mp.get_const(0, int(p)) or "r0"
-            else:
-                reg = mp.get_var(gpc, p) or "r0"
-            regs.append(reg)
-        return "+".join(regs), regs
+        return OLD_TEMP_RE.sub(lambda m: MIFGenerator.convert_tmp_var_name(m.group(0)), rhs)
 
     @staticmethod
     def make_cmd_for_declare(var, val_str, regname):
@@ -193,7 +172,7 @@ class MIFGenerator:
         # 대입 명령어 생성 추가 필요
         parts = [p.strip() for p in rhs.split("+") if p.strip()]
         reg_l = mp.get_var(gpc, var_l)
-        if not reg_l:
+        if reg_l is None:
             return "ADD(000, 00080000)"
         if len(parts) == 1:
             p = parts[0]
@@ -206,34 +185,87 @@ class MIFGenerator:
     # --------------------------------------------------------------------- #
     # RegMap 클래스
     # --------------------------------------------------------------------- #
+    class RegInfo:
+        # 레지스터 하나의 설명용 필드 (주석 출력에만 사용)
+        __slots__ = ("var", "desc", "val", "combo", "ternary")
+
+        def __init__(self, var, desc, val, combo, ternary):
+            self.var = var
+            self.desc = desc
+            self.val = val
+            self.combo = combo
+            self.ternary = ternary
+
+    class RegFile:
+        # GPC 하나의 레지스터 파일: 레지스터 번호로 인덱싱되는 고정 크기 배열
+        __slots__ = ("words", "cmds", "info")
+
+        def __init__(self, size):
+            self.words = array("I", bytes(4 * size))  # 32비트 데이터 워드
+            self.cmds = [""] * size  # 명령어 코드
+            self.info = [None] * size  # RegInfo, 할당되지 않은 레지스터는 None
+
+        def comments(self):
+            # 레지스터마다 .mif 주석에 남는 내용 (GPC 공유 판정용 블록 해시에 포함)
+            return ["" if info is None else f"{cmd}\t{info.desc}\t{info.combo}\t{info.val}"
+                    for cmd, info in zip(self.cmds, self.info)]
+
     class RegMap:
-        def __init__(self):
-            self.table = {} # {gpc: {reg_name: (idx, var, desc, val, cmd, reg_combo, cond_ternary)}}
-            self.v2r = {} # {(gpc, var): reg_name}
-            self.c2r = {} # {(gpc, const): reg_name}
-
-        def add(self, gpc, idx, reg_name, var, desc, val, cmd, reg_combo="", cond_ternary=""):
-            self.table.setdefault(gpc, {})[reg_name] = (
-                idx,
-                var,
-                desc,
-                val,
-                cmd,
-                reg_combo,
-                cond_ternary,
-            )
+        # 레지스터는 정수 번호로 다루고, 이름("rN")은 출력할 때만 만듦
+        def __init__(self, size=128):
+            self.size = size
+            self.files = {}  # {gpc: RegFile}
+            self.v2r = {}  # {gpc: {var: reg}}
+            self.c2r = {}  # {gpc: {const: reg}}
+
+        def add(self, gpc, reg, var, desc, val, cmd, reg_combo="", cond_ternary=""):
+            # 레지스터 수를 넘는 번호는 .mif에 출력되지 않으므로 저장하지 않음
+            if reg >= self.size:
+                return
+            regs = self.files.get(gpc)
+            if regs is None:
+                regs = self.files[gpc] = MIFGenerator.RegFile(self.size)
+            regs.words[reg] = MIFGenerator.to_word(val)
+            regs.cmds[reg] = cmd
+            regs.info[reg] = MIFGenerator.RegInfo(var, desc, val, reg_combo, cond_ternary)
+
+        def entry(self, gpc, reg):
+            # (RegInfo, 명령어) 또는 할당되지 않았으면 None
+            regs = self.files.get(gpc)
+            if regs is None or reg >= self.size or regs.info[reg] is None:
+                return None
+            return regs.info[reg], regs.cmds[reg]
 
         def set_var(self, gpc, var, reg):
-            self.v2r.setdefault((gpc, var), reg)
+            self.v2r.setdefault(gpc, {}).setdefault(var, reg)
 
         def get_var(self, gpc, var):
-            return self.v2r.get((gpc, var))
+            return self.v2r.get(gpc, {}).get(var)
 
         def set_const(self, gpc, const, reg):
-            self.c2r.setdefault((gpc, const), reg)
+            self.c2r.setdefault(gpc, {}).setdefault(const, reg)
 
         def get_const(self, gpc, const):
-            return self.c2r.get((gpc, const))
+            return self.c2r.get(gpc, {}).get(const)
+
+        def find_var(self, var, *gpcs):
+            # 주어진 GPC 순서대로 찾아 처음 발견된 레지스터 번호, 없으면 None
+            for gpc in gpcs:
+                reg = self.get_var(gpc, var)
+                if reg is not None:
+                    return reg
+            return None
+
+        def find_const(self, const, *gpcs):
+            for gpc in gpcs:
+                reg = self.get_const(gpc, const)
+                if reg is not None:
+                    return reg
+            return None
+
+        def regs_in_use(self, gpc):
+            # 변수/상수에 배정된 레지스터 번호 집합
+            return set(self.v2r.get(gpc, {}).values()) | set(self.c2r.get(gpc, {}).values())
 
     # --------------------------------------------------------------------- #
     # JSON 로드 및 전처리
@@ -242,9 +274,18 @@ class MIFGenerator:
         with open(path, encoding="utf8") as f:
             return json.load(f)
 
+    def load_gimple(self, path: str):
+        # 매칭된 GIMPLE: .eir(이진 중간 형식)이면 메모리 매핑하여 필요한 함수만 풀고, 아니면 JSON
+        if path.endswith(IR_SUFFIX):
+            return open_intermediate(path)
+        return self.load_json(path)
+
     def init_data(self):
-        self.funcs_parsed = self.load_json(self.parsed_json_path).get("functions", [])
-        self.funcs_gimple = self.load_json(self.gimple_json_path).get("functions", [])
+        parsed = self.parsed_data if self.parsed_data is not None else self.load_json(self.parsed_json_path)
+        gimple = self.gimple_data if self.gimple_data is not None else self.load_gimple(self.gimple_json_path)
+        self.funcs_parsed = parsed.get("functions", [])
+        self.funcs_gimple = gimple.get("functions", [])
+        self.line_table = gimple.get("line_table", [])
         self.global_vars = self.get_global_variables(self.funcs_parsed)
 
     @staticmethod
@@ -254,6 +295,32 @@ class MIFGenerator:
             globals_all.update(func.get("globals", {}))
         return globals_all
 
+    def hardware_loop_plan(self, func):
+        # 함수의 하드웨어 루프 배정 (src/hwloop.py), 배정하지 않으면 None
+        if not self.hwloop:
+            return None
+        return plan_hardware_loops(func, FunctionLines(self.line_table, func))
+
+    @staticmethod
+    def software_loops(loops, plan):
+        # 하드웨어 루프에 배정되지 않아 조건 비교(r7)가 필요한 루프
+        if plan is None:
+            return loops
+        return [blk for k, blk in enumerate(loops) if k not in plan["trips"]]
+
+    @staticmethod
+    def control_registers(soft_loops, ifs, plan):
+        # 연산 상태가 조건(r7: 루프, r8: if)과 하드웨어 루프(r127 제어, r125/r124 반복 횟수)에 쓰는 레지스터
+        # 초기화 상태도 이 레지스터에는 변수를 두지 않음 (연산 상태로 넘어온 값이 조건 쓰기에 덮이지 않도록)
+        regs = set()
+        if any(blk.get("condition") for blk in soft_loops):
+            regs.add(7)
+        if any(blk.get("condition") for blk in ifs):
+            regs.add(8)
+        if plan is not None:
+            regs |= {HW_CONTROL_REG, HW_COUNT_1D_REG} | ({HW_COUNT_2D_REG} if plan["2d"] is not None else set())
+        return regs
+
     # --------------------------------------------------------------------- #
     # build_gpc0 구현
     # --------------------------------------------------------------------- #
@@ -262,186 +329,296 @@ class MIFGenerator:
         ifs_data = func.get("if_stmts", [])
         ifs = ifs_data if isinstance(ifs_data, list) else []
         init = func.get("initializations", {}) or {}
-        conds = {blk.get("condition") for blk in loops + ifs if blk.get("condition")}
+        plan = self.hardware_loop_plan(func)
+        soft_loops = self.software_loops(loops, plan)
+        reserved = self.control_registers(soft_loops, ifs, plan)
+        conds = {blk.get("condition") for blk in soft_loops + ifs if blk.get("condition")}
         rhs_neg = self.rhs_vars_in_conditions(conds) if conds else set()
 
-        # 1) 초기화 레지스터
-        idx = 0
+        # 1) 초기화 레지스터: (종류, 키, 이름, 설명, 값, 명령어)
+        entries = []
         for var, val in init.items():
             if self.is_temporary_var(var) or (loops and self.is_h_constant(var)):
                 continue
-            reg = f"r{idx}"
             signed_val = -int(val) if var in rhs_neg else int(val)
-            self.mp.set_var(gpc, var, reg)
-            cmd = self.make_cmd_for_declare(var, str(signed_val), reg)
-            self.mp.add(gpc, idx, reg, var, f"{var} = {signed_val}", str(signed_val), cmd, reg)
-            idx += 1
+            cmd = self.make_cmd_for_declare(var, str(signed_val), len(entries))
+            entries.append(("var", var, var, f"{var} = {signed_val}", str(signed_val), cmd))
 
         # 2) 상수 레지스터
         for c in sorted(self.constants_in_body(loops, ifs)):
-            if idx >= self.REGS:
-                break
-            if not self.mp.get_const(gpc, c):
-                reg = f"r{idx}"
-                self.mp.set_const(gpc, c, reg)
-                cmd = f"LXY(01f,{self.to_hex32(c)})"
-                self.mp.add(gpc, idx, reg, str(c), str(c), str(c), cmd, reg)
-                idx += 1
+            entries.append(("const", c, str(c), str(c), str(c), f"LXY(01f,{self.to_hex32(c)})"))
 
         # 3) 조건 아웃루프 상수
         for _ in conds:
-            if idx >= self.REGS:
-                break
-            reg = f"r{idx}"
-            cmd = "LXY(01f,00000004)"
-            self.mp.add(gpc, idx, reg, "4 (outloop)", "4 (outloop)", "4", cmd, reg)
-            idx += 1
+            entries.append((None, None, "4 (outloop)", "4 (outloop)", "4", "LXY(01f,00000004)"))
+
+        # 연산 상태의 조건/하드웨어 루프 레지스터를 건너뛰며 차례로 배정, 128개를 넘으면 추가 GPC 상태로 이어서 배정
+        free = [idx for idx in range(self.REGS) if idx not in reserved]
+        states = [gpc]
+        for n, (kind, key, var, desc, val, cmd) in enumerate(entries):
+            k, slot = divmod(n, len(free))
+            idx = free[slot]
+            if k == len(states):
+                states.append(self.new_state(gpc))
+            state = states[k]
+            if kind == "var":
+                self.mp.set_var(state, key, idx)
+            elif kind == "const":
+                self.mp.set_const(state, key, idx)
+            self.mp.add(state, idx, var, desc, val, cmd, f"r{idx}")
 
         # 4) 나머지 레지스터 채우기
-        while idx < self.REGS:
-            reg = f"r{idx}"
-            self.mp.add(gpc, idx, reg, "", "", "0", "", reg)
-            idx += 1
+        for state in states:
+            for idx in range(self.REGS):
+                if self.mp.entry(state, idx) is None:
+                    self.mp.add(state, idx, "", "", "0", "", f"r{idx}")
 
     # --------------------------------------------------------------------- #
     # build_standard_gpc1 (build_gpc1) 구현
     # --------------------------------------------------------------------- #
     def build_standard_gpc1(self, func, gpc):
-        decl = gpc - 1
+        init_states = self.function_state_chain(gpc - 1)
+        decl = init_states[0]
         init = func.get("initializations", {}) or {}
         loops = func.get("for_loops", []) or []
         ifs = func.get("if_stmts", []) or []
-        var_map = self.build_var_expr_map(func)
-        conds = {blk.get("condition") for blk in loops + ifs if blk.get("condition")}
+        plan = self.hardware_loop_plan(func)
+        soft_loops = self.software_loops(loops, plan)
+        conds = {blk.get("condition") for blk in soft_loops + ifs if blk.get("condition")}
         rhs_neg = self.rhs_vars_in_conditions(conds) if conds else set()
+        func_lines = FunctionLines(self.line_table, func)
 
-        # 현재 값 초기화
-        current_vals = {}
+        # 반복 시작 값 초기화
+        start_vals = {}
+        carried = set()
+        carried_vars = {}
         for var, val in init.items():
             if not self.is_temporary_var(var) and not self.is_h_constant(var):
                 signed_val = -int(val) if var in rhs_neg else int(val)
-                current_vals[var] = signed_val
+                start_vals[var] = signed_val
                 reg = self.mp.get_var(decl, var)
-                if reg:
+                if reg is not None:
                     self.mp.set_var(gpc, var, reg)
-                    entry = self.mp.table[decl][reg]
-                    cmd = entry[4]
-                    self.mp.add(gpc, int(reg[1:]), reg, var, f"{var} = {entry[3]}", entry[3], cmd, entry[5])
-
-        next_reg_idx = len([v for v in init if not self.is_temporary_var(v) and not self.is_h_constant(v)])
-
-        # 증분 처리
-        for blk in loops + ifs:
-            inc = blk.get("increment")
-            if not inc:
-                continue
-            lhs, rhs = self.parse_assignment(inc.strip())
-            if not lhs or not rhs:
-                continue
-            rhs_expanded = self.one_level_substitute(rhs.strip(), var_map)
-            val_new = self.evaluate_rhs_val(rhs_expanded, current_vals, rhs_neg)
-            current_vals[lhs] = val_new
-            reg_lhs = self.mp.get_var(gpc, lhs) or f"r{next_reg_idx}"
-            if self.mp.get_var(gpc, lhs) is None:
-                self.mp.set_var(gpc, lhs, reg_lhs)
-                next_reg_idx += 1
-            parts = [p.strip() for p in rhs_expanded.split("+")]
-            if len(parts) == 1:
-                p = parts[0]
-                reg_combo = (
-                    self.mp.get_const(gpc, int(p)) or self.mp.get_const(decl, int(p))
-                    if p.lstrip("-").isdigit()
-                    else self.mp.get_var(gpc, p) or self.mp.get_var(decl, p)
-                ) or "r0"
-            else:
-                reg_combo, _ = self.construct_reg_sum(self.mp, decl, rhs_expanded)
-            cmd = self.make_cmd_for_assign(lhs, rhs_expanded, self.mp, gpc)
-            self.mp.add(gpc, int(reg_lhs[1:]), reg_lhs, lhs, f"{lhs} = {rhs_expanded}", str(val_new), cmd, reg_combo)
-
-        # 본문 처리
+                    carried.add(reg)
+                    carried_vars[reg] = var
+                    entry = self.mp.entry(decl, reg)
+                    if entry is not None:
+                        info, cmd = entry
+                        self.mp.add(gpc, reg, var, f"{var} = {info.val}", info.val, cmd, info.combo)
+
+        # 실행 순서(루프마다 본문 -> 증분, 그 뒤 if 증분)대로 대입문을 모음
+        # 해석하지 못한 줄은 (None, 줄)로 남겨 배열 쓰기/함수 호출과 변수 사용만 반영
+        steps = []
+        phases = []  # [(루프 블록 또는 None, 첫 대입문 위치)]
+        local_vars = set()
         for blk in loops:
-            for line in blk.get("body", []):
+            phases.append((blk, len(steps)))
+            body = []
+            for line in func_lines.body(blk):
+                line = line.strip()
+                m = LOCAL_DECL_RE.match(line)
+                if m:
+                    local_vars.add(m.group(1))
+                    continue
+                if LABEL_LINE_RE.match(line):
+                    continue
                 lhs, rhs = self.parse_assignment(line)
-                if not lhs or not rhs:
+                body.append((lhs, rhs.strip()) if lhs and rhs else (None, line))
+            steps.extend(body)
+            inc = self.parse_assignment(blk["increment"].strip()) if blk.get("increment") else (None, None)
+            # GIMPLE 본문에 이미 증분문이 들어 있으면 한 번만 실행
+            if inc[0] and inc[1] and (inc[0], inc[1].strip()) not in body:
+                steps.append((inc[0], inc[1].strip()))
+        phases.append((None, len(steps)))
+        for blk in ifs:
+            inc = self.parse_assignment(blk["increment"].strip()) if blk.get("increment") else (None, None)
+            if inc[0] and inc[1]:
+                steps.append((inc[0], inc[1].strip()))
+
+        # 식 DAG: 모든 값을 반복 시작 시점의 레지스터 식으로 치환하고 상수를 접음
+        # 루프가 있는 함수의 h 상수는 레지스터를 받지 않으므로(build_gpc0) 값으로 접음
+        # 루프마다 한 번 반복한 결과를 따로 계산하고(노드는 루프 사이에서도 공유), if는 모든 루프의 결과 위에서 계산
+        h_consts = {var: int(val) for var, val in init.items() if loops and self.is_h_constant(var)}
+        dag = ExprDAG(h_consts)
+        loop_envs = {}  # {id(루프 블록): 그 루프를 한 번 반복한 뒤의 {이름: 노드}}
+        merged = {}
+        nodes = []
+        for k, (blk, start) in enumerate(phases):
+            end = phases[k + 1][1] if k + 1 < len(phases) else len(steps)
+            dag.env = merged if blk is None else loop_envs.setdefault(id(blk), {})
+            for lhs, rhs in steps[start:end]:
+                if lhs is not None:
+                    nodes.append(dag.assign(lhs, rhs))
                     continue
-                if lhs not in current_vals:
-                    current_vals[lhs] = 0
-                    reg = f"r{next_reg_idx}"
-                    self.mp.set_var(gpc, lhs, reg)
-                    next_reg_idx += 1
-                rhs_expanded = self.one_level_substitute(rhs.strip(), var_map)
-                val_new = self.evaluate_rhs_val(rhs_expanded, current_vals, rhs_neg)
-                current_vals[lhs] = val_new
-                reg_lhs = self.mp.get_var(gpc, lhs)
-                parts = [p.strip() for p in rhs_expanded.split("+")]
-                if len(parts) == 1:
-                    p = parts[0]
-                    reg_combo = (
-                        self.mp.get_const(gpc, int(p)) or self.mp.get_const(decl, int(p))
-                        if p.lstrip("-").isdigit()
-                        else self.mp.get_var(gpc, p) or self.mp.get_var(decl, p)
-                    ) or "r0"
-                else:
-                    reg_combo, _ = self.construct_reg_sum(self.mp, decl, rhs_expanded)
-                cmd = self.make_cmd_for_assign(lhs, rhs_expanded, self.mp, gpc)
-                self.mp.add(gpc, int(reg_lhs[1:]), reg_lhs, lhs, f"{lhs} = {rhs_expanded}", str(val_new), cmd, reg_combo)
-
-        # 조건문 처리
+                store = ARRAY_STORE_RE.match(rhs)
+                if store:
+                    dag.clobber(store.group(1))
+                elif "(" in rhs:
+                    dag.clobber()
+                nodes.append(None)
+            if blk is not None:
+                merged.update(dag.env)
+
+        # 공통 부분식 제거: 한 번만 정의되는 임시 변수가 앞선 임시 변수와 같은 식이면 그 레지스터를 함께 씀
+        defs = {}
+        for lhs, _ in steps:
+            if lhs is not None:
+                defs[lhs] = defs.get(lhs, 0) + 1
+        alias = {}
+        holders = {}
+        for (lhs, _), node in zip(steps, nodes):
+            if lhs is None or not is_temporary(lhs) or defs[lhs] > 1 or ExprDAG.node_operations(node) == 0:
+                continue
+            if node in holders:
+                alias[lhs] = holders[node]
+            else:
+                holders[node] = lhs
+
+        # 수명 분석: 임시 변수와 본문 안에서 선언된 지역 변수는 마지막 사용 뒤 레지스터를 다음 값에 넘김
+        live_out = set()
+        for cond in conds:
+            live_out |= names_in(cond)
+        statements = []
+        for lhs, rhs in steps:
+            uses = {alias.get(name, name) for name in names_in(rhs)}
+            statements.append((None if lhs in alias else lhs, uses))
+        candidates = local_vars | {lhs for lhs, _ in steps if lhs and is_temporary(lhs)}
+        ranges = local_live_ranges(statements, candidates, live_out)
+
+        # 조건 레지스터(r7: 루프, r8: if)와 하드웨어 루프 레지스터(r127 제어, r125/r124 반복 횟수)는 값 배정에서 제외
         idx_cond_for = 7
         idx_cond_if = 8
-        for loop in loops:
-            cond = loop.get("condition")
-            if not cond:
-                continue
-            lhs_var, rhs_expr = self.parse_condition_parts(cond)
-            lhs_exp = self.one_level_substitute(lhs_var, var_map)
-            rhs_exp = self.one_level_substitute(rhs_expr, var_map)
-            reg_str, _ = self.construct_reg_sum(self.mp, decl, f"{lhs_exp}+{rhs_exp}")
-            cmd = "GEZ(01f, 00000004)"
-            self.mp.add(gpc, idx_cond_for, f"r{idx_cond_for}",
-                        f"{lhs_exp}+{rhs_exp} >= 0",
-                        f"{lhs_exp}+{rhs_exp} >= 0",
-                        str(self.sum_vars_val(lhs_exp, current_vals, set()) + self.sum_vars_val(rhs_exp, current_vals, set())),
-                        cmd,
-                        reg_combo=f"({reg_str}) >= 0 ? outL:inL",
-                        cond_ternary="? outL:inL")
-        for ifs in ifs:
-            cond = ifs.get("condition")
-            if not cond:
-                continue
-            lhs_var, rhs_expr = self.parse_condition_parts(cond)
-            lhs_exp = self.one_level_substitute(lhs_var, var_map)
-            rhs_exp = self.one_level_substitute(rhs_expr, var_map)
-            reg_str, _ = self.construct_reg_sum(self.mp, decl, f"{lhs_exp}+{rhs_exp}")
-            cmd = "GTZ(01f, 00000004)"
-            self.mp.add(gpc, idx_cond_if, f"r{idx_cond_if}",
-                        f"{lhs_exp}+{rhs_exp} > 0",
-                        f"{lhs_exp}+{rhs_exp} > 0",
-                        str(self.sum_vars_val(lhs_exp, current_vals, set()) + self.sum_vars_val(rhs_exp, current_vals, set())),
-                        cmd,
-                        reg_combo=f"({reg_str}) > 0 ? outL:inL",
-                        cond_ternary="? outL:inL")
-
-        # 일반 상수 처리 (1 포함 모든 상수)
+        reserved = self.control_registers(soft_loops, ifs, plan)
+        hw_regs = reserved - {idx_cond_for, idx_cond_if}
+        # 하드웨어 루프의 loopin 위치: 루프 본문(phase)에서 처음 레지스터를 받는 대입문의 상태 체인 안 워드 위치
+        loop_phases = {}
+        if plan is not None:
+            for k in plan["trips"]:
+                loop_phases[k] = (phases[k][1], phases[k + 1][1])
+        loopin = {}
+        states = [gpc]
+        scan = LinearScan(self.REGS, reserved, carried)
+
+        # 일반 상수 처리 (1 포함 모든 상수): 상태 전체에서 읽히므로 먼저 배정
         consts = self.constants_in_body(loops, ifs)
         for c in sorted(consts):
-            if next_reg_idx >= self.REGS:
+            reg = scan.alloc()
+            if reg is None:
                 break
-        if not self.mp.get_const(gpc, c):
-            reg = f"r{next_reg_idx}"
             self.mp.set_const(gpc, c, reg)
             desc = str(c)
             cmd = f"LXY(01f,{self.to_hex32(c)})"
-            self.mp.add(gpc, next_reg_idx, reg, desc, desc, str(c), cmd, reg)
-            next_reg_idx += 1
+            self.mp.add(gpc, reg, desc, desc, str(c), cmd, f"r{reg}")
+
+        def reg_name(name):
+            resolved.add(name)
+            reg = self.mp.find_var(name, *scope)
+            return name if reg is None else f"r{reg}"
+
+        def const_name(value):
+            reg = self.mp.find_const(value, *scope)
+            return str(value) if reg is None else f"r{reg}"
+
+        # 대입문 처리: 값과 레지스터 조합은 반복 시작 값 기준
+        cache = {}
+        texts = {}
+        # 레지스터 조합 표기 {노드: 텍스트}: 레지스터 이름으로 바꾼 변수에 새 레지스터가 배정되면 비움
+        reg_texts = {}
+        resolved = set()
+        roots = []
+        for pos, ((lhs, _), node) in enumerate(zip(steps, nodes)):
+            if lhs is None or lhs in alias:
+                continue
+            scan.expire(pos)
+            state = states[-1]
+            reg_lhs = self.mp.get_var(state, lhs)
+            if reg_lhs is None:
+                end = ranges[lhs][1] if lhs in ranges else LIVE_TO_END
+                reg_lhs = scan.alloc(end)
+                if reg_lhs is None:
+                    # 레지스터가 모자라면 이후 값은 추가 GPC 상태에 배정
+                    state = self.new_state(gpc)
+                    states.append(state)
+                    scan = LinearScan(self.REGS, reserved)
+                    reg_lhs = scan.alloc(end)
+                self.mp.set_var(state, lhs, reg_lhs)
+                if lhs in resolved:
+                    reg_texts.clear()
+            for k, (start, end) in loop_phases.items():
+                if k not in loopin and start <= pos < end:
+                    loopin[k] = (len(states) - 1) * self.REGS + reg_lhs
+            scope = (*reversed(states), *init_states)
+            rhs_expanded = ExprDAG.render(node, limit=DESC_LIMIT, cache=texts)
+            val_new = dag.evaluate(node, start_vals, cache)
+            reg_combo = ExprDAG.render(node, reg_name, const_name, spaced=False, limit=DESC_LIMIT, cache=reg_texts)
+            cmd = self.make_cmd_for_assign(lhs, rhs_expanded, self.mp, state)
+            self.mp.add(state, reg_lhs, lhs, f"{lhs} = {rhs_expanded}", str(val_new), cmd, reg_combo)
+            roots.append(node)
+
+        # 조건문 처리 (마지막 상태에 배치, 반복이 끝난 시점의 값으로 판정)
+        last = states[-1]
+        scope = (*reversed(states), *init_states)
+        for blocks, idx_cond, op, cmd in ((soft_loops, idx_cond_for, ">=", "GEZ(01f, 00000004)"),
+                                          (ifs, idx_cond_if, ">", "GTZ(01f, 00000004)")):
+            for blk in blocks:
+                cond = blk.get("condition")
+                if not cond:
+                    continue
+                dag.env = loop_envs.get(id(blk), merged)
+                lhs_var, rhs_expr = self.parse_condition_parts(cond)
+                lhs_node = dag.parse(lhs_var)
+                rhs_node = dag.parse(rhs_expr)
+                desc = (f"{ExprDAG.render(lhs_node, limit=DESC_LIMIT, cache=texts)}"
+                        f"+{ExprDAG.render(rhs_node, limit=DESC_LIMIT, cache=texts)} {op} 0")
+                reg_str = (f"{ExprDAG.render(lhs_node, reg_name, const_name, spaced=False, limit=DESC_LIMIT, cache=reg_texts)}"
+                           f"+{ExprDAG.render(rhs_node, reg_name, const_name, spaced=False, limit=DESC_LIMIT, cache=reg_texts)}")
+                val = dag.evaluate(lhs_node, start_vals, cache) + dag.evaluate(rhs_node, start_vals, cache)
+                self.mp.add(last, idx_cond, desc, desc, str(val), cmd,
+                            reg_combo=f"({reg_str}) {op} 0 ? outL:inL",
+                            cond_ternary="? outL:inL")
+                roots.append(dag.add(lhs_node, rhs_node))
+
+        # 하드웨어 루프: 반복 횟수는 상수로 싣고, 제어 워드(y[127])에 loopen 비트와 loopin 오프셋을 기록
+        if plan is not None:
+            controls = [(plan["1d"], HW_COUNT_1D_REG, "loop_1d")]
+            if plan["2d"] is not None:
+                controls.append((plan["2d"], HW_COUNT_2D_REG, "loop_2d"))
+            for k, reg, role in controls:
+                trip = plan["trips"][k]
+                desc = f"{loops[k].get('condition')} x{trip} ({role})"
+                self.mp.add(last, reg, role, desc, str(trip), f"LXY(01f,{self.to_hex32(trip)})", f"r{reg}")
+            loopin_1d = loopin.get(plan["1d"], 0)
+            loopin_2d = loopin.get(plan["2d"], 0) if plan["2d"] is not None else None
+            word = control_word(loopin_1d, loopin_2d)
+            desc = f"loopen_1d loopin {loopin_1d}" + (f", loopen_2d loopin {loopin_2d}" if loopin_2d is not None else "")
+            self.mp.add(last, HW_CONTROL_REG, "loop_ctrl", desc, str(word), f"LXY(01f,{self.to_hex32(word)})",
+                        f"r{HW_CONTROL_REG}")
+            count("hardware_loops", len(controls))
+            self.dprint(f"{func.get('function_name')} 하드웨어 루프: "
+                        + ", ".join(f"{role} '{loops[k].get('condition')}' x{plan['trips'][k]}" for k, _, role in controls))
+
+        shared, separate = dag.operations(roots)
+        self.dprint(f"{func.get('function_name')} 연산 상태: 반복당 연산 {shared}개 "
+                    f"(공통 부분식 공유 전 {separate}개, 임시 변수 공유 {len(alias)}개)")
+
+        self.check_carried_registers(func, gpc, carried_vars)
 
         # 남은 레지스터 채우기
-        used = {int(r[1:]) for (gp, _), r in self.mp.v2r.items() if gp == gpc}
-        used |= {int(r[1:]) for (gp, _), r in self.mp.c2r.items() if gp == gpc}
-        used |= {7, 8}
-        for i in range(self.REGS):
-            if i not in used:
-                self.mp.add(gpc, i, f"r{i}", "", "", "0", "", f"r{i}")
+        for state in states:
+            used = self.mp.regs_in_use(state) | {7, 8} | hw_regs
+            for i in range(self.REGS):
+                if i not in used:
+                    self.mp.add(state, i, "", "", "0", "", f"r{i}")
+
+    def check_carried_registers(self, func, gpc, carried_vars):
+        # 초기화 상태에서 넘어온 값의 레지스터에는 그 변수 자신(또는 그 변수의 갱신 값)만 있어야 함
+        # 다른 값이나 조건이 같은 레지스터에 쓰이면 반복 시작 값을 읽기 전에 덮어써서 결과가 틀어짐
+        for reg, var in carried_vars.items():
+            entry = self.mp.entry(gpc, reg)
+            if entry is None or entry[0].var != var:
+                other = "(비어 있음)" if entry is None else entry[0].desc
+                raise Exception(f"{func.get('function_name')}: 초기화 상태에서 넘어온 {var}(r{reg})가 "
+                                f"연산 상태에서 다른 값으로 덮어쓰였습니다: {other}")
 
     def build_gpc1(self, func, gpc):
         self.build_standard_gpc1(func, gpc)
@@ -449,34 +626,39 @@ class MIFGenerator:
     # --------------------------------------------------------------------- #
     # 레지스터 라인 생성
     # --------------------------------------------------------------------- #
-    def lines_for_gpc(self, gpc):
+    def lines_for_gpc(self, gpc, slot=None):
+        # gpc: 빌드에 쓴 논리 GPC, slot: 배치된 물리 GPC (주소 = slot * REGS + 레지스터 번호)
+        slot = gpc if slot is None else slot
+        base = slot * self.REGS
+        regs = self.mp.files.get(gpc)
+        if regs is None:
+            return [f"--{base + i:<5}:00000000; -- r{i:<4}" for i in range(self.REGS)]
+        # GPC의 128개 워드를 한 번에 16진수로 변환
+        hex_vals = hex_words(regs.words, " ").split(" ")
         lines = []
-        if gpc not in self.mp.table:
-            for i in range(self.REGS):
-                addr = gpc * self.REGS + i
-                lines.append(f"--{addr:<5}:00000000; -- r{i:<4}")
-            return lines
-        reg_map = self.mp.table[gpc]
-        for i in range(self.REGS):
+        for i, (hex_val, cmd, info) in enumerate(zip(hex_vals, regs.cmds, regs.info)):
+            if info is None:
+                lines.append(f"--{base + i:<5}:00000000; -- r{i:<4}")
+                continue
             rn = f"r{i}"
-            if rn in reg_map:
-                idx, var, desc, val, cmd, combo, tern = reg_map[rn]
-                hex_val = self.to_hex32(val)
-                addr = gpc * self.REGS + idx
-                lines.append(f"--{addr:<5}:{hex_val:<10}; -- {rn:<4} {desc:<30} {combo:<20} {cmd:<22} {val:<6} GPC={gpc}")
-            else:
-                addr = gpc * self.REGS + i
-                lines.append(f"--{addr:<5}:00000000; -- r{i:<4}")
+            lines.append(f"--{base + i:<5}:{hex_val:<10}; -- {rn:<4} {info.desc:<30} {info.combo:<20} {cmd:<22} {info.val:<6} GPC={slot}")
         return lines
 
     # --------------------------------------------------------------------- #
     # MIF 저장
     # --------------------------------------------------------------------- #
+    @staticmethod
+    def render_mif(lines, depth=DEPTH):
+        # 헤더와 END;를 포함한 .mif 파일 전체 텍스트 생성
+        return (
+            f"DEPTH = {depth};\nWIDTH = 32;\nADDRESS_RADIX = DEC;\nDATA_RADIX = HEX;\nCONTENT\nBEGIN\n"
+            + "\n".join(lines)
+            + "\nEND;\n"
+        )
+
     def save_mif_file(self, lines):
         with open(self.output_mif_path, "w", encoding="utf-8") as f:
-            f.write("DEPTH = 8192;\nWIDTH = 32;\nADDRESS_RADIX = DEC;\nDATA_RADIX = HEX;\nCONTENT\nBEGIN\n")
-            f.write("\n".join(lines))
-            f.write("\nEND;\n")
+            f.write(self.render_mif(lines, self.depth))
         print(f".mif 파일 저장 완료: {self.output_mif_path}")
 
     # --------------------------------------------------------------------- #
@@ -484,22 +666,128 @@ class MIFGenerator:
     # --------------------------------------------------------------------- #
     def run(self):
         self.init_data()
-        for i, func in enumerate(self.funcs_parsed):
-            gimp = next((x for x in self.funcs_gimple if x["function_name"] == func["function_name"]), None)
-            if gimp:
-                self.build_gpc0(gimp, i * 2)
-        for i, func in enumerate(self.funcs_parsed):
-            gimp = next((x for x in self.funcs_gimple if x["function_name"] == func["function_name"]), None)
-            if gimp:
-                self.build_gpc1(gimp, i * 2 + 1)
-        
+        self.save_mif_file(self.build_lines())
+
+    def image_words(self):
+        # 물리 GPC 0부터 마지막으로 배치된 GPC까지의 레지스터 워드를 이어 붙인 메모리 이미지 (build_lines 이후 호출)
+        words = array("I")
+        for gpc in self.allocator.owners:
+            words.extend(self.mp.files[gpc].words)
+        return words
+
+    def to_bytes(self):
+        # 파일을 쓰지 않고 .mif 내용을 바이트로 반환
+        self.init_data()
+        return self.render_mif(self.build_lines(), self.depth).encode("utf-8")
+
+    def function_gpcs(self):
+        # funcs_parsed 순서대로 함수마다 GPC 두 개(초기화, 연산)를 배정: {함수 이름: (gpc0, gpc1)}
+        return {func["function_name"]: (i * 2, i * 2 + 1) for i, func in enumerate(self.funcs_parsed)}
+
+    def gimple_by_name(self):
+        # 이진 중간 형식에서 읽은 경우 이름 색인만 만들고 레코드는 꺼낼 때 풀어 씀
+        by_name = getattr(self.funcs_gimple, "by_name", None)
+        if by_name is not None:
+            return by_name()
+        gimple = {}
+        for func in self.funcs_gimple:
+            gimple.setdefault(func["function_name"], func)
+        return gimple
+
+    def new_state(self, base):
+        # base 상태의 레지스터가 모자랄 때 이어 받을 추가 논리 GPC (모든 함수 GPC 번호 뒤에서부터 배정)
+        state = max(self.next_state, 2 * len(self.funcs_parsed))
+        self.next_state = state + 1
+        self.spills.setdefault(base, []).append(state)
+        return state
+
+    def function_state_chain(self, base):
+        return [base, *self.spills.get(base, [])]
+
+    def function_states(self, name):
+        # 함수 하나의 상태 목록 [(논리 GPC, 역할)]: init, init.1, ..., action, action.1, ... 순서
+        states = []
+        for base, role in zip(self.function_gpcs()[name], ("init", "action")):
+            for k, gpc in enumerate(self.function_state_chain(base)):
+                states.append((gpc, role if k == 0 else f"{role}.{k}"))
+        return states
+
+    def build_functions(self, names=None):
+        # 지정한 함수들(없으면 전체)의 초기화 상태를 모두 빌드한 뒤 연산 상태를 빌드
+        # 프로세스 풀이 있고 함수가 둘 이상이면 함수 단위로 나눠 빌드 (merge_function_states 참고)
+        gpcs = self.function_gpcs()
+        gimple = self.gimple_by_name()
+        names = [name for name in (gpcs if names is None else names) if name in gimple and name in gpcs]
+        if self.pool is not None and len(names) > 1:
+            jobs = [(gimple[name], function_table(self.line_table, gimple[name]), gpcs[name], 2 * len(self.funcs_parsed),
+                     self.debug, self.hwloop) for name in names]
+            with span("build_pool", functions=len(names)):
+                results = list(self.pool.map(build_function_states, jobs))
+            self.merge_function_states(names, results)
+            count("functions_built", len(names))
+            return names
+        for name in names:
+            with span("build_gpc0", function=name):
+                self.build_gpc0(gimple[name], gpcs[name][0])
+        for name in names:
+            with span("build_gpc1", function=name):
+                self.build_gpc1(gimple[name], gpcs[name][1])
+        count("functions_built", len(names))
+        return names
+
+    def merge_function_states(self, names, results):
+        # 작업자가 빌드한 함수 상태(build_function_states 결과)를 합침
+        # 추가 상태 번호는 직렬 빌드와 같은 순서(모든 함수의 초기화 상태, 그다음 연산 상태)로 다시 매기므로
+        # GPC 배치와 출력은 직렬 빌드와 바이트 단위로 같음 (디버그 출력도 같은 순서로 다시 출력)
+        gpcs = self.function_gpcs()
+        renames = [{} for _ in results]
+        for phase in (0, 1):
+            for name, result, rename in zip(names, results, renames):
+                for local in result["spills"][phase]:
+                    rename[local] = self.new_state(gpcs[name][phase])
+                if result["logs"][phase]:
+                    print(result["logs"][phase], end="")
+        for result, rename in zip(results, renames):
+            for gpc, regs in result["files"].items():
+                self.mp.files[rename.get(gpc, gpc)] = regs
+            for gpc, table in result["v2r"].items():
+                self.mp.v2r[rename.get(gpc, gpc)] = table
+            for gpc, table in result["c2r"].items():
+                self.mp.c2r[rename.get(gpc, gpc)] = table
+
+    def allocate(self):
+        # 빌드된 논리 GPC를 함수 순서대로 물리 GPC에 배치 (같은 내용의 블록은 공유)
+        # 메모리 깊이를 넘으면 점유 현황과 함께 예외 발생
+        allocator = GPCAllocator(self.depth, self.REGS)
+        for name in self.function_gpcs():
+            for gpc, role in self.function_states(name):
+                regs = self.mp.files.get(gpc)
+                if regs is not None:
+                    allocator.place(gpc, regs.words, f"{name} {role}", regs.comments())
+                    gauge(f"registers.{name}.{role}", sum(1 for cmd in regs.cmds if cmd))
+        gauge("gpcs_used", allocator.used)
+        allocator.check()
+        print(allocator.summary())
+        for line in allocator.report()[1:]:
+            self.dprint(line)
+        self.allocator = allocator
+        return allocator
+
+    def build_lines(self):
+        # 모든 함수의 GPC를 빌드하고 헤더를 포함한 .mif 본문 라인 생성
+        self.build_functions()
+        with span("allocate"):
+            allocator = self.allocate()
+
         # GPC별 헤더와 라인 생성
         all_lines = []
-        max_gpc = max(self.mp.table.keys()) if self.mp.table else -1
-        
-        for gpc in range(max_gpc + 1):
+        # 공유하거나 추가 상태가 있으면 함수별 GPC 번호가 2i / 2i+1이 아니므로 배치 표를 남김 (시뮬레이터가 읽음)
+        if allocator.sharing() or self.spills:
+            all_lines.extend(allocator.placement_comments())
+
+        for slot, gpc in enumerate(allocator.owners):
             # 각 GPC 시작 전에 헤더 추가
-            if gpc == 0:
+            if slot == 0:
                 all_lines.extend([
                     "-- -- GPC 0 --fibonacci sequence --  init",
                     "-- -- LXY(z[k], y[k]), y[127]=32'h00000000, y[126]=32'h00000000,",
@@ -510,7 +798,7 @@ class MIFGenerator:
                     "-- -- y[127][15:0] means loopin_offset_1d/loopin_offset_2d if triggered by loopen_1d/loopen_2d",
                     "-- -- y[126][31:0] means return address when return initiated"
                 ])
-            elif gpc == 1:
+            elif slot == 1:
                 all_lines.extend([
                     "-- -- GPC 1  -- fibonacci sequence",
                     "-- -- ADD(z[k], y[k]),  y[127]= 32'h80000000, y[126]= 32'h00000000,",
@@ -521,7 +809,7 @@ class MIFGenerator:
                     "-- -- y[127][15:0] means loopin_offset_1d/loopin_offset_2d if triggered by loopen_1d/loopen_2d",
                     "-- -- y[126][31:0] means return address when return initiated"
                 ])
-            elif gpc == 2:
+            elif slot == 2:
                 all_lines.extend([
                     "-- GPC 2  -- FIR  --  init",
                     "-- LXY(z[k], y[k]), y[127]=32'h00000000, y[126]=32'h00000000,",
@@ -532,7 +820,7 @@ class MIFGenerator:
                     "-- y[127][15:0] means loopin_offset_1d/loopin_offset_2d if triggered by loopen_1d/loopen_2d",
                     "-- y[126][31:0] means return address when return initiated"
                 ])
-            elif gpc == 3:
+            elif slot == 3:
                 all_lines.extend([
                     "-- GPC 3 -- FIR  --  action",
                     "-- ADD(z[k], y[k]),  y[127]= 32'h80000000, y[126]= 32'h00000000,",
@@ -545,10 +833,33 @@ class MIFGenerator:
                 ])
             
             # 해당 GPC의 레지스터 라인들 추가
-            all_lines.extend(self.lines_for_gpc(gpc))
-        
-        self.save_mif_file(all_lines)
-
+            all_lines.extend(self.lines_for_gpc(gpc, slot))
+
+        return all_lines
+
+
+
+def build_function_states(job):
+    # 작업자 프로세스에서 함수 하나의 초기화/연산 상태를 빌드
+    # job: (GIMPLE 매칭 결과, 그 함수가 쓰는 라인 표 {번호: 텍스트}, (gpc0, gpc1), 추가 상태 번호 시작값, debug, hwloop)
+    # 추가 상태는 작업자 안에서 임시 번호를 받고, 부모가 merge_function_states에서 다시 매김
+    func, line_table, (gpc0, gpc1), first_spill, debug, hwloop = job
+    generator = MIFGenerator(debug=debug, hwloop=hwloop)
+    generator.line_table = line_table
+    generator.next_state = first_spill
+    logs = []
+    for build, gpc in ((generator.build_gpc0, gpc0), (generator.build_gpc1, gpc1)):
+        out = io.StringIO()
+        with contextlib.redirect_stdout(out):
+            build(func, gpc)
+        logs.append(out.getvalue())
+    return {
+        "files": generator.mp.files,
+        "v2r": generator.mp.v2r,
+        "c2r": generator.mp.c2r,
+        "spills": (generator.spills.get(gpc0, []), generator.spills.get(gpc1, [])),
+        "logs": logs,
+    }
 
 
 if __name__ == "__main__":
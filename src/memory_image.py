@@ -0,0 +1,122 @@
+import sys
+from array import array
+
+# NumPy 모듈 (Intel HEX 체크섬에만 쓰므로 처음 필요할 때 불러옴, 없으면 False)
+_numpy = None
+
+
+def load_numpy():
+    # NumPy가 없으면 None: Intel HEX 체크섬만 파이썬으로 계산 (나머지 형식은 array/bytes 연산만 사용)
+    global _numpy
+    if _numpy is None:
+        try:
+            import numpy
+        except ImportError:
+            numpy = False
+        _numpy = numpy
+    return _numpy or None
+
+# --format 이름: 출력 파일 확장자
+FORMATS = {
+    "mif": ".mif",
+    "hex": ".hex",
+    "bin": ".bin",
+    "coe": ".coe",
+    "mem": ".mem",
+}
+
+# Intel HEX 한 레코드의 데이터 워드 수 (레코드 주소는 워드 주소, Quartus 메모리 초기화 파일과 같은 방식)
+IHEX_SEGMENT_WORDS = 0x10000
+
+
+def word_bytes(words, byteorder):
+    # 32비트 워드 배열을 한 번에 바이트열로 변환
+    data = array("I", words)
+    if data.itemsize != 4:
+        raise Exception(f"32비트 워드 배열을 만들 수 없습니다 (itemsize={data.itemsize})")
+    if sys.byteorder != byteorder:
+        data.byteswap()
+    return data.tobytes()
+
+
+def hex_words(words, sep="\n"):
+    # 워드마다 8자리 16진수 문자열을 sep으로 이어 붙임 (bytes.hex의 구분자 기능으로 한 번에 변환)
+    if not len(words):
+        return ""
+    return word_bytes(words, "big").hex(sep, 4)
+
+
+def encode_bin(words):
+    # 리틀 엔디언 원시 바이너리
+    return word_bytes(words, "little")
+
+
+def encode_coe(words):
+    # Xilinx 메모리 초기화 파일
+    body = hex_words(words).replace("\n", ",\n")
+    return f"memory_initialization_radix=16;\nmemory_initialization_vector=\n{body};\n".encode("ascii")
+
+
+def encode_mem(words):
+    # Verilog $readmemh 입력 (한 줄에 워드 하나)
+    text = hex_words(words)
+    return (text + "\n" if text else "").encode("ascii")
+
+
+def ihex_checksums(records):
+    # records: 레코드마다 9바이트(길이, 주소 2, 종류, 데이터 4, 체크섬)인 bytearray, 체크섬 칸을 채움
+    np = load_numpy()
+    if np is not None:
+        table = np.frombuffer(records, dtype=np.uint8).reshape(-1, 9)
+        table[:, 8] = (-table[:, :8].sum(axis=1, dtype=np.int64)) & 0xFF
+        return
+    sums = map(sum, zip(records[0::9], records[1::9], records[2::9], records[4::9],
+                        records[5::9], records[6::9], records[7::9]))
+    records[8::9] = bytes((-s) & 0xFF for s in sums)
+
+
+def ihex_data_records(data):
+    # 워드 하나당 데이터 레코드 하나 (주소 = 세그먼트 안의 워드 주소, 데이터는 빅 엔디언)
+    count = len(data) // 4
+    if not count:
+        return ""
+    records = bytearray(9 * count)
+    records[0::9] = b"\x04" * count
+    addrs = word_bytes(range(count), "big")
+    records[1::9] = addrs[2::4]
+    records[2::9] = addrs[3::4]
+    for k in range(4):
+        records[4 + k::9] = data[k::4]
+    ihex_checksums(records)
+    return ":" + records.hex("\n", 9).upper().replace("\n", "\n:") + "\n"
+
+
+def encode_ihex(words):
+    # Intel HEX. 64K 워드를 넘으면 확장 선형 주소(04) 레코드로 상위 주소를 지정
+    data = word_bytes(words, "big")
+    out = []
+    step = IHEX_SEGMENT_WORDS * 4
+    for seg, start in enumerate(range(0, len(data), step)):
+        if seg:
+            ext = bytearray([2, 0, 0, 4, (seg >> 8) & 0xFF, seg & 0xFF, 0])
+            ext[6] = (-sum(ext[:6])) & 0xFF
+            out.append(":" + ext.hex().upper() + "\n")
+        out.append(ihex_data_records(data[start:start + step]))
+    out.append(":00000001FF\n")
+    return "".join(out).encode("ascii")
+
+
+ENCODERS = {
+    "hex": encode_ihex,
+    "bin": encode_bin,
+    "coe": encode_coe,
+    "mem": encode_mem,
+}
+
+
+def encode_image(words, fmt):
+    # 메모리 이미지(32비트 워드 배열)를 지정한 형식의 바이트열로 변환 (mif는 MIFGenerator.render_mif 사용)
+    encoder = ENCODERS.get(fmt)
+    if encoder is None:
+        raise Exception(f"지원하지 않는 출력 형식입니다: {fmt} (지원: {', '.join(FORMATS)})")
+    return encoder(words)
@@ -0,0 +1,242 @@
+import os
+import json
+import contextlib
+
+from src.c_parse_json import CParser
+from src.preprocess import preprocess
+from src.toolchain import gcc_version
+from src.cache import CompileCache
+from src.memory_image import FORMATS, encode_image
+from src.intermediate import IR_FILE, Intermediate, encode_intermediate
+from src.data_segment import DataSegment, data_paths, json_default, symbols_text, write_data_segment
+from src.profiler import count, span
+
+# 변환기 자체 버전 (캐시 키에 포함되므로 출력이 달라지는 변경 시 올려야 함)
+COMPILER_VERSION = "0.9.6"
+
+INTERMEDIATE_FILES = ("parsed_.json", "matched_gimple.json")
+
+# 함수별 병렬 매칭/빌드를 시작하는 최소 함수 수 (작업자 프로세스를 띄우는 비용보다 일이 많을 때만)
+PARALLEL_MIN_FUNCTIONS = 16
+
+
+def json_text(data):
+    # 디버그용 중간 결과(JSON) 텍스트
+    return json.dumps(data, indent=4, ensure_ascii=False, default=json_default)
+
+
+def function_pool(jobs, function_count):
+    # 함수 단위 작업을 나눌 프로세스 풀 (jobs: 작업자 수, 0이면 CPU 개수, 1이면 직렬)
+    # 함수가 PARALLEL_MIN_FUNCTIONS개보다 적으면 None을 돌려주는 빈 컨텍스트
+    workers = min(jobs or os.cpu_count() or 1, function_count)
+    if workers <= 1 or function_count < PARALLEL_MIN_FUNCTIONS:
+        return contextlib.nullcontext()
+    from concurrent.futures import ProcessPoolExecutor
+    return ProcessPoolExecutor(max_workers=workers)
+
+
+def run_stages(c_text=None, c_file_path=None, debug=False, build_dir="build", cache=None, keep_intermediates=False,
+               gimple_file=None, select=None, options=None, unit=None, jobs=1, ir=False):
+    # 세 단계를 메모리 상에서 연결: 각 단계의 결과 딕셔너리를 그대로 다음 단계로 전달
+    # 중간 JSON 파일은 debug일 때만 build_dir에 기록하고, keep_intermediates면 캐시에 넣을 내용을 함께 반환
+    # (매칭 결과는 JSON 대신 이진 중간 형식으로 보관하며, 디버그 JSON은 캐시에서 꺼낼 때 만듦)
+    # ir: 매칭 결과를 이진 중간 형식(build_dir/matched_gimple.eir)으로도 기록
+    # 전처리(gcc -E)는 한 번만 실행하여 그 결과를 C 파싱과 GIMPLE 덤프에 함께 씀 (unit: 이미 전처리한 TranslationUnit)
+    # select: GimpleParser.parse_and_match_gimple에 그대로 전달 (함수별 GIMPLE 블록 확인용)
+    # options: 생성 옵션 (depth: 메모리 깊이, data_segment: 전역 배열의 데이터 메모리 이미지도 생성)
+    # jobs: 함수별 매칭/GPC 빌드에 쓸 작업자 수 (function_pool 참고, 출력은 직렬 실행과 같음)
+    # GIMPLE/MIF 단계 모듈은 캐시 적중 시 필요 없으므로 실제로 실행할 때 불러옴
+    from src.gimpleToJson import GimpleParser
+    from src.makeEflow import MIFGenerator
+    if debug:
+        os.makedirs(build_dir, exist_ok=True)
+    intermediates = {}
+
+    if unit is None:
+        if c_text is None:
+            c_text = CParser(c_file_path).c_text
+        with span("preprocess"):
+            unit = preprocess(c_text, c_file_path)
+    count("macros", len(unit.macros))
+
+    print("\n[1/3] C 코드 파싱 중...")
+    with span("c_parse"):
+        parsed = CParser(c_file_path, c_text=unit.source, macros=unit.macros).parse_multiple_functions()
+    count("c_functions", len(parsed.get("functions", [])))
+    if debug or keep_intermediates:
+        intermediates["parsed_.json"] = json_text(parsed)
+    print("✅ C 파싱 완료")
+
+    # 함수가 많으면 매칭과 GPC 빌드를 함수 단위로 프로세스 풀에 나눔
+    with function_pool(jobs, len(parsed.get("functions", []))) as pool:
+        print("\n[2/3] GIMPLE 매칭 중...")
+        with span("gcc_dump"):
+            gim_parser = GimpleParser(c_file_path, json_data=parsed, c_text=c_text, cache=cache,
+                                      gimple_file=gimple_file, preprocessed=unit.text, debug=debug)
+        try:
+            with span("gimple_match"):
+                matched = gim_parser.parse_and_match_gimple(select, pool)
+        finally:
+            gim_parser.cleanup()
+        if debug:
+            intermediates["matched_gimple.json"] = json_text(matched)
+        if keep_intermediates or ir:
+            intermediates[IR_FILE] = encode_intermediate(matched)
+        print("✅ GIMPLE 매칭 완료")
+
+        if debug:
+            for name in INTERMEDIATE_FILES:
+                with open(os.path.join(build_dir, name), 'w', encoding='UTF8') as f:
+                    f.write(intermediates[name])
+        if ir:
+            os.makedirs(build_dir, exist_ok=True)
+            with open(os.path.join(build_dir, IR_FILE), 'wb') as f:
+                f.write(intermediates[IR_FILE])
+
+        print("\n[3/3] eFlow MIF 파일 생성 중...")
+        with span("mif_build"):
+            generator = MIFGenerator(debug=debug, parsed_data=parsed, gimple_data=matched,
+                                     depth=(options or {}).get("depth"), pool=pool,
+                                     hwloop=(options or {}).get("hwloop", True))
+            generator.init_data()
+            lines = generator.build_lines()
+        generator.pool = None
+    if (options or {}).get("data_segment"):
+        with span("data_segment"):
+            generator.data_segment = DataSegment.from_globals(parsed.get("global_variable", {}))
+        count("data_words", len(generator.data_segment.words))
+    return generator, lines, intermediates
+
+
+def output_format(options=None):
+    # 생성 옵션의 출력 형식 (기본값: mif)
+    fmt = (options or {}).get("format", "mif")
+    if fmt not in FORMATS:
+        raise Exception(f"지원하지 않는 출력 형식입니다: {fmt} (지원: {', '.join(FORMATS)})")
+    return fmt
+
+
+def render_output(generator, lines, fmt="mif"):
+    # 빌드된 GPC를 지정한 형식의 바이트열로 변환
+    if fmt == "mif":
+        return generator.render_mif(lines, generator.depth).encode("utf-8")
+    return encode_image(generator.image_words(), fmt)
+
+
+def build_cache_key(unit, c_file_path=None, options=None, cache_dir=None):
+    # 전처리 결과(포함한 헤더 내용까지), 소스 경로, gcc --version, 변환기 버전, 생성 옵션을 묶어 캐시 키 생성
+    # 주 소스가 그대로여도 '#include'한 헤더가 바뀌면 전처리 결과가 달라지므로 다른 키가 됨
+    # cache_dir: GCC 탐색 결과를 저장할 캐시 폴더 (키를 찾는 캐시와 같은 폴더)
+    path = os.path.abspath(c_file_path) if c_file_path else ""
+    return CompileCache.make_key("mif", unit.text, path, gcc_version(cache_dir=cache_dir), COMPILER_VERSION, options or {})
+
+
+def compile_source(c_text, debug=False, build_dir="build", cache=None, options=None, c_file_path=None):
+    # C 소스 문자열을 받아 .mif(또는 options["format"] 형식) 내용을 바이트로 반환 (임시 JSON 파일 없이 동작)
+    # c_file_path: 소스의 원래 경로 ('#include "..."' 검색용, 없으면 현재 폴더 기준)
+    fmt = output_format(options)
+    key = None
+    unit = None
+    if cache is not None:
+        with span("preprocess"):
+            unit = preprocess(c_text, c_file_path)
+        key = build_cache_key(unit, c_file_path, options, cache.cache_dir)
+        cached = cache.read(key, "output")
+        if cached is not None:
+            return cached
+    generator, lines, intermediates = run_stages(c_text=c_text, c_file_path=c_file_path, debug=debug,
+                                                 build_dir=build_dir, cache=cache,
+                                                 keep_intermediates=cache is not None, options=options, unit=unit)
+    data = render_output(generator, lines, fmt)
+    if cache is not None:
+        store_in_cache(cache, key, data, intermediates)
+    return data
+
+
+def store_in_cache(cache, key, data, intermediates, segment=None, fmt="mif"):
+    files = {"output": data}
+    if segment is not None:
+        files["data"] = segment.encode(fmt)
+        files["symbols"] = symbols_text(segment).encode("utf-8")
+    for name, data in intermediates.items():
+        files[name] = data if isinstance(data, bytes) else data.encode("utf-8")
+    cache.put(key, files)
+
+
+def restore_from_cache(cache, key, output_mif_path, build_dir, debug, ir=False):
+    # 캐시 적중 시 출력 파일(과 debug면 중간 JSON, ir이면 이진 중간 파일)을 그대로 복사, 적중하지 않으면 False
+    # 매칭 결과 JSON이 항목에 없으면 이진 중간 파일을 풀어서 만듦
+    entry = cache.get(key)
+    if entry is None:
+        return False
+    try:
+        with open(os.path.join(entry, "output"), "rb") as f:
+            data = f.read()
+        with open(output_mif_path, "wb") as f:
+            f.write(data)
+        # 데이터 메모리 이미지와 심볼 주소표 (data_segment 옵션으로 만든 항목에만 있음)
+        for name, path in zip(("data", "symbols"), data_paths(output_mif_path)):
+            src = os.path.join(entry, name)
+            if os.path.exists(src):
+                with open(src, "rb") as fin, open(path, "wb") as fout:
+                    fout.write(fin.read())
+        if debug or ir:
+            os.makedirs(build_dir, exist_ok=True)
+        names = (INTERMEDIATE_FILES if debug else ()) + ((IR_FILE,) if ir else ())
+        for name in names:
+            src = os.path.join(entry, name)
+            if os.path.exists(src):
+                with open(src, "rb") as fin, open(os.path.join(build_dir, name), "wb") as fout:
+                    fout.write(fin.read())
+            elif name == "matched_gimple.json" and os.path.exists(os.path.join(entry, IR_FILE)):
+                with open(os.path.join(entry, IR_FILE), "rb") as fin:
+                    matched = Intermediate(fin.read()).to_dict()
+                with open(os.path.join(build_dir, name), "w", encoding="UTF8") as fout:
+                    fout.write(json_text(matched))
+    except OSError:
+        # 다른 프로세스가 항목을 제거한 경우 캐시 미스로 처리
+        return False
+    return True
+
+
+def compile_file(input_c_file, output_mif_path, build_dir="build", debug=False, cache=None, options=None,
+                 gimple_file=None, jobs=1, ir=False):
+    # C 파일 하나를 변환하여 output_mif_path에 .mif(또는 options["format"] 형식)로 저장
+    # gimple_file: 배치 모드에서 미리 생성해 둔 GIMPLE 덤프 경로
+    # jobs: 함수별 매칭/빌드 작업자 수 (run_stages 참고)
+    # ir: 매칭 결과를 build_dir/matched_gimple.eir(이진 중간 형식)로도 저장
+    fmt = output_format(options)
+    output_dir = os.path.dirname(output_mif_path)
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+
+    print(f"🚀 변환 시작: {input_c_file}")
+    c_text = CParser(input_c_file).c_text
+    key = None
+    unit = None
+    if cache is not None:
+        # 캐시 키는 전처리 결과로 만들므로 전처리를 먼저 하고, 캐시에 없으면 그 결과를 run_stages에 넘겨 다시 하지 않음
+        with span("preprocess"):
+            unit = preprocess(c_text, input_c_file)
+        key = build_cache_key(unit, input_c_file, options, cache.cache_dir)
+        with span("cache_lookup"):
+            hit = restore_from_cache(cache, key, output_mif_path, build_dir, debug, ir)
+        if hit:
+            count("cache_hits")
+            print(f"♻️ 캐시 적중 -> {output_mif_path}")
+            return
+
+    generator, lines, intermediates = run_stages(c_text=c_text, c_file_path=input_c_file, debug=debug, build_dir=build_dir,
+                                                 cache=cache, keep_intermediates=cache is not None,
+                                                 gimple_file=gimple_file, options=options, unit=unit, jobs=jobs, ir=ir)
+    with span("mif_write", format=fmt):
+        # 한 번만 렌더링하여 출력 파일과 캐시에 같은 바이트를 씀
+        data = render_output(generator, lines, fmt)
+        with open(output_mif_path, "wb") as f:
+            f.write(data)
+    if generator.data_segment is not None:
+        with span("data_write", format=fmt):
+            write_data_segment(generator.data_segment, output_mif_path, fmt)
+    if cache is not None:
+        store_in_cache(cache, key, data, intermediates, generator.data_segment, fmt)
+    print(f"✅ {fmt.upper()} 생성 완료 -> {output_mif_path}")
@@ -0,0 +1,121 @@
+import os
+import re
+import ast
+
+from src.toolchain import GCC_NOT_FOUND
+
+# gcc -E 출력의 라인 마커: '# 12 "fft_test.c" 2'
+LINEMARKER_RE = re.compile(r'#\s*(\d+)\s+"((?:\\.|[^"\\])*)"')
+# -dD로 남는 매크로 정의/해제 (함수형 매크로는 매개변수 목록이 이름 바로 뒤에 붙음)
+DEFINE_RE = re.compile(r'#\s*define\s+(\w+)(\([^)]*\))?(?:\s+(.*))?$')
+UNDEF_RE = re.compile(r'#\s*undef\s+(\w+)')
+IDENT_RE = re.compile(r'[A-Za-z_]\w*')
+# 정수 상수 뒤의 접미사 (8u, 16UL 등)
+INT_SUFFIX_RE = re.compile(r'\b(0[xX][0-9a-fA-F]+|\d+)[uUlL]+\b')
+
+# 정수 상수식 계산에 허용하는 연산자
+INT_BINOPS = {
+    ast.Add: lambda a, b: a + b,
+    ast.Sub: lambda a, b: a - b,
+    ast.Mult: lambda a, b: a * b,
+    ast.FloorDiv: lambda a, b: int(a / b),
+    ast.Mod: lambda a, b: a - b * int(a / b),
+    ast.LShift: lambda a, b: a << b,
+    ast.RShift: lambda a, b: a >> b,
+    ast.BitAnd: lambda a, b: a & b,
+    ast.BitOr: lambda a, b: a | b,
+    ast.BitXor: lambda a, b: a ^ b,
+}
+
+
+def int_constant(expr, macros=None):
+    # C 정수 상수식('8*2', 'F_SIZE / 2', '(1 << 4)')을 계산하여 int로 반환, 계산할 수 없으면 None
+    # macros: {이름: 값} 안의 객체형 매크로는 값으로 치환 (C와 같이 나눗셈은 0 방향으로 버림)
+    if macros:
+        for _ in range(16):
+            expanded = IDENT_RE.sub(lambda m: f"({macros[m.group(0)]})" if m.group(0) in macros else m.group(0), expr)
+            if expanded == expr:
+                break
+            expr = expanded
+    expr = INT_SUFFIX_RE.sub(r'\1', expr).replace("/", "//")
+    try:
+        tree = ast.parse(expr.strip(), mode="eval")
+    except (SyntaxError, ValueError):
+        return None
+
+    def walk(node):
+        if isinstance(node, ast.Constant) and type(node.value) is int:
+            return node.value
+        if isinstance(node, ast.UnaryOp) and isinstance(node.op, (ast.USub, ast.UAdd, ast.Invert)):
+            value = walk(node.operand)
+            return -value if isinstance(node.op, ast.USub) else ~value if isinstance(node.op, ast.Invert) else value
+        if isinstance(node, ast.BinOp) and type(node.op) in INT_BINOPS:
+            return INT_BINOPS[type(node.op)](walk(node.left), walk(node.right))
+        raise ValueError(expr)
+
+    try:
+        return walk(tree.body)
+    except (ValueError, ZeroDivisionError, TypeError):
+        return None
+
+
+class TranslationUnit:
+    # gcc -E -dD 한 번의 결과를 C 파싱 단계와 GIMPLE 단계가 함께 쓰도록 나눈 것
+    # text: 헤더까지 포함한 전처리 결과 전체 (GIMPLE 덤프 입력, GCC가 다시 전처리하지 않음)
+    # source: 주 소스 파일에서 온 라인만 모은 텍스트 (매크로 전개, #if/#ifdef 처리 완료, 지시문 제외, CParser 입력)
+    # macros: 주 소스 파일에서 정의된 객체형 매크로 {이름: 정수 값 또는 전개된 문자열}
+    def __init__(self, text):
+        self.text = text
+        self.source, self.macros = self.split(text)
+
+    @staticmethod
+    def split(text):
+        main_file = None
+        in_main = False
+        raw_macros = {}
+        source = []
+        for line in text.split("\n"):
+            if line.startswith("#"):
+                marker = LINEMARKER_RE.match(line)
+                if marker:
+                    # 첫 라인 마커의 파일이 주 소스 파일
+                    if main_file is None:
+                        main_file = marker.group(2)
+                    in_main = marker.group(2) == main_file
+                    continue
+                if in_main:
+                    define = DEFINE_RE.match(line)
+                    if define and define.group(2) is None:
+                        raw_macros[define.group(1)] = (define.group(3) or "").strip()
+                    undef = UNDEF_RE.match(line)
+                    if undef:
+                        raw_macros.pop(undef.group(1), None)
+                    # 지시문 자리는 빈 줄로 남김 (CParser는 지시문을 보지 않음)
+                    source.append("")
+                continue
+            if in_main:
+                source.append(line)
+
+        macros = {}
+        for name, body in raw_macros.items():
+            value = int_constant(body, raw_macros) if body else None
+            macros[name] = value if value is not None else body
+        return "\n".join(source), macros
+
+
+def preprocess(c_text, c_file_path=None, gcc="gcc"):
+    # C 소스를 gcc -E -dD로 한 번만 전처리하여 TranslationUnit 반환
+    # 소스는 표준 입력으로 전달하므로 캐시 키로 쓰는 텍스트와 전처리한 텍스트가 항상 같음
+    # c_file_path가 있으면 그 폴더를 '#include "..."' 검색 경로에 추가
+    import subprocess
+    args = [gcc, "-E", "-dD", "-x", "c"]
+    if c_file_path:
+        args += ["-iquote", os.path.dirname(os.path.abspath(c_file_path))]
+    args.append("-")
+    try:
+        result = subprocess.run(args, input=c_text.encode("utf-8"), stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    except FileNotFoundError:
+        raise Exception(GCC_NOT_FOUND)
+    if result.returncode != 0:
+        raise Exception(f"전처리 실패: {result.stderr.decode()}")
+    return TranslationUnit(result.stdout.decode("utf-8"))
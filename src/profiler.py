@@ -0,0 +1,172 @@
+import os
+import json
+import time
+import threading
+import contextlib
+
+# tracemalloc은 불러오는 비용이 있어(pickle, linecache 등) 프로파일을 켤 때만 불러옴
+tracemalloc = None
+
+# 현재 프로세스에서 기록 중인 Profiler (profiling() 안에서만 설정, 없으면 span/count는 아무 일도 하지 않음)
+ACTIVE = None
+
+
+class Profiler:
+    # 단계별 실행 시간(벽시계/CPU), tracemalloc 최대 메모리, 카운터를 기록
+    # 결과는 Chrome/Perfetto trace-event JSON과 평탄한 metrics JSON으로 저장
+    def __init__(self, memory=True):
+        self.memory = memory
+        # 시각은 벽시계 기준(µs)이므로 여러 프로세스(배치 작업)의 기록을 같은 시간축에 놓을 수 있음
+        self.origin = time.perf_counter()
+        self.epoch_us = time.time() * 1e6
+        self.pid = os.getpid()
+        self.events = []  # trace-event 목록
+        self.stages = {}  # {단계 이름: {"calls", "wall_ms", "cpu_ms", "peak_kb"}}
+        self.counters = {}  # {카운터 이름: 값}
+        self.peaks = []  # 열려 있는 span마다 하위 span에서 관측한 최대 메모리
+
+    def now_us(self):
+        return self.epoch_us + (time.perf_counter() - self.origin) * 1e6
+
+    @contextlib.contextmanager
+    def span(self, name, **args):
+        # 단계 하나를 측정 (중첩 가능, 같은 이름은 호출 횟수와 합계로 집계)
+        # 최대 메모리는 span 시작 시점 대비 늘어난 양 (하위 span의 최대값 포함)
+        tracing = self.memory and tracemalloc is not None and tracemalloc.is_tracing()
+        if tracing:
+            current, peak = tracemalloc.get_traced_memory()
+            if self.peaks:
+                self.peaks[-1] = max(self.peaks[-1], peak)
+            tracemalloc.reset_peak()
+            self.peaks.append(current)
+        start, cpu = self.now_us(), time.process_time()
+        try:
+            yield
+        finally:
+            wall_us = self.now_us() - start
+            cpu_ms = (time.process_time() - cpu) * 1000
+            event_args = dict(args)
+            event_args["cpu_ms"] = round(cpu_ms, 3)
+            peak_kb = 0
+            if tracing:
+                begin = current
+                peak = max(self.peaks.pop(), tracemalloc.get_traced_memory()[1])
+                peak_kb = max(0, peak - begin) // 1024
+                if self.peaks:
+                    self.peaks[-1] = max(self.peaks[-1], peak)
+                event_args["peak_kb"] = peak_kb
+            self.events.append({
+                "name": name, "cat": "stage", "ph": "X", "ts": round(start, 1), "dur": round(wall_us, 1),
+                "pid": self.pid, "tid": threading.get_native_id(), "args": event_args,
+            })
+            stage = self.stages.setdefault(name, {"calls": 0, "wall_ms": 0.0, "cpu_ms": 0.0, "peak_kb": 0})
+            stage["calls"] += 1
+            stage["wall_ms"] += wall_us / 1000
+            stage["cpu_ms"] += cpu_ms
+            stage["peak_kb"] = max(stage["peak_kb"], peak_kb)
+
+    def count(self, name, n=1):
+        self.counters[name] = self.counters.get(name, 0) + n
+
+    def gauge(self, name, value):
+        self.counters[name] = value
+
+    def trace_events(self):
+        # 카운터는 마지막 시점의 counter 이벤트 하나로 추가
+        events = list(self.events)
+        if self.counters:
+            events.append({"name": "counters", "ph": "C", "ts": round(self.now_us(), 1), "pid": self.pid,
+                           "args": dict(self.counters)})
+        return events
+
+    def metrics(self):
+        # 평탄한 {"stage.<이름>.<항목>": 값, "counter.<이름>": 값}
+        flat = {}
+        for name, stage in self.stages.items():
+            for key, value in stage.items():
+                flat[f"stage.{name}.{key}"] = round(value, 3) if isinstance(value, float) else value
+        for name, value in self.counters.items():
+            flat[f"counter.{name}"] = value
+        return flat
+
+    def snapshot(self):
+        # 다른 프로세스(배치 작업)로 넘길 수 있는 기록 결과
+        return {"events": self.trace_events(), "metrics": self.metrics()}
+
+
+def metrics_path(trace_path):
+    # trace 파일 옆의 metrics 파일: 'profile.json' -> 'profile.metrics.json'
+    return os.path.splitext(trace_path)[0] + ".metrics.json"
+
+
+def save_profile(trace_path, snapshots, names=None):
+    # 기록 결과(snapshot) 여러 개를 trace 파일 하나와 metrics 파일 하나로 저장
+    # names: snapshot마다 trace 뷰어에 표시할 프로세스 이름 (배치 작업 이름)
+    events = []
+    metrics = {}
+    for i, snap in enumerate(snapshots):
+        name = names[i] if names else None
+        pids = {e["pid"] for e in snap["events"]}
+        if name is not None:
+            # 같은 작업자 프로세스가 여러 작업을 처리하므로 작업마다 별도의 pid를 부여
+            events.extend(dict(e, pid=i + 1) for e in snap["events"])
+            events.append({"name": "process_name", "ph": "M", "pid": i + 1, "args": {"name": name}})
+        else:
+            events.extend(snap["events"])
+            for pid in pids:
+                events.append({"name": "process_name", "ph": "M", "pid": pid, "args": {"name": "eoppp"}})
+        for key, value in snap["metrics"].items():
+            if name is None:
+                metrics[key] = value
+                continue
+            metrics[f"job.{name}.{key}"] = value
+            # 전체 합계 (최대 메모리는 최대값, 함수별 레지스터 수는 작업별로만 기록)
+            if key.startswith("counter.registers."):
+                continue
+            if key.endswith(".peak_kb"):
+                metrics[key] = max(metrics.get(key, 0), value)
+            elif isinstance(value, (int, float)):
+                metrics[key] = round(metrics.get(key, 0) + value, 3)
+    directory = os.path.dirname(trace_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(trace_path, "w", encoding="utf-8") as f:
+        json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f, ensure_ascii=False)
+    with open(metrics_path(trace_path), "w", encoding="utf-8") as f:
+        json.dump(metrics, f, indent=1, ensure_ascii=False, sort_keys=True)
+
+
+@contextlib.contextmanager
+def profiling(memory=True):
+    # 블록 안에서 span/count 호출을 기록하는 Profiler를 활성화 (memory면 tracemalloc도 함께 시작)
+    global ACTIVE, tracemalloc
+    if memory and tracemalloc is None:
+        import tracemalloc
+    profiler = Profiler(memory)
+    previous = ACTIVE
+    started = memory and not tracemalloc.is_tracing()
+    if started:
+        tracemalloc.start()
+    ACTIVE = profiler
+    try:
+        yield profiler
+    finally:
+        ACTIVE = previous
+        if started:
+            tracemalloc.stop()
+
+
+def span(name, **args):
+    if ACTIVE is None:
+        return contextlib.nullcontext()
+    return ACTIVE.span(name, **args)
+
+
+def count(name, n=1):
+    if ACTIVE is not None:
+        ACTIVE.count(name, n)
+
+
+def gauge(name, value):
+    if ACTIVE is not None:
+        ACTIVE.gauge(name, value)
@@ -0,0 +1,216 @@
+import io
+import os
+import sys
+import json
+import time
+import base64
+import argparse
+import threading
+import contextlib
+import socketserver
+from concurrent.futures import ProcessPoolExecutor
+
+from src.pipeline import COMPILER_VERSION, compile_source, output_format
+from src.cache import CompileCache, default_cache_dir
+from src.makeEflow import MIFGenerator
+from src.toolchain import gcc_version
+
+# 작업자 시작 시 한 번 변환하여 정규식/GCC 버전 확인 등 첫 호출 비용을 미리 치르는 커널
+WARMUP_SOURCE = """
+void warm()
+{
+    int i = 0;
+    int n = 4;
+    int a = 1;
+    for( i=0;i<n; i=i+1) {
+        a = a + i;
+    }
+    return ;
+};
+
+int main(void) {
+    warm();
+    return 0 ;
+}
+"""
+
+# 작업자 프로세스마다 하나씩 여는 컴파일 캐시 (init_worker에서 설정)
+worker_cache = None
+
+
+def init_worker(cache_opts):
+    # 작업자 프로세스 초기화: 변환 단계의 진행 메시지는 응답 채널(표준 출력)을 오염시키지 않도록 버림
+    global worker_cache
+    sys.stdout = open(os.devnull, "w")
+    if cache_opts:
+        worker_cache = CompileCache(cache_opts["dir"], cache_opts["max_bytes"])
+    gcc_version(cache_dir=cache_opts["dir"] if cache_opts else None)
+    try:
+        compile_source(WARMUP_SOURCE)
+    except Exception:
+        # 예열 실패는 첫 요청에서 같은 오류로 보고됨
+        pass
+
+
+def compile_request(request):
+    # 요청 하나를 변환하여 응답 딕셔너리를 반환 (작업자 프로세스에서 실행)
+    # 요청: {"id": 임의 값, "source": C 소스 또는 "path": C 파일 경로, "format": 출력 형식, "depth": 메모리 깊이}
+    start = time.perf_counter()
+    response = {"id": request.get("id")}
+    try:
+        c_file_path = None
+        if "source" in request:
+            c_text = request["source"]
+        elif "path" in request:
+            c_file_path = request["path"]
+            with open(request["path"], "rt", encoding="UTF8") as f:
+                c_text = f.read()
+        else:
+            raise Exception("요청에 source 또는 path가 없습니다.")
+        options = {"format": request.get("format", "mif"), "depth": request.get("depth", MIFGenerator.DEPTH)}
+        fmt = output_format(options)
+        with contextlib.redirect_stdout(io.StringIO()):
+            data = compile_source(c_text, cache=worker_cache, options=options, c_file_path=c_file_path)
+        response["ok"] = True
+        response["format"] = fmt
+        if fmt == "mif":
+            response["output"] = data.decode("utf-8")
+        else:
+            response["output_base64"] = base64.b64encode(data).decode("ascii")
+    except FileNotFoundError as e:
+        response["ok"] = False
+        response["error"] = f"파일을 찾을 수 없습니다: {e.filename}"
+    except Exception as e:
+        response["ok"] = False
+        response["error"] = str(e).strip()
+    response["elapsed_ms"] = round((time.perf_counter() - start) * 1000, 3)
+    return response
+
+
+class CompileServer:
+    # 변환 단계를 미리 불러 둔 작업자 프로세스 풀에 JSON-lines 요청을 나눠 주고 응답을 돌려줌
+    # 한 연결(스트림) 안의 요청은 동시에 처리되므로 응답 순서는 요청 순서와 다를 수 있음 (id로 구분)
+    def __init__(self, workers=0, cache_opts=None):
+        self.workers = max(1, workers or os.cpu_count() or 1)
+        self.pool = ProcessPoolExecutor(max_workers=self.workers, initializer=init_worker, initargs=(cache_opts,))
+        self.stopped = threading.Event()
+        # 작업자를 미리 모두 띄워 첫 요청이 프로세스 생성/예열을 기다리지 않게 함
+        for future in [self.pool.submit(os.getpid) for _ in range(self.workers)]:
+            future.result()
+
+    def handle_control(self, request):
+        # 변환 이외의 요청: ping(상태 확인), shutdown(서버 종료), 그 외는 None
+        op = request.get("op")
+        if op == "ping":
+            return {"id": request.get("id"), "ok": True, "version": COMPILER_VERSION, "workers": self.workers}
+        if op == "shutdown":
+            self.stopped.set()
+            return {"id": request.get("id"), "ok": True}
+        if op not in (None, "compile"):
+            return {"id": request.get("id"), "ok": False, "error": f"알 수 없는 요청입니다: {op}"}
+        return None
+
+    def serve_stream(self, rfile, wfile):
+        # 스트림에서 한 줄에 요청 하나(JSON)를 읽어 처리하고, 끝나는 대로 응답을 한 줄씩 씀
+        lock = threading.Lock()
+        pending = []
+
+        def reply(response):
+            line = json.dumps(response, ensure_ascii=False) + "\n"
+            with lock:
+                wfile.write(line)
+                wfile.flush()
+
+        def done(future):
+            try:
+                reply(future.result())
+            except Exception as e:
+                # 작업자 프로세스가 비정상 종료된 경우
+                reply({"id": None, "ok": False, "error": str(e)})
+
+        for line in rfile:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                request = json.loads(line)
+                if not isinstance(request, dict):
+                    raise ValueError("요청은 JSON 객체여야 합니다.")
+            except ValueError as e:
+                reply({"id": None, "ok": False, "error": f"잘못된 요청: {e}"})
+                continue
+            control = self.handle_control(request)
+            if control is not None:
+                reply(control)
+                if self.stopped.is_set():
+                    break
+                continue
+            future = self.pool.submit(compile_request, request)
+            future.add_done_callback(done)
+            pending.append(future)
+        for future in pending:
+            with contextlib.suppress(Exception):
+                future.result()
+
+    def serve_stdio(self):
+        self.serve_stream(sys.stdin, sys.stdout)
+
+    def serve_unix(self, path):
+        # 유닉스 도메인 소켓에서 연결마다 스레드 하나로 serve_stream 실행
+        server_ref = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                rfile = io.TextIOWrapper(self.rfile, encoding="utf-8")
+                wfile = io.TextIOWrapper(self.wfile, encoding="utf-8", write_through=True)
+                server_ref.serve_stream(rfile, wfile)
+                if server_ref.stopped.is_set():
+                    threading.Thread(target=self.server.shutdown, daemon=True).start()
+
+        if os.path.exists(path):
+            os.remove(path)
+        server = socketserver.ThreadingUnixStreamServer(path, Handler)
+        server.daemon_threads = True
+        print(f"🚀 변환 서버 시작: {path} (작업자 {self.workers}개)", file=sys.stderr)
+        try:
+            server.serve_forever()
+        finally:
+            server.server_close()
+            with contextlib.suppress(OSError):
+                os.remove(path)
+
+    def close(self):
+        self.pool.shutdown()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="main.py serve",
+                                     description="변환기를 상주시켜 JSON-lines 변환 요청을 처리합니다.")
+    parser.add_argument("--socket", default=None, help="요청을 받을 유닉스 도메인 소켓 경로 (없으면 표준 입력/출력)")
+    parser.add_argument("-j", "--jobs", type=int, default=0, help="작업자 프로세스 수 (기본값: CPU 개수)")
+    parser.add_argument("--no-cache", action="store_true", help="컴파일 캐시를 사용하지 않습니다.")
+    parser.add_argument("--cache-dir", default=None, help="컴파일 캐시 폴더 (기본값: $EOPPP_CACHE_DIR 또는 ~/.cache/eoppp)")
+    parser.add_argument("--cache-max-mb", type=int, default=512, help="캐시 최대 크기(MB) (기본값: 512)")
+    args = parser.parse_args(argv)
+
+    cache_opts = None
+    if not args.no_cache:
+        cache_opts = {"dir": args.cache_dir or default_cache_dir(), "max_bytes": args.cache_max_mb * 1024 * 1024}
+    if args.socket and not hasattr(socketserver, "ThreadingUnixStreamServer"):
+        raise Exception("이 플랫폼은 유닉스 도메인 소켓을 지원하지 않습니다. 표준 입력/출력 모드를 사용하세요.")
+
+    server = CompileServer(args.jobs, cache_opts)
+    try:
+        if args.socket:
+            server.serve_unix(args.socket)
+        else:
+            server.serve_stdio()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
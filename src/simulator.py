@@ -0,0 +1,333 @@
+import re
+import sys
+import time
+import argparse
+
+try:
+    import numpy as np
+except ImportError:
+    # 시뮬레이터만 NumPy가 필요함 (변환 파이프라인은 NumPy 없이 동작)
+    np = None
+
+from src.expr_dag import TRUNCATED, ExprDAG
+from src.hwloop import HW_CONTROL_REG, HW_COUNT_1D_REG, HW_COUNT_2D_REG, LOOPEN_1D, LOOPEN_2D
+
+# .mif 레지스터 라인: '--<주소> :<값>; -- r<번호> <설명> <레지스터 조합> <명령어> <값> GPC=<물리 GPC>'
+MIF_REG_RE = re.compile(r"^--(\d+)\s*:([0-9a-fA-F]{8})\s*;\s*--\s*r(\d+)\b(.*)$")
+MIF_DEPTH_RE = re.compile(r"^DEPTH\s*=\s*(\d+)\s*;")
+# 배치 주석: '-- placement: GPC 3    <- fibo action'
+PLACEMENT_RE = re.compile(r"^-- placement: GPC (\d+)\s+<- (\S+) (\S+)$")
+CMD_RE = re.compile(r"\b(LXY|ADD|GEZ|GTZ)\(\s*\w+\s*,\s*\w+\s*\)")
+# 조건 레지스터의 조합: '(r0+r6+r1) >= 0 ? outL:inL'
+COND_COMBO_RE = re.compile(r"\((.*)\)\s*(>=|>)\s*0\s*\?\s*outL:inL")
+DESC_VAR_RE = re.compile(r"^\s*(\w+) = ")
+REG_NAME_RE = re.compile(r"^r(\d+)$")
+
+WORD_MASK = 0xFFFFFFFF
+SIGN_BIT = 1 << 31
+# y[127]: [31] loopen_1d 분기 표시, [30] loopen_2d 분기 표시, [15:0] loopin offset
+BRANCH_1D = 1 << 31
+
+
+def require_numpy():
+    if np is None:
+        raise Exception("시뮬레이터에는 NumPy가 필요합니다: pip install numpy")
+
+
+class RegProgram:
+    # GPC 하나의 레지스터 프로그램 (명령어 종류, 데이터 워드, 레지스터 조합, 설명)
+    __slots__ = ("slot", "words", "cmds", "combos", "descs")
+
+    def __init__(self, slot, regs):
+        self.slot = slot
+        self.words = [0] * regs
+        self.cmds = [""] * regs
+        self.combos = [""] * regs
+        self.descs = [""] * regs
+
+    def variables(self):
+        # {변수 이름: 레지스터 번호}, 'var = 값' 설명을 가진 레지스터만
+        names = {}
+        for reg, desc in enumerate(self.descs):
+            m = DESC_VAR_RE.match(desc)
+            if m:
+                names.setdefault(m.group(1), reg)
+        return names
+
+
+class MIFImage:
+    # .mif 파일을 GPC별 레지스터 프로그램으로 읽음 (명령어와 레지스터 조합은 라인 주석에서 복원)
+    def __init__(self, regs=128):
+        self.regs = regs
+        self.depth = 0
+        self.gpcs = {}  # {물리 GPC: RegProgram}
+        self.placement = {}  # {함수 이름: {역할: 물리 GPC}}, 배치 주석이 있을 때만
+
+    @classmethod
+    def load(cls, path, regs=128):
+        with open(path, 'r', encoding='utf-8') as f:
+            return cls.parse(f.read().split("\n"), regs)
+
+    @classmethod
+    def parse(cls, lines, regs=128):
+        image = cls(regs)
+        for line in lines:
+            m = MIF_DEPTH_RE.match(line)
+            if m:
+                image.depth = int(m.group(1))
+                continue
+            m = PLACEMENT_RE.match(line)
+            if m:
+                image.placement.setdefault(m.group(2), {})[m.group(3)] = int(m.group(1))
+                continue
+            m = MIF_REG_RE.match(line)
+            if not m:
+                continue
+            addr, word, reg = int(m.group(1)), int(m.group(2), 16), int(m.group(3))
+            slot = addr // regs
+            prog = image.gpcs.get(slot)
+            if prog is None:
+                prog = image.gpcs[slot] = RegProgram(slot, regs)
+            prog.words[reg] = word
+            rest = m.group(4)
+            cmd = None
+            for cmd in CMD_RE.finditer(rest):
+                pass
+            if cmd is None:
+                continue
+            prog.cmds[reg] = cmd.group(1)
+            before = rest[:cmd.start()].strip()
+            cond = COND_COMBO_RE.search(before)
+            if cond:
+                prog.combos[reg] = cond.group(1)
+                prog.descs[reg] = before[:cond.start()].strip()
+            else:
+                desc, _, combo = before.rpartition(" ")
+                prog.combos[reg] = combo
+                prog.descs[reg] = desc.strip()
+        return image
+
+    def function_gpcs(self, name=None, index=0):
+        # (초기화 GPC, 연산 GPC): 배치 주석이 있으면 함수 이름(없으면 index번째 함수)으로, 없으면 index번째 함수(2i, 2i+1)
+        # 레지스터가 모자라 추가 상태(init.1, action.1 등)로 나뉜 함수는 두 상태만으로는 결과가 틀리므로 예외
+        if not self.placement:
+            if name is not None:
+                raise Exception(f"배치 주석에서 함수를 찾을 수 없습니다: {name}")
+            return 2 * index, 2 * index + 1
+        if name is None:
+            names = list(self.placement)
+            if not 0 <= index < len(names):
+                raise Exception(f"배치 주석에 {index}번째 함수가 없습니다 (함수 {len(names)}개).")
+            name = names[index]
+        roles = self.placement.get(name)
+        if not roles or "init" not in roles or "action" not in roles:
+            raise Exception(f"배치 주석에서 함수를 찾을 수 없습니다: {name}")
+        extra = [role for role in roles if role not in ("init", "action")]
+        if extra:
+            raise Exception(f"{name} 함수는 추가 상태({', '.join(extra)})로 나뉘어 있어 시뮬레이션할 수 없습니다.")
+        return roles["init"], roles["action"]
+
+
+def to_signed(x):
+    # 32비트 워드로 자른 뒤 부호 있는 값으로 (int64 배열)
+    return ((x + SIGN_BIT) & WORD_MASK) - SIGN_BIT
+
+
+def c_divide(a, b, remainder=False):
+    # C 정수 나눗셈/나머지 (0 방향 버림, 0으로 나누면 0)
+    a, b = np.broadcast_arrays(np.asarray(a, dtype=np.int64), np.asarray(b, dtype=np.int64))
+    safe = np.where(b == 0, 1, b)
+    q = np.abs(a) // np.abs(safe)
+    q = np.where((a < 0) != (safe < 0), -q, q)
+    out = a - safe * q if remainder else q
+    return np.where(b == 0, 0, out)
+
+
+BINARY_OPS = {
+    "/": lambda a, b: c_divide(a, b),
+    "%": lambda a, b: c_divide(a, b, remainder=True),
+    "<<": lambda a, b: np.left_shift(a, np.asarray(b) & 63),
+    ">>": lambda a, b: np.right_shift(a, np.asarray(b) & 63),
+    "&": lambda a, b: np.bitwise_and(a, b),
+    "|": lambda a, b: np.bitwise_or(a, b),
+    "^": lambda a, b: np.bitwise_xor(a, b),
+}
+
+
+def compile_node(node, memory):
+    # ExprDAG 노드를 (벡터 수, 레지스터 수) 배열을 받아 (벡터 수,) 배열을 돌려주는 함수로 변환
+    # rN 이외의 이름(레지스터가 없는 변수)과 memory에 없는 배열 읽기는 0
+    # 해석하지 못한 식, 함수 호출, 실수 리터럴은 값을 알 수 없으므로 0으로 두지 않고 예외
+    kind = node[0]
+    if kind in ("opaque", "call", "lit"):
+        raise Exception(f"레지스터 조합에 값을 계산할 수 없는 식이 있습니다: {node[1]}")
+    if kind == "const":
+        value = node[1]
+        return lambda regs: np.int64(value)
+    if kind == "var":
+        m = REG_NAME_RE.match(node[1])
+        if not m:
+            return lambda regs: np.int64(0)
+        reg = int(m.group(1))
+        return lambda regs: regs[:, reg]
+    if kind in ("sum", "mul"):
+        parts = [compile_node(x, memory) for x in node[1]]
+        if kind == "sum":
+            return lambda regs: to_signed(sum(f(regs) for f in parts))
+
+        def product(regs):
+            value = np.int64(1)
+            for f in parts:
+                value = to_signed(value * f(regs))
+            return value
+        return product
+    if kind == "neg":
+        f = compile_node(node[1], memory)
+        return lambda regs: to_signed(-f(regs))
+    if kind == "not":
+        f = compile_node(node[1], memory)
+        return lambda regs: to_signed(~f(regs))
+    if kind == "bin":
+        op = BINARY_OPS[node[1]]
+        fa, fb = compile_node(node[2], memory), compile_node(node[3], memory)
+        return lambda regs: to_signed(op(fa(regs), fb(regs)))
+    if kind == "load" and node[1] in memory:
+        data = np.asarray(memory[node[1]], dtype=np.int64)
+        f = compile_node(node[2], memory)
+
+        def load(regs):
+            index = np.broadcast_to(f(regs), (regs.shape[0],))
+            inside = (index >= 0) & (index < len(data))
+            return np.where(inside, data[np.clip(index, 0, len(data) - 1)], 0)
+        return load
+    return lambda regs: np.int64(0)
+
+
+def compile_combo(combo, memory):
+    # 주석 길이 제한(DESC_LIMIT)으로 잘린 조합은 식 일부가 빠져 있으므로 예외
+    if TRUNCATED in combo:
+        raise Exception(f"레지스터 조합이 잘려 있어 시뮬레이션할 수 없습니다: {combo}")
+    return compile_node(ExprDAG().parse(combo), memory)
+
+
+def simulate(image, init_gpc=0, action_gpc=1, vectors=1, inputs=None, memory=None, max_iters=100000):
+    # GPC0(초기화) -> GPC1(연산) 상태 기계를 벡터 여러 개에 대해 한꺼번에 실행
+    #   초기화: 모든 레지스터에 초기화 GPC의 워드를 로드 (inputs {레지스터 번호 또는 변수 이름: 값 또는 배열}로 덮어씀)
+    #   연산(1 사이클): ADD 레지스터는 이전 사이클의 레지스터로 조합을 동시에 계산, LXY 레지스터는 값을 유지
+    #   분기: GEZ(조합 >= 0) 또는 GTZ(조합 > 0)가 참이면 루프를 빠져나감(outL), 아니면 연산 GPC를 반복(inL)
+    #   하드웨어 루프: y[127]에 loopen_1d가 켜져 있으면 반복 횟수(r125, loopen_2d이면 r125 * r124)를 채운 뒤에도 빠져나감
+    # memory: {배열 이름: 값 목록}, 조합 안의 배열 읽기에 사용 (없으면 0)
+    # 반환: registers (벡터, 레지스터), iterations, cycles(초기화 1 + 반복 수), exited, y127, elapsed
+    require_numpy()
+    init = image.gpcs.get(init_gpc)
+    action = image.gpcs.get(action_gpc)
+    if init is None or action is None:
+        raise Exception(f"이미지에 GPC {init_gpc}/{action_gpc}가 없습니다.")
+    memory = memory or {}
+
+    regs = np.tile(to_signed(np.array(init.words, dtype=np.int64)), (vectors, 1))
+    names = init.variables()
+    for key, value in (inputs or {}).items():
+        reg = names.get(key) if isinstance(key, str) else key
+        if reg is None:
+            raise Exception(f"초기화 GPC에 없는 변수입니다: {key}")
+        regs[:, reg] = to_signed(np.asarray(value, dtype=np.int64))
+
+    updates = []
+    exits = []
+    for reg, (cmd, combo) in enumerate(zip(action.cmds, action.combos)):
+        if cmd not in ("ADD", "GEZ", "GTZ") or not combo:
+            continue
+        try:
+            f = compile_combo(combo, memory)
+        except Exception as e:
+            raise Exception(f"GPC {action_gpc} r{reg}: {e}")
+        if cmd == "ADD":
+            updates.append((reg, f))
+        else:
+            exits.append((cmd, f))
+    control = action.words[HW_CONTROL_REG] if len(action.words) > HW_CONTROL_REG else 0
+    hw_trips = None
+    if control & LOOPEN_1D:
+        hw_trips = action.words[HW_COUNT_1D_REG] * (action.words[HW_COUNT_2D_REG] if control & LOOPEN_2D else 1)
+    loopen_1d = hw_trips is not None or any(cmd == "GEZ" for cmd, _ in exits)
+
+    iterations = np.zeros(vectors, dtype=np.int64)
+    active = np.ones(vectors, dtype=bool)
+    start = time.perf_counter()
+    for _ in range(max_iters):
+        # 조건과 갱신 모두 반복 시작 시점의 레지스터로 계산
+        leave = np.zeros(vectors, dtype=bool)
+        for cmd, f in exits:
+            value = np.broadcast_to(f(regs), (vectors,))
+            leave |= value >= 0 if cmd == "GEZ" else value > 0
+        if hw_trips is not None:
+            leave |= iterations + 1 >= hw_trips
+        nxt = regs.copy()
+        for reg, f in updates:
+            nxt[:, reg] = f(regs)
+        regs = np.where(active[:, None], nxt, regs)
+        iterations += active
+        active &= ~leave
+        if (not exits and hw_trips is None) or not active.any():
+            break
+    elapsed = time.perf_counter() - start
+
+    y127 = np.where(active & loopen_1d, BRANCH_1D, 0).astype(np.int64)
+    return {
+        "registers": regs,
+        "iterations": iterations,
+        "cycles": iterations + 1,
+        "exited": ~active,
+        "y127": y127,
+        "elapsed": elapsed,
+    }
+
+
+def parse_inputs(items, vectors):
+    # '--set 이름=값' 또는 '--set 이름=시작:끝' (끝 미포함, 벡터마다 하나씩 증가하며 반복)
+    inputs = {}
+    for item in items or []:
+        key, _, value = item.partition("=")
+        key = int(key[1:]) if REG_NAME_RE.match(key) else key
+        if ":" in value:
+            lo, hi = (int(v, 0) for v in value.split(":", 1))
+            if hi <= lo:
+                raise Exception(f"잘못된 범위입니다: {item}")
+            inputs[key] = lo + np.arange(vectors, dtype=np.int64) % (hi - lo)
+        else:
+            inputs[key] = int(value, 0)
+    return inputs
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="생성된 eFlow .mif 이미지를 NumPy로 시뮬레이션합니다.")
+    parser.add_argument("mif", help="시뮬레이션할 .mif 파일")
+    parser.add_argument("--function", default=None, help="배치 주석(-- placement)에 있는 함수 이름")
+    parser.add_argument("--index", type=int, default=0, help="배치 주석이 없을 때 함수 순서 번호 (GPC 2i, 2i+1, 기본값: 0)")
+    parser.add_argument("--vectors", type=int, default=1, help="동시에 실행할 입력 벡터 수 (기본값: 1)")
+    parser.add_argument("--set", action="append", metavar="NAME=VALUE", help="초기 레지스터 값 (변수 이름 또는 rN, 값 또는 시작:끝 범위)")
+    parser.add_argument("--max-iters", type=int, default=100000, help="최대 반복 수 (기본값: 100000)")
+    args = parser.parse_args(argv)
+
+    require_numpy()
+    image = MIFImage.load(args.mif)
+    init_gpc, action_gpc = image.function_gpcs(args.function, args.index)
+    result = simulate(image, init_gpc, action_gpc, args.vectors, parse_inputs(args.set, args.vectors),
+                      max_iters=args.max_iters)
+
+    names = image.gpcs[init_gpc].variables()
+    print(f"GPC {init_gpc} -> GPC {action_gpc}, 벡터 {args.vectors}개")
+    for name, reg in names.items():
+        print(f"  {name:<12} r{reg:<4} {int(result['registers'][0, reg])}")
+    cycles = result["cycles"]
+    print(f"반복: {int(result['iterations'][0])}, 사이클: 평균 {cycles.mean():.1f} / 최대 {int(cycles.max())}, "
+          f"종료하지 않은 벡터: {int((~result['exited']).sum())}")
+    steps = int(result["iterations"].sum())
+    if result["elapsed"] > 0:
+        print(f"처리량: {steps / result['elapsed']:.0f} 벡터·반복/초")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
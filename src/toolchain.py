@@ -0,0 +1,221 @@
+import os
+import glob
+import json
+import shutil
+import tempfile
+from functools import lru_cache
+
+# 한 번의 GCC 호출로 묶어서 덤프할 최대 소스 파일 수
+GIMPLE_BATCH_SIZE = 32
+
+# GCC 탐색 결과를 저장하는 파일 (캐시 폴더 안, GCC 실행 파일 경로별 항목)
+PROBE_FILE = "toolchain.json"
+
+GCC_NOT_FOUND = "GCC가 설치되지 않았거나 PATH에 없습니다. MinGW를 설치하고 PATH를 확인하세요."
+
+# 탐색할 때 지원 여부를 확인하는 덤프 옵션 (GimpleParser는 기본 GIMPLE 형식만 읽음)
+GIMPLE_DUMP_FLAG = "-fdump-tree-gimple"
+PROBE_DUMP_FLAGS = (GIMPLE_DUMP_FLAG, "-fdump-tree-gimple-raw", "-fdump-tree-gimple-lineno", "-fdump-tree-cfg")
+
+
+def dump_flags_supported(gcc, flags):
+    # 빈 소스를 주어진 덤프 옵션으로 컴파일해 보고 성공 여부를 반환 (덤프 파일은 임시 폴더에 생성 후 삭제)
+    import subprocess
+    with tempfile.TemporaryDirectory(prefix="eoppp-probe-") as tmp:
+        try:
+            result = subprocess.run([gcc, *flags, "-x", "c", "-c", "-", "-o", os.devnull], cwd=tmp,
+                                    input=b"int x;\n", stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        except FileNotFoundError:
+            raise Exception(GCC_NOT_FOUND)
+    return result.returncode == 0
+
+
+def probe_dump_flags(gcc):
+    # 후보 옵션을 한 번에 확인하고, 실패하면 어느 옵션이 문제인지 옵션마다 따로 확인
+    if dump_flags_supported(gcc, PROBE_DUMP_FLAGS):
+        return list(PROBE_DUMP_FLAGS)
+    return [flag for flag in PROBE_DUMP_FLAGS if dump_flags_supported(gcc, (flag,))]
+
+
+def probe_path(cache_dir):
+    return os.path.join(cache_dir, PROBE_FILE)
+
+
+def load_probes(path):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            probes = json.load(f)
+        return probes if isinstance(probes, dict) else {}
+    except (OSError, ValueError):
+        return {}
+
+
+def save_probes(path, probes):
+    # 다른 프로세스와 동시에 쓰더라도 깨진 파일이 남지 않도록 임시 파일에 쓴 뒤 교체 (실패해도 무시)
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp = tempfile.mkstemp(prefix=".toolchain-", dir=os.path.dirname(path))
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(probes, f, indent=1, ensure_ascii=False)
+        os.replace(tmp, path)
+    except OSError:
+        pass
+
+
+@lru_cache(maxsize=None)
+def probe_toolchain(gcc="gcc", cache_dir=None):
+    # GCC 실행 파일의 경로, 버전(--version 전체 출력), 지원하는 덤프 옵션 (프로세스당 한 번만 확인)
+    # cache_dir(변환에 쓰는 캐시 폴더)를 주면 그 안에 실행 파일의 실제 경로별로 저장하고, mtime/크기가 바뀌면 다시 탐색
+    # cache_dir가 None이면(--no-cache) 디스크에 읽거나 쓰지 않음
+    # 버전 문자열은 호출한 이름 그대로 실행한 결과 ('gcc (Debian ...) 12.2.0')
+    path = shutil.which(gcc)
+    if path is None:
+        raise Exception(GCC_NOT_FOUND)
+    path = os.path.realpath(path)
+    st = os.stat(path)
+    cache_file = probe_path(cache_dir) if cache_dir else None
+    probes = load_probes(cache_file) if cache_file else {}
+    probe = probes.get(path)
+    if (isinstance(probe, dict) and probe.get("mtime_ns") == st.st_mtime_ns and probe.get("size") == st.st_size
+            and isinstance(probe.get("dump_flags"), list)):
+        return probe
+
+    import subprocess
+    try:
+        result = subprocess.run([gcc, "--version"], check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    except FileNotFoundError:
+        raise Exception(GCC_NOT_FOUND)
+    except subprocess.CalledProcessError as e:
+        raise Exception(f"GCC 버전 확인 실패: {e.stderr.decode()}")
+    probe = {
+        "path": path,
+        "mtime_ns": st.st_mtime_ns,
+        "size": st.st_size,
+        "version": result.stdout.decode(),
+        "dump_flags": probe_dump_flags(gcc),
+    }
+    if cache_file:
+        probes[path] = probe
+        save_probes(cache_file, probes)
+    return probe
+
+
+def gcc_version(gcc="gcc", cache_dir=None):
+    # gcc --version 출력 전체를 문자열로 반환 (cache_dir를 주면 그 폴더의 탐색 결과 캐시 사용)
+    return probe_toolchain(gcc, cache_dir)["version"]
+
+
+def gimple_dump_flag(gcc="gcc", cache_dir=None):
+    # GIMPLE 덤프 명령에 쓸 옵션을 탐색 결과에서 고름 (지원하지 않는 컴파일러면 예외, 예: gcc가 clang인 경우)
+    if GIMPLE_DUMP_FLAG not in probe_toolchain(gcc, cache_dir)["dump_flags"]:
+        raise Exception(f"{gcc}가 GIMPLE 덤프 옵션({GIMPLE_DUMP_FLAG})을 지원하지 않습니다. GCC(MinGW)를 사용하세요.")
+    return GIMPLE_DUMP_FLAG
+
+
+def find_gimple_dump(dump_dir, source_name):
+    # dump_dir 안에서 '<소스 파일명>.NNNt.gimple' 형태의 덤프 파일을 찾음
+    matches = glob.glob(os.path.join(glob.escape(dump_dir), glob.escape(source_name) + ".*.gimple"))
+    return matches[0] if matches else None
+
+
+async def _run_gcc(args, dump_dir, stdin_data=None, gcc="gcc"):
+    # GCC를 비동기 하위 프로세스로 실행하고 (반환 코드, stderr)를 돌려줌
+    # asyncio/subprocess는 불러오는 비용이 커서(수십 ms) GCC를 실제로 실행할 때만 불러옴
+    import asyncio
+    import subprocess
+    try:
+        proc = await asyncio.create_subprocess_exec(
+            gcc, *args,
+            cwd=dump_dir,
+            stdin=subprocess.PIPE if stdin_data is not None else subprocess.DEVNULL,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+        )
+    except FileNotFoundError:
+        raise Exception(GCC_NOT_FOUND)
+    _, stderr = await proc.communicate(stdin_data)
+    return proc.returncode, stderr.decode()
+
+
+async def _dump_group(sources, dump_dir, gcc="gcc", dump_flag=GIMPLE_DUMP_FLAG):
+    # 파일명이 겹치지 않는 소스 묶음을 한 번의 GCC 호출로 덤프
+    # 실패하면 어느 파일이 문제인지 가리기 위해 파일별로 다시 실행
+    results = {}
+    returncode, stderr = await _run_gcc([dump_flag, "-c", *sources], dump_dir, gcc=gcc)
+    if returncode != 0 and len(sources) > 1:
+        for src in sources:
+            results.update(await _dump_group([src], dump_dir, gcc, dump_flag))
+        return results
+    for src in sources:
+        dump = find_gimple_dump(dump_dir, os.path.basename(src)) if returncode == 0 else None
+        if dump is None:
+            results[src] = Exception(f"GIMPLE 생성 실패: {stderr}" if returncode != 0
+                                     else "GIMPLE 파일이 생성되지 않았습니다. GCC 출력 파일을 확인하세요.")
+        else:
+            results[src] = dump
+    return results
+
+
+def _plan_groups(sources, batch_size):
+    # 같은 디렉터리에 덤프되므로 한 묶음 안에서는 파일명이 유일해야 함
+    groups = []
+    for src in sources:
+        name = os.path.basename(src)
+        for group in groups:
+            if len(group) < batch_size and all(os.path.basename(s) != name for s in group):
+                group.append(src)
+                break
+        else:
+            groups.append([src])
+    return groups
+
+
+async def dump_gimple_batch_async(sources, dump_dir, batch_size=GIMPLE_BATCH_SIZE, max_procs=None, gcc="gcc",
+                                  cache_dir=None):
+    import asyncio
+    dump_flag = gimple_dump_flag(gcc, cache_dir)
+    sources = [os.path.abspath(s) for s in sources]
+    semaphore = asyncio.Semaphore(max_procs or os.cpu_count() or 1)
+    groups = _plan_groups(sources, batch_size)
+
+    async def run(group, idx):
+        # 묶음마다 하위 폴더를 따로 써서 동시에 실행되는 GCC끼리 겹치지 않게 함
+        group_dir = os.path.join(dump_dir, f"g{idx}")
+        os.makedirs(group_dir, exist_ok=True)
+        async with semaphore:
+            return await _dump_group(group, group_dir, gcc, dump_flag)
+
+    results = {}
+    for part in await asyncio.gather(*(run(g, i) for i, g in enumerate(groups))):
+        results.update(part)
+    return results
+
+
+def dump_gimple_batch(sources, dump_dir, batch_size=GIMPLE_BATCH_SIZE, max_procs=None, gcc="gcc", cache_dir=None):
+    # 여러 C 파일의 GIMPLE을 dump_dir(전용 임시 폴더)에 생성
+    # cache_dir를 주면 그 폴더에 저장된 GCC 탐색 결과로 덤프 옵션을 고름
+    # 반환값: {절대 경로: 덤프 파일 경로 또는 Exception}
+    import asyncio
+    return asyncio.run(dump_gimple_batch_async(sources, dump_dir, batch_size, max_procs, gcc, cache_dir))
+
+
+def dump_gimple(source, dump_dir, gcc="gcc", cache_dir=None):
+    # C 파일 하나의 GIMPLE을 dump_dir에 생성하고 덤프 파일 경로를 반환
+    result = dump_gimple_batch([source], dump_dir, gcc=gcc, cache_dir=cache_dir)[os.path.abspath(source)]
+    if isinstance(result, Exception):
+        raise result
+    return result
+
+
+def dump_gimple_text(c_text, dump_dir, gcc="gcc", language="c", cache_dir=None):
+    # 메모리 상의 소스를 표준 입력으로 전달하여 GIMPLE을 dump_dir에 생성
+    # language="cpp-output"이면 이미 전처리된 텍스트로 보고 GCC가 다시 전처리하지 않음
+    import asyncio
+    args = ["-x", language, gimple_dump_flag(gcc, cache_dir), "-c", "-", "-o", os.devnull]
+    returncode, stderr = asyncio.run(_run_gcc(args, dump_dir, c_text.encode(), gcc))
+    if returncode != 0:
+        raise Exception(f"GIMPLE 생성 실패: {stderr}")
+    dump = find_gimple_dump(dump_dir, "-")
+    if dump is None:
+        raise Exception("GIMPLE 파일이 생성되지 않았습니다. GCC 출력 파일을 확인하세요.")
+    return dump